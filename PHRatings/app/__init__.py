@@ -10,7 +10,31 @@ def create_app(config_class=Config):
                 static_folder='../test')
     app.config.from_object(config_class)
 
+    from app.sqlite_profile import configure_engine_options, install_pragmas
+    from app.data_version import install_data_version
+    configure_engine_options(app)
     db.init_app(app)
+    with app.app_context():
+        install_pragmas(app, db.engine)
+        install_data_version(db.engine)
+
+    from app.auth import session_cache, load_principal
+    from app.tokens import deny_list
+    session_cache.init_app(app)
+    deny_list.init_app(app)
+    app.before_request(load_principal)
+
+    from app.matchups import matchup_cache
+    matchup_cache.init_app(app)
+
+    from app.leaderboard import leaderboard
+    leaderboard.init_app(app)
+
+    from app.scheduler import scheduler
+    scheduler.init_app(app)
+
+    from app.deadlines import expiry_timer
+    expiry_timer.init_app(app)
 
     from app.routes import bp as main_bp
     app.register_blueprint(main_bp)
@@ -0,0 +1,148 @@
+"""
+Archival of cold challenges, matches and tournaments.
+
+Rows that can no longer change are moved into archive tables with the same
+columns (see archive_table() in models.py) once they are older than
+ARCHIVE_AFTER_DAYS:
+
+- challenges that EXPIRED or turned into a match (MATCH_CREATED)
+- matches that EXPIRED or were UNDONE; COMPLETED matches carry rating
+  history and are never archived
+- EXPIRED or COMPLETED tournaments without a completed match, together with
+  their participants
+
+Each batch is one INSERT ... SELECT plus one DELETE in its own transaction, so
+writers are never blocked for long. The newest row of each table is kept:
+SQLite reuses the highest rowid after it is deleted, and an archived ID must
+never come back as a live one. Participants move with their tournament, so
+their newest row may be archived and its ID reused; archive tables are keyed
+by their own archive_id, so the same participant ID may be archived twice.
+IDs are preserved, so a live match may point at an archived challenge or
+tournament. Archived rows stay readable through
+?include_archived=true on the listing endpoints.
+"""
+from models import db, Challenge, Match, Tournament, TournamentParticipant, \
+    ChallengeStatus, MatchStatus, TournamentStatus, \
+    challenge_archive, match_archive, tournament_archive, tournament_participant_archive
+from sqlalchemy import select, insert, delete, func, literal, text
+from datetime import datetime, timedelta
+import time
+
+ARCHIVE_VACUUM_MODES = ('full', 'incremental')
+
+def _cold_challenges(cutoff):
+    return [Challenge.status.in_([ChallengeStatus.EXPIRED, ChallengeStatus.MATCH_CREATED]),
+            Challenge.created_at < cutoff]
+
+def _cold_matches(cutoff):
+    return [Match.status.in_([MatchStatus.EXPIRED, MatchStatus.UNDONE]),
+            Match.created_at < cutoff]
+
+def _cold_tournaments(cutoff):
+    return [Tournament.status.in_([TournamentStatus.EXPIRED, TournamentStatus.COMPLETED]),
+            Tournament.expires_at < cutoff,
+            ~select(Match.id).where(Match.tournament_id == Tournament.id,
+                                    Match.status == MatchStatus.COMPLETED).exists()]
+
+# name -> (model, archive table, criteria for cold rows)
+ARCHIVE_KINDS = {
+    'challenges': (Challenge, challenge_archive, _cold_challenges),
+    'matches': (Match, match_archive, _cold_matches),
+    'tournaments': (Tournament, tournament_archive, _cold_tournaments),
+}
+
+def _move(source, archive, where, archived_at):
+    """Copy the rows matching where into archive and delete them. Returns the row count."""
+    names = [column.name for column in source.columns]
+    db.session.execute(insert(archive).from_select(
+        names + ['archived_at'],
+        select(*source.columns, literal(archived_at, archive.c.archived_at.type)).where(where)
+    ))
+    return db.session.execute(delete(source).where(where)).rowcount
+
+def archive_batch(kind, cutoff, batch_size, archived_at=None):
+    """Archive up to batch_size cold rows of one kind in a single transaction. Returns the number moved."""
+    model, archive, cold = ARCHIVE_KINDS[kind]
+    table = model.__table__
+    archived_at = archived_at or datetime.now()
+    newest = select(func.max(table.c.id)).scalar_subquery()
+    ids = db.session.execute(
+        select(model.id).where(*cold(cutoff), model.id < newest).order_by(model.id).limit(batch_size)
+    ).scalars().all()
+    if not ids:
+        return 0
+
+    try:
+        if model is Tournament:
+            participants = TournamentParticipant.__table__
+            _move(participants, tournament_participant_archive,
+                  participants.c.tournament_id.in_(ids), archived_at)
+        moved = _move(table, archive, table.c.id.in_(ids), archived_at)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return moved
+
+def database_size():
+    """Return (file bytes, free bytes) of the main SQLite database"""
+    page_size = db.session.execute(text('PRAGMA page_size')).scalar()
+    page_count = db.session.execute(text('PRAGMA page_count')).scalar()
+    free_pages = db.session.execute(text('PRAGMA freelist_count')).scalar()
+    return page_count * page_size, free_pages * page_size
+
+def vacuum(mode='full'):
+    """Return free pages to the filesystem. 'incremental' only works with auto_vacuum=INCREMENTAL."""
+    if mode not in ARCHIVE_VACUUM_MODES:
+        raise ValueError(f'Unsupported vacuum mode: {mode}')
+    # VACUUM cannot run inside a transaction
+    db.session.commit()
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        connection.execute(text('VACUUM' if mode == 'full' else 'PRAGMA incremental_vacuum'))
+
+def archive_cold_rows(days=30, batch_size=1000, max_batches=None, vacuum_mode=None, now=None):
+    """
+    Archive every cold row older than days, batch_size rows per transaction
+    and at most max_batches batches per kind. Returns a report of rows moved
+    and bytes reclaimed.
+    """
+    start = time.perf_counter()
+    now = now or datetime.now()
+    cutoff = now - timedelta(days=days)
+    size_before, _ = database_size()
+
+    rows = {}
+    for kind in ARCHIVE_KINDS:
+        rows[kind] = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            moved = archive_batch(kind, cutoff, batch_size, archived_at=now)
+            rows[kind] += moved
+            batches += 1
+            if moved < batch_size:
+                break
+
+    if vacuum_mode:
+        vacuum(vacuum_mode)
+    size_after, free_after = database_size()
+
+    return {
+        'cutoff': cutoff.isoformat(),
+        'rows_archived': rows,
+        'bytes_before': size_before,
+        'bytes_after': size_after,
+        # Without a vacuum the freed pages stay in the file for reuse
+        'bytes_reclaimed': size_before - size_after,
+        'free_bytes': free_after,
+        'vacuum': vacuum_mode,
+        'seconds': round(time.perf_counter() - start, 6)
+    }
+
+def archived_rows(archive, *criteria, after=0, limit=None, columns=None):
+    """
+    Rows of an archive table matching criteria with an ID above after, in ID
+    order; only the given columns if any
+    """
+    return db.session.execute(
+        select(*(columns or archive.c)).where(*criteria, archive.c.id > after).order_by(archive.c.id).limit(limit)
+    ).all()
@@ -1,48 +1,166 @@
-from flask import request
-from models import Admin, AdminSession, Player, PlayerSession
-from datetime import datetime
+from flask import request, current_app
+from models import db, Admin, AdminSession, Player, PlayerSession, ADMIN_SESSION_TIMEOUT_HOURS, PLAYER_SESSION_TIMEOUT_HOURS
+from app.tokens import issue_token, verify_token, is_revoked, revoke_token
+from sqlalchemy import select, literal, union_all
+from datetime import datetime, timedelta
+from collections import OrderedDict
+import threading
+import time
 
-def require_admin_auth():
-    """Check if request has valid admin authentication"""
+class SessionCache:
+    """
+    Bounded, TTL-limited in-process cache of bearer-token resolutions.
+
+    Maps token -> (user_type, user_id, expires_at) so that an authenticated
+    request does not have to look the token up in AdminSession/PlayerSession
+    every time. Entries are evicted least-recently-used once max_size is
+    reached, and are dropped after ttl_seconds so that sessions revoked by
+    another worker process stop resolving shortly afterwards.
+    """
+
+    def __init__(self, max_size=10000, ttl_seconds=30, enabled=True):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('AUTH_CACHE_ENABLED', True)
+        self.max_size = app.config.get('AUTH_CACHE_MAX_SIZE', 10000)
+        self.ttl_seconds = app.config.get('AUTH_CACHE_TTL_SECONDS', 30)
+        self.clear()
+
+    def get(self, token):
+        """Return (user_type, user_id, expires_at) for a cached token, or None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            user_type, user_id, expires_at, cached_at = entry
+            if time.monotonic() - cached_at > self.ttl_seconds or expires_at < datetime.now():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return user_type, user_id, expires_at
+
+    def put(self, token, user_type, user_id, expires_at):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[token] = (user_type, user_id, expires_at, time.monotonic())
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token):
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def invalidate_user(self, user_type, user_id):
+        """Drop every cached token belonging to the given user"""
+        with self._lock:
+            stale = [token for token, entry in self._entries.items()
+                     if entry[0] == user_type and entry[1] == user_id]
+            for token in stale:
+                del self._entries[token]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+session_cache = SessionCache()
+
+def get_bearer_token():
+    """Extract the bearer token from the Authorization header, or None"""
     auth_header = request.headers.get('Authorization')
     if not auth_header or not auth_header.startswith('Bearer '):
         return None
-    
-    token = auth_header.split(' ')[1]
-    session = AdminSession.query.filter_by(token=token).first()
-    
-    if not session or session.expires_at < datetime.now():
-        return None
-    
-    return Admin.query.get(session.admin_id)
+    return auth_header.split(' ')[1]
+
+def signed_tokens_enabled():
+    return current_app.config.get('SESSION_TOKEN_MODE') == 'signed'
+
+def resolve_token(token):
+    """
+    Resolve a bearer token to (user_type, user_id) without loading the user.
+    Signed tokens are verified without database access. Database tokens are
+    served from the session cache when possible; otherwise a single query
+    looks the token up in both session tables.
+    """
+    if not token:
+        return None, None
+
+    if signed_tokens_enabled():
+        verified = verify_token(token)
+        if not verified or is_revoked(verified[3]):
+            return None, None
+        return verified[0], verified[1]
+
+    cached = session_cache.get(token)
+    if cached:
+        return cached[0], cached[1]
+
+    admin_sessions = select(
+        literal('admin').label('user_type'),
+        AdminSession.admin_id.label('user_id'),
+        AdminSession.expires_at
+    ).where(AdminSession.token == token)
+    player_sessions = select(
+        literal('player').label('user_type'),
+        PlayerSession.player_id.label('user_id'),
+        PlayerSession.expires_at
+    ).where(PlayerSession.token == token)
+    row = db.session.execute(union_all(admin_sessions, player_sessions)).first()
+
+    if not row or row.expires_at < datetime.now():
+        return None, None
+
+    session_cache.put(token, row.user_type, row.user_id, row.expires_at)
+    return row.user_type, row.user_id
+
+def load_principal():
+    """
+    Resolve the request's bearer token once and store the principal on the
+    request (registered as a before_request hook in create_app).
+    """
+    request.principal = resolve_token(get_bearer_token())
+    request.authenticated_user = None
+
+def current_principal():
+    """Return (user_type, user_id) for the current request, or (None, None)"""
+    if getattr(request, 'principal', None) is None:
+        load_principal()
+    return request.principal
+
+def current_user():
+    """Return (user, user_type) for the current request, loading the user at most once"""
+    user_type, user_id = current_principal()
+    if request.authenticated_user is None:
+        user = None
+        if user_type is not None:
+            user = db.session.get(Admin if user_type == 'admin' else Player, user_id)
+        request.authenticated_user = (user, user_type) if user else (None, None)
+    return request.authenticated_user
+
+def require_admin_auth():
+    """Check if request has valid admin authentication"""
+    user, user_type = current_user()
+    return user if user_type == 'admin' else None
 
 def require_player_auth():
     """Check if request has valid player authentication"""
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return None
-    
-    token = auth_header.split(' ')[1]
-    session = PlayerSession.query.filter_by(token=token).first()
-    
-    if not session or session.expires_at < datetime.now():
-        return None
-    
-    return Player.query.get(session.player_id)
+    user, user_type = current_user()
+    return user if user_type == 'player' else None
 
 def get_authenticated_user():
     """Get authenticated user (either Admin or Player). Returns (user, user_type) or (None, None)"""
-    # Check for admin auth first
-    admin = require_admin_auth()
-    if admin:
-        return admin, 'admin'
-    
-    # Check for player auth
-    player = require_player_auth()
-    if player:
-        return player, 'player'
-    
-    return None, None
+    return current_user()
 
 def authorize_player_action(player_id):
     """
@@ -52,23 +170,65 @@ def authorize_player_action(player_id):
     - If not authorized: (None, (error_json, status_code))
     """
     from flask import jsonify
-    
-    user, user_type = get_authenticated_user()
-    
-    if not user:
+
+    user_type, user_id = current_principal()
+
+    if user_type is None:
         return None, (jsonify({'error': 'Authentication required'}), 401)
-    
-    # Admins can act on behalf of any player
-    if user_type == 'admin':
-        player = Player.query.get(player_id)
-        if not player:
-            return None, (jsonify({'error': 'Player not found'}), 404)
-        return player, None
-    
+
     # Players can only act on their own behalf
     if user_type == 'player':
-        if user.id != player_id:
+        if user_id != player_id:
             return None, (jsonify({'error': 'You can only perform this action for yourself'}), 403)
-        return user, None
-    
-    return None, (jsonify({'error': 'Authorization failed'}), 403)
\ No newline at end of file
+        player, _ = current_user()
+        if not player:
+            return None, (jsonify({'error': 'Authentication required'}), 401)
+        return player, None
+
+    # Admins can act on behalf of any player
+    player = db.session.get(Player, player_id)
+    if not player:
+        return None, (jsonify({'error': 'Player not found'}), 404)
+    return player, None
+
+def start_session(user_type, user_id):
+    """
+    Create a session for the given user and return (token, expires_at).
+    Database sessions are added to db.session and must be committed by the caller.
+    """
+    hours = ADMIN_SESSION_TIMEOUT_HOURS if user_type == 'admin' else PLAYER_SESSION_TIMEOUT_HOURS
+
+    if signed_tokens_enabled():
+        expires_at = datetime.now().replace(microsecond=0) + timedelta(hours=hours)
+        return issue_token(user_type, user_id, expires_at), expires_at
+
+    if user_type == 'admin':
+        session = AdminSession(admin_id=user_id)
+    else:
+        session = PlayerSession(player_id=user_id)
+    db.session.add(session)
+    return session.token, session.expires_at
+
+def end_session(token, user_type):
+    """
+    Revoke a session token (logout).
+    Database sessions are deleted from db.session and must be committed by the caller.
+    """
+    invalidate_session(token)
+
+    if signed_tokens_enabled():
+        revoke_token(token)
+        return
+
+    session_model = AdminSession if user_type == 'admin' else PlayerSession
+    session = session_model.query.filter_by(token=token).first()
+    if session:
+        db.session.delete(session)
+
+def invalidate_session(token):
+    """Forget a token that has just been revoked (logout)"""
+    session_cache.invalidate(token)
+
+def invalidate_player_sessions(player_id):
+    """Forget cached tokens for a player whose status changed"""
+    session_cache.invalidate_user('player', player_id)
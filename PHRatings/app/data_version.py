@@ -0,0 +1,185 @@
+"""
+Global data version for conditional GETs.
+
+The data_version table holds one row: a counter and the UTC time it last
+changed. Every transaction that writes rows bumps it just before it commits,
+in the same transaction, so the counter is shared by every worker process
+using the database file and can never be seen ahead of (or behind) the data.
+Writes are detected on the engine: an INSERT, or an UPDATE/DELETE that
+changed at least one row (sweeps that find nothing to do are not changes),
+to any table except the session and bookkeeping tables in
+UNVERSIONED_TABLES. Writes made outside SQLAlchemy are not seen.
+stamp_version() has the same commit set a column to the new version on the
+rows of a table where it is NULL, so caches in any process can read what
+changed since the version they reflect (see app/leaderboard.py).
+
+PRAGMA data_version was not used: it is a per-connection value that does not
+count the connection's own commits, so it cannot be compared across
+connections or processes.
+
+@conditional listings read the counter (one primary-key lookup) before
+anything else and answer a matching If-None-Match, or an If-Modified-Since
+not older than the last change, with 304 without querying any other table.
+HTTP dates have whole seconds, so If-Modified-Since is compared with the
+change time rounded up. Last-Modified is rounded up too once that second is
+over; within it, when another change could still share the second, it is
+rounded down, so a client revalidating that copy gets the data again rather
+than a 304 that would hide the later change.
+Status changes that only depend on the clock (expiry, tournament start) are
+computed at read time without a write, so the validators also carry the
+latest deadline that has passed without its transition being stored, read
+in the same statement from the (status, deadline) indexes. Deadlines pass in
+time order, so it moves forward whenever a listing's effective_status can
+have changed, until the expiry timer or a sweep stores the change and bumps
+the version.
+"""
+from flask import request, current_app
+from models import db, DataVersion, Tournament, TournamentStatus
+from app.deadlines import TRANSITIONS
+from app.negotiation import response_format
+from sqlalchemy import event, select, func
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+import re
+import sqlite3
+
+UNVERSIONED_TABLES = frozenset({'admin_session', 'player_session', 'schema_migration', 'data_version'})
+
+_WRITE = re.compile(r'\s*(INSERT|REPLACE|UPDATE|DELETE)\b', re.IGNORECASE)
+_RETURNING = re.compile(r'\bRETURNING\b', re.IGNORECASE)
+_WRITTEN = 'data_written'
+
+BUMP_SQL = 'INSERT INTO data_version (id, version, changed_at) VALUES (1, 1, ?) ' \
+           'ON CONFLICT (id) DO UPDATE SET version = version + 1, changed_at = excluded.changed_at ' \
+           'RETURNING version'
+
+# (deadline column, stored status) of rows whose effective_status changes when
+# the deadline passes: the expiry timer's transitions, plus a tournament that
+# ends before its start was stored
+CLOCK_DEADLINES = [(column, before) for _, column, before, _ in TRANSITIONS.values()] + \
+    [(Tournament.expires_at, TournamentStatus.REGISTRATION_OPEN)]
+
+# table name -> column set to the new version where NULL, see stamp_version()
+_stamps = {}
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _table_name(context):
+    statement = getattr(getattr(context, 'compiled', None), 'statement', None)
+    table = getattr(statement, 'table', None)
+    return getattr(table, 'name', None)
+
+def install_data_version(engine):
+    """Bump the data version on every commit of engine that wrote rows"""
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def note_write(conn, cursor, statement, parameters, context, executemany):
+        if not _WRITE.match(statement):
+            return
+        # INSERT ... RETURNING reports rowcount 0 until its rows are fetched
+        if cursor.rowcount == 0 and not _RETURNING.search(statement):
+            return
+        table = _table_name(context)
+        if table not in UNVERSIONED_TABLES:
+            conn.info.setdefault(_WRITTEN, set()).add(table)
+
+    @event.listens_for(engine, 'commit')
+    def bump(conn):
+        tables = conn.info.pop(_WRITTEN, None)
+        if not tables:
+            return
+        cursor = conn.connection.cursor()
+        try:
+            version, = cursor.execute(BUMP_SQL, (_utcnow().strftime('%Y-%m-%d %H:%M:%S.%f'),)).fetchone()
+            for table, column in _stamps.items():
+                # Raw SQL (None) may have written any table
+                if table in tables or None in tables:
+                    cursor.execute(f'UPDATE {table} SET {column} = ? WHERE {column} IS NULL', (version,))
+        except sqlite3.OperationalError as e:
+            # A database that has not been migrated to have the table or column yet
+            if 'no such' not in str(e):
+                raise
+        finally:
+            cursor.close()
+
+    @event.listens_for(engine, 'rollback')
+    def discard(conn):
+        conn.info.pop(_WRITTEN, None)
+
+    @event.listens_for(engine, 'checkin')
+    def reset(dbapi_connection, connection_record):
+        connection_record.info.pop(_WRITTEN, None)
+
+def stamp_version(column):
+    """
+    Have every commit that writes column's table set column to the version it
+    produces on the rows where column is NULL. Writers set it to NULL on the
+    rows they change; column should be indexed.
+    """
+    _stamps[column.table.name] = column.name
+
+def _whole_seconds(changed_at, up=False):
+    """changed_at (naive UTC) as an aware time with whole seconds, rounded down or up"""
+    rounded = changed_at.replace(tzinfo=timezone.utc, microsecond=0)
+    return rounded + timedelta(seconds=1) if up and changed_at.microsecond else rounded
+
+def _last_modified(changed_at):
+    """Last-Modified for data changed at changed_at: rounded up once no other change can share its second"""
+    up = _whole_seconds(changed_at, up=True)
+    return up if _utcnow().replace(tzinfo=timezone.utc) >= up else _whole_seconds(changed_at)
+
+def current_version():
+    """(version, changed_at UTC) of the data, (0, None) before the first write"""
+    row = db.session.execute(select(DataVersion.version, DataVersion.changed_at).where(DataVersion.id == 1)).first()
+    return tuple(row) if row else (0, None)
+
+def current_validators():
+    """
+    (version, changed_at UTC, latest passed deadline not stored yet or None)
+    in a single statement
+    """
+    now = datetime.now()
+    row = db.session.execute(select(
+        select(DataVersion.version).where(DataVersion.id == 1).scalar_subquery(),
+        select(DataVersion.changed_at).where(DataVersion.id == 1).scalar_subquery(),
+        *[select(func.max(column)).where(column.class_.status == before, column <= now).scalar_subquery()
+          for column, before in CLOCK_DEADLINES]
+    )).one()
+    version, changed_at, *deadlines = row
+    return version or 0, changed_at, max(filter(None, deadlines), default=None)
+
+def conditional(view):
+    """
+    Serve a GET conditionally on the data version: 304 if the client's copy is
+    current, otherwise the view's response tagged with ETag and Last-Modified
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        version, changed_at, deadline = current_validators()
+        etag = f'v{version}'
+        if deadline:
+            etag += f'.{deadline:%Y%m%d%H%M%S%f}'
+            # Deadlines are local times like every other timestamp in the models
+            deadline = deadline.astimezone(timezone.utc).replace(tzinfo=None)
+            changed_at = max(changed_at, deadline) if changed_at else deadline
+        # Each negotiated format is a representation of its own
+        fmt = response_format()
+        if fmt != 'json':
+            etag += f'-{fmt}'
+        last_modified = _last_modified(changed_at) if changed_at else None
+
+        if request.if_none_match:
+            fresh = request.if_none_match.contains_weak(etag)
+        else:
+            since = request.if_modified_since
+            fresh = bool(since and changed_at and _whole_seconds(changed_at, up=True) <= since)
+
+        response = current_app.response_class(status=304) if fresh else current_app.make_response(view(*args, **kwargs))
+        if response.status_code in (200, 304):
+            response.set_etag(etag, weak=True)
+            response.last_modified = last_modified
+            # Clients may keep the response but must revalidate before reusing it
+            response.cache_control.no_cache = True
+        return response
+    return wrapper
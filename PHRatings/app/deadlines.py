@@ -0,0 +1,207 @@
+"""
+Deadline-driven status transitions.
+
+Every pending Challenge, Match and Tournament has a known next deadline
+(challenge/match expiry, tournament start and end). ExpiryTimer keeps them in
+a min-heap and sleeps until the earliest one is due, so each transition fires
+when it is due and costs O(log n) instead of a table scan.
+
+The heap is rebuilt from indexed queries when the timer starts and is fed by
+the routes that create challenges, matches and tournaments. Entries are never
+removed when an object changes state early (accepted, recorded, ...): each
+transition is a guarded UPDATE that only touches rows still in the expected
+status, so stale entries are harmless no-ops. Objects created by other worker
+processes are picked up by the scheduler's fallback sweeps.
+"""
+from models import db, Challenge, Match, Tournament, ChallengeStatus, MatchStatus, TournamentStatus
+from sqlalchemy import select, update
+from datetime import datetime, timedelta
+import heapq
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Longest single sleep, so a changed wall clock is noticed eventually
+MAX_WAIT_SECONDS = 60
+# Delay before retrying deadlines whose transition failed, doubled for every
+# consecutive failure up to MAX_WAIT_SECONDS
+RETRY_DELAY_SECONDS = 1
+
+# kind -> (model, deadline column, status before, status after)
+TRANSITIONS = {
+    'challenge_expiry': (Challenge, Challenge.expires_at, ChallengeStatus.PENDING, ChallengeStatus.EXPIRED),
+    'match_expiry': (Match, Match.expires_at, MatchStatus.PENDING, MatchStatus.EXPIRED),
+    'tournament_start': (Tournament, Tournament.start_time, TournamentStatus.REGISTRATION_OPEN, TournamentStatus.ACTIVE),
+    'tournament_end': (Tournament, Tournament.expires_at, TournamentStatus.ACTIVE, TournamentStatus.EXPIRED),
+}
+
+class ExpiryTimer:
+    def __init__(self):
+        self.app = None
+        self._heap = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self.fired = 0
+        self.transitions = 0
+        self.failures = 0
+
+    def init_app(self, app):
+        self.stop()
+        self.app = app
+        with self._lock:
+            self._heap = []
+        self.fired = 0
+        self.transitions = 0
+        self.failures = 0
+
+    def schedule(self, kind, object_id, due_at):
+        """Add a deadline; wakes the timer thread if it is now the earliest one"""
+        if due_at is None:
+            return
+        entry = (due_at, kind, object_id)
+        with self._lock:
+            heapq.heappush(self._heap, entry)
+            earliest = self._heap[0] == entry
+        if earliest:
+            self._wakeup.set()
+
+    def schedule_challenge(self, challenge):
+        self.schedule('challenge_expiry', challenge.id, challenge.expires_at)
+
+    def schedule_match(self, match):
+        self.schedule('match_expiry', match.id, match.expires_at)
+
+    def schedule_tournament(self, tournament):
+        self.schedule('tournament_start', tournament.id, tournament.start_time)
+        self.schedule('tournament_end', tournament.id, tournament.expires_at)
+
+    def rebuild(self):
+        """Reload every pending deadline from the database (needs an app context)"""
+        entries = []
+        for kind, (model, deadline, before, _) in TRANSITIONS.items():
+            rows = db.session.execute(
+                select(deadline, model.id).where(model.status == before, deadline != None)
+            ).all()
+            entries.extend((due_at, kind, object_id) for due_at, object_id in rows)
+        # Tournaments that have not started also need their end deadline
+        rows = db.session.execute(
+            select(Tournament.expires_at, Tournament.id)
+            .where(Tournament.status == TournamentStatus.REGISTRATION_OPEN)
+        ).all()
+        entries.extend((due_at, 'tournament_end', object_id) for due_at, object_id in rows)
+
+        heapq.heapify(entries)
+        with self._lock:
+            self._heap = entries
+        self._wakeup.set()
+        return len(entries)
+
+    def next_due(self):
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def __len__(self):
+        return len(self._heap)
+
+    def pop_due(self, now):
+        """Remove and return every entry due at or before now, earliest first"""
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due.append(heapq.heappop(self._heap))
+        return due
+
+    def fire_due(self, now=None):
+        """Apply every transition that is due (needs an app context). Returns the number of rows changed."""
+        now = now or datetime.now()
+        due = self.pop_due(now)
+        if not due:
+            return 0
+
+        by_kind = {}
+        for _, kind, object_id in due:
+            by_kind.setdefault(kind, []).append(object_id)
+
+        changed = 0
+        try:
+            # Dict order runs tournament starts before ends, so a tournament due
+            # for both in the same tick ends up EXPIRED
+            for kind, (model, deadline, before, after) in TRANSITIONS.items():
+                ids = by_kind.get(kind)
+                if not ids:
+                    continue
+                result = db.session.execute(
+                    update(model)
+                    .where(model.id.in_(ids), model.status == before, deadline <= now)
+                    .values(status=after),
+                    execution_options={'synchronize_session': False}
+                )
+                changed += result.rowcount
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            # Keep the deadlines, but back off so a failure that persists is not retried in a busy loop
+            self.failures += 1
+            delay = min(MAX_WAIT_SECONDS, RETRY_DELAY_SECONDS * 2 ** min(self.failures - 1, 16))
+            retry_at = now + timedelta(seconds=delay)
+            with self._lock:
+                for _, kind, object_id in due:
+                    heapq.heappush(self._heap, (retry_at, kind, object_id))
+            raise
+
+        self.failures = 0
+        self.fired += len(due)
+        self.transitions += changed
+        return changed
+
+    def stats(self):
+        next_due = self.next_due()
+        return {
+            'pending_deadlines': len(self),
+            'next_due': next_due.isoformat() if next_due else None,
+            'deadlines_fired': self.fired,
+            'rows_changed': self.transitions,
+            'consecutive_failures': self.failures
+        }
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        with self.app.app_context():
+            self.rebuild()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='expiry-timer', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while not self._stopping:
+            with self.app.app_context():
+                try:
+                    self.fire_due()
+                except Exception:
+                    logger.exception('Expiry timer transition failed')
+                finally:
+                    db.session.remove()
+
+            next_due = self.next_due()
+            timeout = MAX_WAIT_SECONDS if next_due is None else \
+                min(MAX_WAIT_SECONDS, max(0.0, (next_due - datetime.now()).total_seconds()))
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+
+expiry_timer = ExpiryTimer()
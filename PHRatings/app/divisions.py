@@ -0,0 +1,106 @@
+"""
+Weight/age divisions.
+
+DIVISION_WEIGHT_CLASSES and DIVISION_AGE_CLASSES list (name, upper bound)
+pairs in increasing order; a player is in the first class whose bound is
+above their weight (current age), the last class having no bound (None). The
+player's division key, 'weight class/age class', is stored in Player.division
+together with division_refresh_at, the moment Player.get_current_age() next
+increases, so division listings, leaderboards and opponent searches are
+indexed reads rather than filtered scans.
+
+Keys are assigned whenever a player row is inserted or its weight or age
+changes (mapper events, so registration, PUT /players/weight and any other
+ORM write are covered). The division_roll job moves players whose age has
+rolled over: an indexed range read of division_refresh_at. After changing the
+configured classes run scripts/refresh_divisions.py to reassign everyone.
+"""
+from flask import current_app
+from models import db, Player
+from sqlalchemy import event, inspect, select, update, bindparam
+from datetime import datetime, timedelta
+import math
+
+DIVISION_SEPARATOR = '/'
+
+def class_for(classes, value):
+    """Name of the first (name, upper bound) class whose bound is above value"""
+    for name, bound in classes:
+        if bound is None or value < bound:
+            return name
+    return classes[-1][0]
+
+def current_age(age, registration_date, now):
+    """Age as of now for a player who registered at age (see Player.get_current_age)"""
+    return age + int((now - registration_date).days / 365.25)
+
+def next_age_change(registration_date, now):
+    """First moment after now at which current_age() increases"""
+    years = int((now - registration_date).days / 365.25)
+    return registration_date + timedelta(days=math.ceil(365.25 * (years + 1)))
+
+def division_key(weight, age):
+    config = current_app.config
+    return class_for(config['DIVISION_WEIGHT_CLASSES'], weight) + DIVISION_SEPARATOR + \
+        class_for(config['DIVISION_AGE_CLASSES'], age)
+
+def division_keys():
+    """Every configured division key, heaviest and oldest last"""
+    config = current_app.config
+    return [weight + DIVISION_SEPARATOR + age
+            for weight, _ in config['DIVISION_WEIGHT_CLASSES'] for age, _ in config['DIVISION_AGE_CLASSES']]
+
+def _assignment(age, weight, registration_date, now):
+    # registration_date is filled in by the database on insert
+    registered = registration_date or now
+    return {
+        'division': division_key(weight, current_age(age, registered, now)),
+        'division_refresh_at': next_age_change(registered, now)
+    }
+
+def assign_division(player, now=None):
+    """Set a player's division key and refresh time from their weight and age"""
+    values = _assignment(player.age, player.weight, player.registration_date, now or datetime.now())
+    player.division = values['division']
+    player.division_refresh_at = values['division_refresh_at']
+
+@event.listens_for(Player, 'before_insert')
+def _assign_on_insert(mapper, connection, player):
+    assign_division(player)
+
+@event.listens_for(Player, 'before_update')
+def _assign_on_update(mapper, connection, player):
+    state = inspect(player)
+    if state.attrs.weight.history.has_changes() or state.attrs.age.history.has_changes():
+        assign_division(player)
+
+def refresh_divisions(connection, due_before=None, limit=None):
+    """
+    Reassign the divisions of players whose refresh time is at or before
+    due_before (every player if None), at most limit of them, in one
+    executemany. Returns the number of players reassigned.
+    """
+    now = datetime.now()
+    player = Player.__table__
+    statement = select(player.c.id, player.c.age, player.c.weight, player.c.registration_date)
+    if due_before is not None:
+        statement = statement.where(player.c.division_refresh_at <= due_before) \
+            .order_by(player.c.division_refresh_at)
+    rows = connection.execute(statement.limit(limit)).all()
+    if rows:
+        connection.execute(
+            update(player).where(player.c.id == bindparam('player_id'))
+            .values(division=bindparam('division'), division_refresh_at=bindparam('division_refresh_at')),
+            [{'player_id': row.id, **_assignment(row.age, row.weight, row.registration_date, now)} for row in rows]
+        )
+    return len(rows)
+
+def roll_divisions(batch_size=1000):
+    """Move players whose age has rolled over into their new division, in committed batches"""
+    rolled = 0
+    while True:
+        count = refresh_divisions(db.session.connection(), datetime.now(), batch_size)
+        db.session.commit()
+        rolled += count
+        if count < batch_size:
+            return rolled
@@ -0,0 +1,85 @@
+"""
+Per-player rating history.
+
+One RatingHistory row is written per player per rated match, in the same
+transaction as the rating change, and deleted again when the match is undone.
+The (player_id, recorded_at) index makes point-in-time lookups and range scans
+index seeks rather than replays of the match table.
+"""
+from models import db, DEFAULT_ELO, RatingHistory
+from sqlalchemy import select, insert, delete
+
+def record_rating_change(match, winner, loser, elo_change):
+    """Add history rows for both players of a rated match (caller commits)"""
+    if match.id is None:
+        db.session.flush()
+    db.session.execute(insert(RatingHistory), [
+        {'player_id': winner.id, 'match_id': match.id, 'elo': winner.elo,
+         'elo_change': elo_change, 'recorded_at': match.completed_at},
+        {'player_id': loser.id, 'match_id': match.id, 'elo': loser.elo,
+         'elo_change': -elo_change, 'recorded_at': match.completed_at}
+    ])
+
+def remove_rating_change(match):
+    """Delete the history rows written for a match that is being undone (caller commits)"""
+    db.session.execute(delete(RatingHistory).where(RatingHistory.match_id == match.id))
+
+def rating_at(player_id, at):
+    """Return the player's rating at the given moment (DEFAULT_ELO before their first rated match)"""
+    elo = db.session.execute(
+        select(RatingHistory.elo)
+        .where(RatingHistory.player_id == player_id, RatingHistory.recorded_at <= at)
+        .order_by(RatingHistory.recorded_at.desc(), RatingHistory.id.desc())
+        .limit(1)
+    ).scalar()
+    return DEFAULT_ELO if elo is None else elo
+
+def rating_history(player_id, start=None, end=None):
+    """Return [(recorded_at, elo, match_id), ...] for the player in chronological order"""
+    query = select(RatingHistory.recorded_at, RatingHistory.elo, RatingHistory.match_id) \
+        .where(RatingHistory.player_id == player_id)
+    if start:
+        query = query.where(RatingHistory.recorded_at >= start)
+    if end:
+        query = query.where(RatingHistory.recorded_at <= end)
+    query = query.order_by(RatingHistory.recorded_at, RatingHistory.id)
+    return [tuple(row) for row in db.session.execute(query)]
+
+def downsample(points, threshold):
+    """
+    Reduce [(recorded_at, elo, ...), ...] to at most `threshold` points using
+    Largest-Triangle-Three-Buckets, which keeps the visual shape of a chart
+    (peaks and troughs) far better than taking every n-th point.
+    """
+    if threshold >= len(points) or threshold < 3:
+        return points
+
+    xs = [p[0].timestamp() for p in points]
+    ys = [p[1] for p in points]
+    bucket_size = (len(points) - 2) / (threshold - 2)
+
+    sampled = [points[0]]
+    selected = 0
+    for i in range(threshold - 2):
+        bucket_start = int(i * bucket_size) + 1
+        bucket_end = int((i + 1) * bucket_size) + 1
+
+        # Average of the next bucket is the third vertex of the triangle
+        next_start = bucket_end
+        next_end = min(int((i + 2) * bucket_size) + 1, len(points))
+        avg_x = sum(xs[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(ys[next_start:next_end]) / (next_end - next_start)
+
+        best_area = -1
+        best = bucket_start
+        for j in range(bucket_start, bucket_end):
+            area = abs((xs[selected] - avg_x) * (ys[j] - ys[selected]) -
+                       (xs[selected] - xs[j]) * (avg_y - ys[selected]))
+            if area > best_area:
+                best_area = area
+                best = j
+        sampled.append(points[best])
+        selected = best
+
+    sampled.append(points[-1])
+    return sampled
@@ -0,0 +1,319 @@
+"""
+Bulk import of historical match results.
+
+Input is CSV (with a header row) or NDJSON with the fields player1, player2,
+winner, timestamp, host and notes. Players and hosts may be given by ID or by
+name. Every row is validated against the database with a handful of set-based
+queries, ELO is applied in chronological order in memory, and all Match,
+RatingHistory and Player writes happen in one transaction with executemany.
+Ratings are written back only if no player was rated since they were read
+(rating_version, as in apply_elo_result); otherwise the transaction is rolled
+back and the import is validated and rated again from fresh ratings.
+
+An import is all or nothing: if any row is invalid nothing is written and the
+errors are reported by line number.
+"""
+from models import db, RATING_UPDATE_RETRIES, Player, Match, MatchStatus, PlayerStatus, RatingHistory
+from app.services import elo_change_for, RatingConflictError
+from app.player_stats import add_results
+from sqlalchemy import select, insert, update, bindparam, func
+from datetime import datetime
+import csv
+import io
+import json
+import time
+
+REQUIRED_IMPORT_FIELDS = ('player1', 'player2', 'winner', 'timestamp', 'host')
+# Keep IN (...) lists under SQLite's bound parameter limit
+LOOKUP_CHUNK_SIZE = 500
+# Errors returned for a rejected import; the total count is always reported
+MAX_REPORTED_ERRORS = 100
+
+class ImportFormatError(Exception):
+    """Raised for input that cannot be parsed at all (as opposed to invalid rows)"""
+
+def parse_rows(text, fmt):
+    """Parse CSV or NDJSON text into [(line_number, row_dict), ...]"""
+    if fmt == 'csv':
+        reader = csv.DictReader(io.StringIO(text))
+        if not reader.fieldnames:
+            return []
+        missing = [field for field in REQUIRED_IMPORT_FIELDS if field not in reader.fieldnames]
+        if missing:
+            raise ImportFormatError(f'CSV header is missing: {", ".join(missing)}')
+        # Header is line 1
+        return [(line, row) for line, row in enumerate(reader, start=2)]
+
+    if fmt == 'ndjson':
+        rows = []
+        for line, raw in enumerate(text.splitlines(), start=1):
+            if not raw.strip():
+                continue
+            try:
+                row = json.loads(raw)
+            except ValueError:
+                raise ImportFormatError(f'Line {line}: invalid JSON')
+            if not isinstance(row, dict):
+                raise ImportFormatError(f'Line {line}: expected a JSON object')
+            rows.append((line, row))
+        return rows
+
+    raise ImportFormatError(f'Unsupported format: {fmt}')
+
+def _reference(value):
+    """Normalize a player reference to ('id', int) or ('name', str)"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return ('id', value)
+    if isinstance(value, str) and value.strip():
+        value = value.strip()
+        return ('id', int(value)) if value.isdigit() else ('name', value)
+    return None
+
+def _chunks(values):
+    values = list(values)
+    for i in range(0, len(values), LOOKUP_CHUNK_SIZE):
+        yield values[i:i + LOOKUP_CHUNK_SIZE]
+
+def _load_players(references):
+    """Return {reference: (id, status)} for every referenced player that exists"""
+    ids = {value for kind, value in references if kind == 'id'}
+    names = {value for kind, value in references if kind == 'name'}
+    found = {}
+    for column, values, kind in ((Player.id, ids, 'id'), (Player.name, names, 'name')):
+        for chunk in _chunks(values):
+            rows = db.session.execute(
+                select(Player.id, Player.name, Player.status).where(column.in_(chunk))
+            ).all()
+            for player_id, name, status in rows:
+                found[(kind, player_id if kind == 'id' else name)] = (player_id, status)
+    return found
+
+def _latest_completed(player_ids):
+    """Return {player_id: latest completed_at} over existing COMPLETED matches"""
+    latest = {}
+    for chunk in _chunks(player_ids):
+        for column in (Match.player1_id, Match.player2_id):
+            rows = db.session.execute(
+                select(column, func.max(Match.completed_at))
+                .where(Match.status == MatchStatus.COMPLETED, column.in_(chunk))
+                .group_by(column)
+            ).all()
+            for player_id, completed_at in rows:
+                if completed_at and (player_id not in latest or completed_at > latest[player_id]):
+                    latest[player_id] = completed_at
+    return latest
+
+def validate_rows(rows):
+    """
+    Validate parsed rows against the database.
+    Returns (matches, errors): matches are dicts with resolved player IDs, errors
+    are {'line': n, 'error': message} dicts.
+    """
+    errors = []
+    parsed = []
+    references = set()
+
+    for line, row in rows:
+        missing = [field for field in REQUIRED_IMPORT_FIELDS if row.get(field) in (None, '')]
+        if missing:
+            errors.append({'line': line, 'error': f'Missing {", ".join(missing)}'})
+            continue
+
+        refs = {field: _reference(row[field]) for field in ('player1', 'player2', 'winner', 'host')}
+        bad = [field for field, ref in refs.items() if ref is None]
+        if bad:
+            errors.append({'line': line, 'error': f'Invalid player reference in {", ".join(bad)}'})
+            continue
+
+        try:
+            timestamp = datetime.fromisoformat(str(row['timestamp']))
+        except ValueError:
+            errors.append({'line': line, 'error': 'Invalid timestamp format. Use ISO format.'})
+            continue
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone().replace(tzinfo=None)
+
+        references.update(refs.values())
+        parsed.append((line, refs, timestamp, row.get('notes') or None))
+
+    players = _load_players(references)
+    now = datetime.now()
+    matches = []
+
+    for line, refs, timestamp, notes in parsed:
+        unknown = [field for field, ref in refs.items() if ref not in players]
+        if unknown:
+            errors.append({'line': line, 'error': f'Unknown player in {", ".join(unknown)}'})
+            continue
+        ids = {field: players[ref][0] for field, ref in refs.items()}
+        inactive = [field for field in ('player1', 'player2', 'host')
+                    if players[refs[field]][1] != PlayerStatus.APPROVED]
+
+        if inactive:
+            error = f'Player not approved in {", ".join(inactive)}'
+        elif ids['player1'] == ids['player2']:
+            error = 'Cannot play against yourself'
+        elif ids['host'] in (ids['player1'], ids['player2']):
+            error = 'Host cannot be one of the players'
+        elif ids['winner'] not in (ids['player1'], ids['player2']):
+            error = 'Winner must be one of the match players'
+        elif timestamp > now:
+            error = 'Timestamp is in the future'
+        else:
+            error = None
+
+        if error:
+            errors.append({'line': line, 'error': error})
+            continue
+
+        matches.append({
+            'line': line,
+            'player1_id': ids['player1'],
+            'player2_id': ids['player2'],
+            'winner_id': ids['winner'],
+            'host_id': ids['host'],
+            'completed_at': timestamp,
+            'notes': notes
+        })
+
+    # Ratings are applied on top of each player's current rating, so an imported
+    # result must not predate that player's last recorded match
+    latest = _latest_completed({m[key] for m in matches for key in ('player1_id', 'player2_id')})
+    valid = []
+    for match in matches:
+        conflicts = [player_id for player_id in (match['player1_id'], match['player2_id'])
+                     if player_id in latest and match['completed_at'] <= latest[player_id]]
+        if conflicts:
+            errors.append({'line': match['line'],
+                           'error': f'Predates the last recorded match of player {conflicts[0]}'})
+        else:
+            valid.append(match)
+
+    errors.sort(key=lambda e: e['line'])
+    return valid, errors
+
+def apply_ratings(matches, ratings):
+    """
+    Apply ELO in chronological order (ties keep input order).
+    ratings maps player_id -> current elo and is updated in place; each match
+    gets its elo_change. Returns the matches in rating order.
+    """
+    ordered = sorted(matches, key=lambda m: m['completed_at'])
+    for match in ordered:
+        winner = match['winner_id']
+        loser = match['player2_id'] if winner == match['player1_id'] else match['player1_id']
+        change = elo_change_for(ratings[winner], ratings[loser])
+        ratings[winner] += change
+        ratings[loser] -= change
+        match['elo_change'] = change
+        match['winner_elo'] = ratings[winner]
+        match['loser_id'] = loser
+        match['loser_elo'] = ratings[loser]
+    return ordered
+
+def result_counts(ordered):
+    """Per-player PlayerStats increments for rated matches (see app/player_stats.py)"""
+    counts = {}
+    for m in ordered:
+        for player_id, won, elo in ((m['winner_id'], 1, m['winner_elo']), (m['loser_id'], 0, m['loser_elo'])):
+            row = counts.setdefault(player_id, {'player_id': player_id, 'games_played': 0, 'wins': 0, 'losses': 0,
+                                                'last_played_at': None, 'peak_elo': None})
+            row['games_played'] += 1
+            row['wins'] += won
+            row['losses'] += 1 - won
+            row['last_played_at'] = m['completed_at']  # ordered chronologically
+            row['peak_elo'] = elo if row['peak_elo'] is None else max(row['peak_elo'], elo)
+    return list(counts.values())
+
+def import_matches(text, fmt):
+    """
+    Validate and import match results. Returns (report, errors); nothing is
+    written unless errors is empty. Raises RatingConflictError if players kept
+    being rated concurrently for RATING_UPDATE_RETRIES attempts.
+    """
+    start = time.perf_counter()
+    rows = parse_rows(text, fmt)
+    for _ in range(RATING_UPDATE_RETRIES):
+        matches, errors = validate_rows(rows)
+        if errors:
+            return {'rows': len(rows), 'error_count': len(errors)}, errors[:MAX_REPORTED_ERRORS]
+        written = _write_import(matches)
+        if written is not None:
+            break
+    else:
+        raise RatingConflictError(f'Could not import: players were rated concurrently '
+                                  f'{RATING_UPDATE_RETRIES} times')
+
+    ordered, ratings = written
+    return {
+        'rows': len(rows),
+        'imported': len(ordered),
+        'players_updated': len(ratings),
+        'seconds': round(time.perf_counter() - start, 6)
+    }, []
+
+def _write_import(matches):
+    """
+    Rate and write validated matches in one transaction. Returns (ordered
+    matches, final ratings), or None after rolling back if any player was
+    rated since their rating was read.
+    """
+    player_ids = {m[key] for m in matches for key in ('player1_id', 'player2_id')}
+    ratings, versions = {}, {}
+    for chunk in _chunks(player_ids):
+        for player_id, elo, rating_version in db.session.execute(
+            select(Player.id, Player.elo, Player.rating_version).where(Player.id.in_(chunk))
+        ):
+            ratings[player_id] = elo
+            versions[player_id] = rating_version
+    ordered = apply_ratings(matches, ratings)
+
+    connection = db.session.connection()
+    try:
+        match_ids = connection.execute(
+            insert(Match.__table__).returning(Match.__table__.c.id, sort_by_parameter_order=True),
+            [{
+                'player1_id': m['player1_id'],
+                'player2_id': m['player2_id'],
+                'winner_id': m['winner_id'],
+                'host_id': m['host_id'],
+                'status': MatchStatus.COMPLETED,
+                'created_at': m['completed_at'],
+                'completed_at': m['completed_at'],
+                'expires_at': None,
+                'elo_change': m['elo_change'],
+                'notes': m['notes']
+            } for m in ordered]
+        ).scalars().all()
+
+        history = []
+        for match_id, m in zip(match_ids, ordered):
+            history.append({'player_id': m['winner_id'], 'match_id': match_id, 'elo': m['winner_elo'],
+                            'elo_change': m['elo_change'], 'recorded_at': m['completed_at']})
+            history.append({'player_id': m['loser_id'], 'match_id': match_id, 'elo': m['loser_elo'],
+                            'elo_change': -m['elo_change'], 'recorded_at': m['completed_at']})
+        if history:
+            connection.execute(insert(RatingHistory.__table__), history)
+
+        add_results(result_counts(ordered))
+
+        if ratings:
+            players_table = Player.__table__
+            updated = connection.execute(
+                update(players_table).where(players_table.c.id == bindparam('player_id'),
+                                            players_table.c.rating_version == bindparam('read_version'))
+                .values(elo=bindparam('elo'), rating_version=players_table.c.rating_version + 1,
+                        leaderboard_version=None),
+                [{'player_id': player_id, 'elo': elo, 'read_version': versions[player_id]}
+                 for player_id, elo in ratings.items()]
+            ).rowcount
+            if updated != len(ratings):
+                db.session.rollback()
+                return None
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return ordered, ratings
@@ -0,0 +1,282 @@
+"""
+In-memory leaderboard of approved players.
+
+Players are ordered by rating (highest first, ties by ID) and ranked with
+standard competition ranking: a player's rank is one more than the number of
+players rated strictly higher, so tied players share a rank.
+
+Ratings are grouped into LEADERBOARD_BUCKET_WIDTH-point buckets between
+LEADERBOARD_MIN_RATING and LEADERBOARD_MAX_RATING (ratings outside go to the
+end buckets). A Fenwick tree over the bucket sizes answers "how many players
+are rated above this bucket" and "which bucket holds the k-th player" in
+O(log buckets), and each bucket keeps its few players in a sorted list, so
+rank lookups, updates and finding any position are O(log n) and a page of m
+players costs O(m + log n).
+
+The board reflects one database (the current app's engine) at a time. It is
+seeded on first use (run.py seeds it at startup) and follows the data version
+(see app/data_version.py). Every write that changes a player's name, rating
+or status sets Player.leaderboard_version to NULL (ORM changes through the
+mapper event below, Core rating writes explicitly), and the commit stamps it
+with the data version it produces. When the version has moved, the next read
+applies just the players stamped after the version the board reflects, one
+indexed range read, whichever process wrote them; writes to other tables or
+other player columns cost nothing. Only pending players are ever deleted, so
+deletions never touch the board.
+"""
+from models import db, Player, PlayerStatus
+from app.data_version import current_version, stamp_version
+from sqlalchemy import event, inspect, select
+from bisect import bisect_left, insort
+import math
+import threading
+
+# Player attributes shown on or ordering the board
+LEADERBOARD_ATTRIBUTES = ('name', 'elo', 'status')
+
+class FenwickTree:
+    """Prefix sums over a fixed number of counters, O(log size) per operation"""
+
+    def __init__(self, counts):
+        self.size = len(counts)
+        self.tree = [0] + list(counts)
+        for i in range(1, self.size + 1):
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self.tree[parent] += self.tree[i]
+
+    def add(self, index, delta):
+        index += 1
+        while index <= self.size:
+            self.tree[index] += delta
+            index += index & -index
+
+    def prefix(self, index):
+        """Sum of counters [0, index)"""
+        total = 0
+        while index > 0:
+            total += self.tree[index]
+            index -= index & -index
+        return total
+
+    def find(self, k):
+        """(index, k - prefix(index)) of the counter holding the k-th item (0-based); k must be < the total"""
+        index = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            if index + step <= self.size and self.tree[index + step] <= k:
+                index += step
+                k -= self.tree[index]
+            step >>= 1
+        return index, k
+
+class Leaderboard:
+    """Order-statistic index over approved players' ratings, kept in step with the data version"""
+
+    def __init__(self, min_rating=0, max_rating=4000, bucket_width=1):
+        self.configure(min_rating, max_rating, bucket_width)
+        self._lock = threading.RLock()
+        self.clear()
+
+    def configure(self, min_rating, max_rating, bucket_width):
+        self.min_rating = min_rating
+        self.bucket_width = bucket_width
+        self.bucket_count = max(1, math.ceil((max_rating - min_rating) / bucket_width))
+
+    def init_app(self, app):
+        self.configure(app.config.get('LEADERBOARD_MIN_RATING', 0), app.config.get('LEADERBOARD_MAX_RATING', 4000),
+                       app.config.get('LEADERBOARD_BUCKET_WIDTH', 1))
+        self.clear()
+
+    def clear(self):
+        """Forget everything; the next read rebuilds from the database"""
+        with self._lock:
+            self.version = None
+            self._engine = None
+            self._players = {}
+            self._buckets = [[] for _ in range(self.bucket_count)]
+            self._tree = FenwickTree([0] * self.bucket_count)
+
+    # Structure
+
+    def _bucket(self, elo):
+        """Bucket index, 0 holding the highest ratings"""
+        bucket = math.floor((elo - self.min_rating) / self.bucket_width)
+        return self.bucket_count - 1 - min(max(bucket, 0), self.bucket_count - 1)
+
+    def _add(self, player_id, name, elo):
+        self._players[player_id] = (name, elo)
+        bucket = self._bucket(elo)
+        insort(self._buckets[bucket], (-elo, player_id))
+        self._tree.add(bucket, 1)
+
+    def _remove(self, player_id):
+        name, elo = self._players.pop(player_id)
+        bucket = self._bucket(elo)
+        entries = self._buckets[bucket]
+        del entries[bisect_left(entries, (-elo, player_id))]
+        self._tree.add(bucket, -1)
+
+    def _position(self, player_id):
+        """0-based position of a player in leaderboard order"""
+        elo = self._players[player_id][1]
+        bucket = self._bucket(elo)
+        return self._tree.prefix(bucket) + bisect_left(self._buckets[bucket], (-elo, player_id))
+
+    def _rank_of(self, elo):
+        """1 + the number of players rated strictly higher than elo"""
+        bucket = self._bucket(elo)
+        return self._tree.prefix(bucket) + bisect_left(self._buckets[bucket], (-elo,)) + 1
+
+    def _slice(self, start, count):
+        """[(rank, player_id, name, elo), ...] for positions start .. start + count - 1"""
+        end = min(start + count, len(self._players))
+        result = []
+        position = start
+        previous = None
+        while position < end:
+            bucket, offset = self._tree.find(position)
+            for negative_elo, player_id in self._buckets[bucket][offset:offset + end - position]:
+                elo = -negative_elo
+                if previous is None:
+                    rank = self._rank_of(elo)
+                elif elo != previous[3]:
+                    rank = position + 1
+                else:
+                    rank = previous[0]
+                previous = (rank, player_id, self._players[player_id][0], elo)
+                result.append(previous)
+                position += 1
+        return result
+
+    # Synchronisation with the database
+
+    def rebuild(self, version=None):
+        """Load every approved player's rating. Returns the number of players."""
+        with self._lock:
+            # Read the version first: data newer than the version only causes another rebuild
+            if version is None:
+                version = current_version()[0]
+            rows = db.session.execute(
+                select(Player.id, Player.name, Player.elo)
+                .where(Player.status == PlayerStatus.APPROVED)
+                .order_by(Player.elo.desc(), Player.id)
+            ).all()
+            self._players = {}
+            self._buckets = [[] for _ in range(self.bucket_count)]
+            for player_id, name, elo in rows:
+                self._players[player_id] = (name, elo)
+                self._buckets[self._bucket(elo)].append((-elo, player_id))
+            self._tree = FenwickTree([len(entries) for entries in self._buckets])
+            self.version = version
+            self._engine = db.engine
+            return len(rows)
+
+    def sync(self):
+        """
+        Catch up with the data version (one primary-key read): apply the
+        players changed since the board's version, or build it if it has none
+        """
+        with self._lock:
+            version = current_version()[0]
+            if self.version is None or self._engine is not db.engine or version < self.version:
+                self.rebuild(version)
+            elif version != self.version:
+                self.apply_changes(version)
+
+    def apply_changes(self, version):
+        """Re-place every player stamped after the board's version. Returns the number of players read."""
+        with self._lock:
+            # Rows stamped after version may be read too; applying them again later is harmless
+            rows = db.session.execute(
+                select(Player.id, Player.name, Player.elo, Player.status)
+                .where(Player.leaderboard_version > self.version)
+            ).all()
+            for player_id, name, elo, status in rows:
+                if player_id in self._players:
+                    self._remove(player_id)
+                if status == PlayerStatus.APPROVED:
+                    self._add(player_id, name, elo)
+            self.version = version
+            return len(rows)
+
+    # Queries (each syncs first)
+
+    def __len__(self):
+        with self._lock:
+            self.sync()
+            return len(self._players)
+
+    def top(self, offset=0, limit=10):
+        """(total players, [(rank, player_id, name, elo), ...] from position offset)"""
+        with self._lock:
+            self.sync()
+            return len(self._players), self._slice(offset, limit)
+
+    def rank(self, player_id):
+        """(rank, name, elo, total players), or None if the player is not on the board"""
+        with self._lock:
+            self.sync()
+            if player_id not in self._players:
+                return None
+            name, elo = self._players[player_id]
+            return self._rank_of(elo), name, elo, len(self._players)
+
+    def around(self, player_id, radius):
+        """(total players, entries for up to radius players either side of player_id), or None"""
+        with self._lock:
+            self.sync()
+            if player_id not in self._players:
+                return None
+            position = self._position(player_id)
+            start = max(0, position - radius)
+            return len(self._players), self._slice(start, position + radius + 1 - start)
+
+    def verify(self, apply=False):
+        """
+        Compare the board with SQL ORDER BY elo DESC, id over approved players:
+        order, ratings and every player's rank. With apply=True a divergent
+        board is rebuilt. Returns a report dict.
+        """
+        with self._lock:
+            self.sync()
+            rows = db.session.execute(
+                select(Player.id, Player.elo)
+                .where(Player.status == PlayerStatus.APPROVED)
+                .order_by(Player.elo.desc(), Player.id)
+            ).all()
+            expected = []
+            for position, (player_id, elo) in enumerate(rows):
+                rank = expected[-1][0] if expected and expected[-1][2] == elo else position + 1
+                expected.append((rank, player_id, elo))
+
+            stored = [(rank, player_id, elo) for rank, player_id, _, elo in self._slice(0, len(self._players))]
+            lookups = [self._rank_of(self._players[player_id][1]) if player_id in self._players else None
+                       for _, player_id, _ in expected]
+            divergent = [
+                {'position': position, 'expected': want, 'stored': have}
+                for position, (want, have) in enumerate(zip(expected, stored)) if want != have
+            ]
+            wrong_ranks = sum(1 for (rank, _, _), lookup in zip(expected, lookups) if rank != lookup)
+            consistent = not divergent and not wrong_ranks and len(stored) == len(expected)
+            if apply and not consistent:
+                self.rebuild()
+            return {
+                'players_checked': len(expected),
+                'players_stored': len(stored),
+                'consistent': consistent,
+                'divergent_positions': len(divergent),
+                'first_divergence': divergent[0] if divergent else None,
+                'wrong_ranks': wrong_ranks,
+                'rebuilt': apply and not consistent
+            }
+
+leaderboard = Leaderboard()
+
+stamp_version(Player.__table__.c.leaderboard_version)
+
+@event.listens_for(Player, 'before_update')
+def _mark_changed(mapper, connection, player):
+    state = inspect(player)
+    if any(state.attrs[name].history.has_changes() for name in LEADERBOARD_ATTRIBUTES):
+        player.leaderboard_version = None
@@ -0,0 +1,99 @@
+"""
+Predicted outcomes for every pairing in a tournament.
+
+The full N x N expected-score matrix is computed from participant ELOs with
+array broadcasting and served as a flat row-major array plus the player ID
+index: expected_scores[i * N + j] / scale is the probability that
+player_ids[i] beats player_ids[j]. Scores are sent as integers because JSON
+integers are both shorter and several times faster to encode than floats.
+
+Serialized responses are cached per tournament together with the participant
+(id, elo) list they were built from. Every request re-reads that list (one
+indexed query) and a cached response is only reused while it is unchanged, so
+joins, leaves and rating changes from any code path or worker process
+invalidate the entry.
+"""
+from flask import current_app
+from models import db, Player, TournamentParticipant
+from sqlalchemy import select
+from collections import OrderedDict
+import threading
+import numpy as np
+
+# Expected scores are sent in units of 1 / EXPECTED_SCORE_SCALE
+EXPECTED_SCORE_SCALE = 10000
+
+def expected_score_matrix(elos):
+    """Return E[i, j] = 1 / (1 + 10^((elo_j - elo_i) / 400)) for all pairs at once"""
+    elos = np.asarray(elos, dtype=np.float64)
+    return 1.0 / (1.0 + 10.0 ** ((elos[np.newaxis, :] - elos[:, np.newaxis]) / 400.0))
+
+class MatchupCache:
+    """Bounded LRU of tournament_id -> (participant ratings, serialized response)"""
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_size = app.config.get('MATCHUP_CACHE_MAX_SIZE', 256)
+        self.clear()
+
+    def get(self, tournament_id, ratings):
+        """Return the cached response body if it was built from the same ratings, else None"""
+        with self._lock:
+            entry = self._entries.get(tournament_id)
+            if entry is None:
+                return None
+            if entry[0] != ratings:
+                del self._entries[tournament_id]
+                return None
+            self._entries.move_to_end(tournament_id)
+            return entry[1]
+
+    def put(self, tournament_id, ratings, body):
+        with self._lock:
+            self._entries[tournament_id] = (ratings, body)
+            self._entries.move_to_end(tournament_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, tournament_id):
+        with self._lock:
+            self._entries.pop(tournament_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+matchup_cache = MatchupCache()
+
+def participant_ratings(tournament_id):
+    """Return ((player_id, elo), ...) for the tournament's participants, ordered by player_id"""
+    statement = select(Player.id, Player.elo) \
+        .join(TournamentParticipant, TournamentParticipant.player_id == Player.id) \
+        .where(TournamentParticipant.tournament_id == tournament_id) \
+        .order_by(Player.id)
+    return tuple(db.session.connection().execute(statement).cursor.fetchall())
+
+def matchup_matrix_body(tournament_id):
+    """Return the serialized matchup matrix for a tournament, from the cache when still valid"""
+    ratings = participant_ratings(tournament_id)
+    body = matchup_cache.get(tournament_id, ratings)
+    if body is not None:
+        return body
+
+    player_ids = [player_id for player_id, _ in ratings]
+    matrix = expected_score_matrix([elo for _, elo in ratings])
+    body = current_app.json.dumps({
+        'tournament_id': tournament_id,
+        'player_ids': player_ids,
+        'scale': EXPECTED_SCORE_SCALE,
+        'expected_scores': np.rint(matrix * EXPECTED_SCORE_SCALE).astype(np.int64).ravel().tolist()
+    }, separators=(',', ':')) + '\n'  # Same compact layout as jsonify()
+    matchup_cache.put(tournament_id, ratings, body)
+    return body
@@ -0,0 +1,213 @@
+"""
+Schema migrations for databases created by an older version.
+
+db.create_all() only creates missing tables; it never adds columns or indexes
+to a table that already exists. Each migration below brings one schema change
+to an existing database. Applied migrations are recorded in the
+schema_migration table, and scripts/init_db.py marks them all as applied on a
+fresh database.
+
+Every step only adds (tables, nullable or defaulted columns, indexes) and
+checks first, so existing rows are kept (derived counters are backfilled) and
+a migration interrupted half way can simply be run again. The one exception,
+archive_keys, rebuilds a table with all of its rows in a single transaction.
+
+A database from before the first migration, or one where a step ran but was
+not recorded, has no schema_migration row for that step; migrate() runs it
+again and it only adds what is missing.
+"""
+from models import db, AdminSession, PlayerSession, Player, Challenge, Match, Tournament, \
+    TournamentParticipant, RatingHistory, RatingPeriod, PlayerStats, DataVersion, SchemaMigration, \
+    challenge_archive, match_archive, tournament_archive, tournament_participant_archive
+from sqlalchemy import inspect, literal, select, insert, update, func
+from datetime import datetime
+
+def create_table(connection, table):
+    """Create a table and all of its indexes, skipping what already exists"""
+    table.create(connection, checkfirst=True)
+    for index in table.indexes:
+        create_index(connection, index)
+
+def create_index(connection, index):
+    index.create(connection, checkfirst=True)
+
+def create_indexes(connection, table, *names):
+    for index in table.indexes:
+        if index.name in names:
+            create_index(connection, index)
+
+def add_column(connection, column):
+    """ALTER TABLE ADD COLUMN with the column's scalar default applied to existing rows"""
+    existing = {c['name'] for c in inspect(connection).get_columns(column.table.name)}
+    if column.name in existing:
+        return
+    dialect = connection.dialect
+    preparer = dialect.identifier_preparer
+    ddl = f'ALTER TABLE {preparer.format_table(column.table)} ADD COLUMN ' \
+          f'{preparer.format_column(column)} {column.type.compile(dialect=dialect)}'
+    if column.default is not None and column.default.is_scalar:
+        default = literal(column.default.arg, column.type).compile(
+            dialect=dialect, compile_kwargs={'literal_binds': True})
+        ddl += f' DEFAULT {default}'
+    if not column.nullable:
+        ddl += ' NOT NULL'
+    connection.exec_driver_sql(ddl)
+
+def session_expiry_indexes(connection):
+    """Index session expiry for the session reaper"""
+    create_indexes(connection, AdminSession.__table__, 'ix_admin_session_expires_at')
+    create_indexes(connection, PlayerSession.__table__, 'ix_player_session_expires_at')
+
+def status_deadline_indexes(connection):
+    """Index (status, deadline) for the expiry sweeps and the deadline timer"""
+    create_indexes(connection, Challenge.__table__, 'ix_challenge_status_expires_at')
+    create_indexes(connection, Match.__table__, 'ix_match_status_expires_at')
+    create_indexes(connection, Tournament.__table__,
+                   'ix_tournament_status_start_time', 'ix_tournament_status_expires_at')
+
+def rating_history(connection):
+    """Per-player rating history"""
+    create_table(connection, RatingHistory.__table__)
+
+def rating_version(connection):
+    """Version counter for lost-update-free rating writes"""
+    add_column(connection, Player.__table__.c.rating_version)
+
+def glicko2(connection):
+    """Glicko-2 rating deviation, volatility and rating periods"""
+    add_column(connection, Player.__table__.c.rating_deviation)
+    add_column(connection, Player.__table__.c.volatility)
+    create_table(connection, RatingPeriod.__table__)
+
+def archive_tables(connection):
+    """Archive tables for cold challenges, matches and tournaments"""
+    for table in (challenge_archive, match_archive, tournament_archive, tournament_participant_archive):
+        create_table(connection, table)
+
+def hot_path_indexes(connection):
+    """Indexes for the pending-match, undo, participant, listing and replay queries"""
+    create_indexes(connection, Player.__table__, 'ix_player_status')
+    create_indexes(connection, Match.__table__,
+                   'ix_match_status_completed_at', 'ix_match_player1_player2_status', 'ix_match_player2_id',
+                   'ix_match_host_completed_at', 'ix_match_tournament_status')
+    create_indexes(connection, TournamentParticipant.__table__, 'ix_tournament_participant_tournament_player')
+
+def tournament_summary(connection):
+    """Tournament summary counters and participant wins, backfilled from existing rows"""
+    from app.tournament_stats import repair_tournament_stats
+    for table in (Tournament.__table__, tournament_archive):
+        for name in ('participant_count', 'matches_recorded', 'last_result_at', 'leader_id'):
+            add_column(connection, table.c[name])
+    for table in (TournamentParticipant.__table__, tournament_participant_archive):
+        add_column(connection, table.c.wins)
+    repair_tournament_stats(connection)
+    # Archived tournaments never have completed matches; only participants need counting
+    connection.execute(update(tournament_archive).values(
+        participant_count=select(func.count()).select_from(tournament_participant_archive)
+        .where(tournament_participant_archive.c.tournament_id == tournament_archive.c.id)
+        .scalar_subquery(),
+        matches_recorded=0
+    ))
+    connection.execute(update(tournament_participant_archive).values(wins=0))
+
+def player_stats(connection):
+    """Per-player result counters, backfilled from completed matches and rating history"""
+    from app.player_stats import recompute_player_stats
+    create_table(connection, PlayerStats.__table__)
+    if connection.execute(select(func.count()).select_from(PlayerStats.__table__)).scalar():
+        return
+    expected = recompute_player_stats(connection)
+    if expected:
+        connection.execute(insert(PlayerStats.__table__),
+                           [{'player_id': player_id, **values} for player_id, values in expected.items()])
+
+def listing_page_indexes(connection):
+    """Indexes for keyset pages of the ?player_id= and ?tournament_id= match listings"""
+    create_indexes(connection, Match.__table__, 'ix_match_player1_id', 'ix_match_tournament_id')
+
+def data_version(connection):
+    """Change counter for conditional GETs"""
+    create_table(connection, DataVersion.__table__)
+
+def divisions(connection):
+    """Stored weight/age division keys, backfilled for existing players"""
+    from app.divisions import refresh_divisions
+    add_column(connection, Player.__table__.c.division)
+    add_column(connection, Player.__table__.c.division_refresh_at)
+    create_indexes(connection, Player.__table__,
+                   'ix_player_division', 'ix_player_division_status_elo', 'ix_player_division_refresh_at')
+    refresh_divisions(connection)
+
+def archive_keys(connection):
+    """Key archive tables by archive_id instead of the live table's (reusable) id"""
+    preparer = connection.dialect.identifier_preparer
+    for table in (challenge_archive, match_archive, tournament_archive, tournament_participant_archive):
+        existing = {c['name'] for c in inspect(connection).get_columns(table.name)}
+        if 'archive_id' in existing:
+            continue
+        name = preparer.format_table(table)
+        old = preparer.quote(f'{table.name}_old')
+        columns = ', '.join(preparer.format_column(column) for column in table.columns if column.name != 'archive_id')
+        # Indexes added to the old table by archive_tables would move along with it
+        for index in table.indexes:
+            connection.exec_driver_sql(f'DROP INDEX IF EXISTS {preparer.quote(index.name)}')
+        connection.exec_driver_sql(f'ALTER TABLE {name} RENAME TO {old}')
+        create_table(connection, table)
+        connection.exec_driver_sql(f'INSERT INTO {name} ({columns}) SELECT {columns} FROM {old} ORDER BY id')
+        connection.exec_driver_sql(f'DROP TABLE {old}')
+
+def leaderboard_versions(connection):
+    """Per-player change stamps for the leaderboard, every existing player counted as unchanged"""
+    add_column(connection, Player.__table__.c.leaderboard_version)
+    create_indexes(connection, Player.__table__, 'ix_player_leaderboard_version')
+    connection.execute(update(Player.__table__).where(Player.__table__.c.leaderboard_version.is_(None))
+                       .values(leaderboard_version=0))
+
+# Applied in order; never rename or reorder an entry once released
+MIGRATIONS = [
+    ('0001_session_expiry_indexes', session_expiry_indexes),
+    ('0002_rating_history', rating_history),
+    ('0003_glicko2', glicko2),
+    ('0004_rating_version', rating_version),
+    ('0005_status_deadline_indexes', status_deadline_indexes),
+    ('0006_archive_tables', archive_tables),
+    ('0007_hot_path_indexes', hot_path_indexes),
+    ('0008_tournament_summary', tournament_summary),
+    ('0009_player_stats', player_stats),
+    ('0010_listing_page_indexes', listing_page_indexes),
+    ('0011_data_version', data_version),
+    ('0012_divisions', divisions),
+    ('0013_archive_keys', archive_keys),
+    ('0014_leaderboard_versions', leaderboard_versions),
+]
+
+def applied_migrations():
+    """IDs of the migrations recorded as applied (needs an app context)"""
+    SchemaMigration.__table__.create(db.engine, checkfirst=True)
+    with db.engine.connect() as connection:
+        return set(connection.execute(select(SchemaMigration.__table__.c.id)).scalars())
+
+def pending_migrations():
+    applied = applied_migrations()
+    return [(migration_id, step) for migration_id, step in MIGRATIONS if migration_id not in applied]
+
+def _record(connection, migration_id):
+    connection.execute(insert(SchemaMigration.__table__).values(id=migration_id, applied_at=datetime.now()))
+
+def migrate():
+    """Apply every pending migration, each in its own transaction. Returns the IDs applied."""
+    applied = []
+    for migration_id, step in pending_migrations():
+        with db.engine.begin() as connection:
+            step(connection)
+            _record(connection, migration_id)
+        applied.append(migration_id)
+    return applied
+
+def stamp():
+    """Record every migration as applied, for a database just built by create_all()"""
+    pending = pending_migrations()
+    with db.engine.begin() as connection:
+        for migration_id, _ in pending:
+            _record(connection, migration_id)
+    return [migration_id for migration_id, _ in pending]
@@ -0,0 +1,71 @@
+"""
+Content negotiation for the listing endpoints.
+
+A listing can be sent as:
+- json: the JSON array of objects, byte-for-byte what it always was (default)
+- ndjson: one JSON object per line
+- columns: JSON with the keys once, {"columns": [...], "rows": [[...], ...]}
+- msgpack: a stream of MessagePack values, the list of column names followed
+  by one array of values per row (msgpack.Unpacker reads it value by value);
+  only offered when the msgpack package is installed
+
+?format= picks one by name and overrides Accept; otherwise the best match for
+the Accept header is used, falling back to json, so clients that ask for
+nothing in particular (or something else) keep getting JSON. Values are
+encoded as in JSON (datetimes as HTTP dates) in every format.
+
+Streamed bodies are compressed with gzip or deflate when Accept-Encoding
+allows it and the body reaches COMPRESSION_MIN_BYTES (see app/streaming.py).
+@negotiated records the chosen format for the view (and for @conditional,
+which tags each format with its own ETag) and adds Vary to the response.
+"""
+from flask import request, g, jsonify, current_app
+from functools import wraps
+
+try:
+    import msgpack
+except ImportError:  # Optional: MessagePack is offered only when installed
+    msgpack = None
+
+# Format name -> media type, in order of preference on equal quality
+FORMATS = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'columns': 'application/vnd.phratings.columns+json',
+}
+if msgpack is not None:
+    FORMATS['msgpack'] = 'application/msgpack'
+
+MEDIA_TYPES = {media_type: fmt for fmt, media_type in FORMATS.items()}
+if msgpack is not None:
+    MEDIA_TYPES['application/x-msgpack'] = 'msgpack'
+
+CONTENT_CODINGS = ('gzip', 'deflate')
+
+def negotiate_format():
+    """Format name for the request, or None for an unknown ?format="""
+    if 'format' in request.args:
+        fmt = request.args['format']
+        return fmt if fmt in FORMATS else None
+    return MEDIA_TYPES.get(request.accept_mimetypes.best_match(list(MEDIA_TYPES)), 'json')
+
+def response_format():
+    """Format chosen by @negotiated for this request ('json' outside negotiated views)"""
+    return g.get('response_format', 'json')
+
+def content_coding():
+    """gzip or deflate if the client accepts one, else None"""
+    return request.accept_encodings.best_match(CONTENT_CODINGS)
+
+def negotiated(view):
+    """Let the view's body be sent in any of FORMATS (see response_format())"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        fmt = negotiate_format()
+        if fmt is None:
+            return jsonify({'error': f'Invalid format. Use one of: {", ".join(FORMATS)}'}), 400
+        g.response_format = fmt
+        response = current_app.make_response(view(*args, **kwargs))
+        response.vary.update(('Accept', 'Accept-Encoding'))
+        return response
+    return wrapper
@@ -0,0 +1,62 @@
+"""
+Keyset pagination for the listing endpoints.
+
+Listings are ordered by ID and a page is "the next LIMIT rows with an ID
+greater than the last one sent", an index range seek on the primary key (or
+on an index ending in it), so every page costs the same however deep the
+client is in the set, and rows inserted or deleted meanwhile never shift a
+page. With ?include_archived=true the archive table is paged after the live
+one.
+
+The position is handed to clients as an opaque cursor: URL-safe base64 of
+[listing, archived, last ID]. A cursor is only valid for the listing that
+issued it; the filters are not part of it and must be sent again with every
+page.
+"""
+from collections import namedtuple
+import base64
+import binascii
+import json
+
+# Where the next page starts: after row ID `after` of the live (or archive) table
+Position = namedtuple('Position', ['archived', 'after'])
+
+FIRST_PAGE = Position(False, 0)
+
+def encode_cursor(listing, position):
+    raw = json.dumps([listing, position.archived, position.after], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+def decode_cursor(cursor, listing):
+    """Return the Position for a cursor issued by listing (FIRST_PAGE if None); raises ValueError"""
+    if cursor is None:
+        return FIRST_PAGE
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        name, archived, after = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise ValueError('Malformed cursor') from e
+    if name != listing or not isinstance(archived, bool) or type(after) is not int or after < 0:
+        raise ValueError('Cursor does not belong to this listing')
+    return Position(archived, after)
+
+def keyset_page(live, archive, limit, position, key=lambda row: row.id):
+    """
+    One page of a listing: live rows, then archived rows if archive is given.
+    live(after, n) and archive(after, n) return up to n rows with an ID above
+    after, in ID order; key(row) is a row's ID. Returns
+    ([(row, archived), ...], next Position or None).
+    """
+    archived, after = position
+    rows = []
+    if not archived:
+        rows = [(row, False) for row in live(after, limit + 1)]
+        if archive is not None and len(rows) <= limit:
+            archived, after = True, 0
+    if archived and archive is not None:
+        rows += [(row, True) for row in archive(after, limit + 1 - len(rows))]
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    row, archived = rows[-1]
+    return rows, Position(archived, key(row))
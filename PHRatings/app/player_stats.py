@@ -0,0 +1,154 @@
+"""
+Per-player result counters.
+
+PlayerStats holds games played, wins, losses, last played time and peak
+rating for each player, updated in the same transaction as every result that
+is recorded, imported or undone, so none of them needs a scan of the match
+table. Rows are created on a player's first result (INSERT ... ON CONFLICT).
+
+peak_elo is the highest rating after any rated result, i.e. the maximum of the
+player's RatingHistory, and stays NULL until the first one.
+verify_player_stats() recomputes everything from the match and rating history
+tables and reports (optionally fixes) rows that disagree.
+"""
+from models import db, Player, PlayerStats, Match, MatchStatus, RatingHistory
+from sqlalchemy import select, insert, update, delete, func, or_, union_all, case, bindparam
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+STAT_FIELDS = ('games_played', 'wins', 'losses', 'last_played_at', 'peak_elo')
+
+def _later(stored, new):
+    """SQL max() of two nullable values (SQLite's two-argument max() is NULL if either is)"""
+    return func.coalesce(func.max(stored, new), new, stored)
+
+def _upsert():
+    stats = PlayerStats.__table__
+    statement = sqlite_insert(stats)
+    return statement.on_conflict_do_update(index_elements=[stats.c.player_id], set_={
+        'games_played': stats.c.games_played + statement.excluded.games_played,
+        'wins': stats.c.wins + statement.excluded.wins,
+        'losses': stats.c.losses + statement.excluded.losses,
+        'last_played_at': _later(stats.c.last_played_at, statement.excluded.last_played_at),
+        'peak_elo': _later(stats.c.peak_elo, statement.excluded.peak_elo),
+    })
+
+def add_results(rows):
+    """
+    Add result counts for many players in one executemany (caller commits).
+    rows are dicts with player_id, games_played, wins, losses, last_played_at
+    and peak_elo (None if the results were not rated).
+    """
+    if rows:
+        db.session.execute(_upsert(), rows)
+
+def player_result_recorded(match, winner, loser, rated=True):
+    """Count a completed match for both players (caller commits)"""
+    add_results([
+        {'player_id': winner.id, 'games_played': 1, 'wins': 1, 'losses': 0,
+         'last_played_at': match.completed_at, 'peak_elo': winner.elo if rated else None},
+        {'player_id': loser.id, 'games_played': 1, 'wins': 0, 'losses': 1,
+         'last_played_at': match.completed_at, 'peak_elo': loser.elo if rated else None},
+    ])
+
+def _last_played(player_id):
+    return (select(func.max(Match.completed_at))
+            .where(Match.status == MatchStatus.COMPLETED,
+                   or_(Match.player1_id == player_id, Match.player2_id == player_id))
+            .scalar_subquery())
+
+def _peak(player_id):
+    return select(func.max(RatingHistory.elo)).where(RatingHistory.player_id == player_id).scalar_subquery()
+
+def player_result_undone(match):
+    """
+    Uncount a match whose status has just been set to UNDONE and whose rating
+    history has been removed (caller commits)
+    """
+    db.session.flush()
+    stats = PlayerStats.__table__
+    db.session.execute(
+        update(stats).where(stats.c.player_id.in_([match.player1_id, match.player2_id])).values(
+            games_played=stats.c.games_played - 1,
+            wins=stats.c.wins - case((stats.c.player_id == match.winner_id, 1), else_=0),
+            losses=stats.c.losses - case((stats.c.player_id == match.winner_id, 0), else_=1),
+            last_played_at=_last_played(stats.c.player_id),
+            peak_elo=_peak(stats.c.player_id)
+        )
+    )
+
+def ratings_changed(player_ids):
+    """Raise peak_elo to the current rating for players rated outside a match (e.g. a Glicko-2 period)"""
+    if not player_ids:
+        return
+    stats = PlayerStats.__table__
+    current = select(Player.elo).where(Player.id == stats.c.player_id).scalar_subquery()
+    db.session.execute(
+        update(stats).where(stats.c.player_id == bindparam('stats_player_id'))
+        .values(peak_elo=_later(stats.c.peak_elo, current)),
+        [{'stats_player_id': player_id} for player_id in player_ids]
+    )
+
+def recompute_player_stats(connection=None):
+    """Return {player_id: {field: value}} computed from scratch for every player with a result"""
+    connection = connection or db.session.connection()
+    sides = union_all(
+        select(Match.player1_id.label('player_id'), Match.winner_id, Match.completed_at)
+        .where(Match.status == MatchStatus.COMPLETED),
+        select(Match.player2_id.label('player_id'), Match.winner_id, Match.completed_at)
+        .where(Match.status == MatchStatus.COMPLETED)
+    ).subquery()
+    expected = {}
+    for player_id, games, wins, last_played_at in connection.execute(
+        select(sides.c.player_id, func.count(), func.sum(case((sides.c.winner_id == sides.c.player_id, 1), else_=0)),
+               func.max(sides.c.completed_at))
+        .group_by(sides.c.player_id)
+    ):
+        expected[player_id] = {'games_played': games, 'wins': wins, 'losses': games - wins,
+                               'last_played_at': last_played_at, 'peak_elo': None}
+    for player_id, peak in connection.execute(
+        select(RatingHistory.player_id, func.max(RatingHistory.elo)).group_by(RatingHistory.player_id)
+    ):
+        if player_id in expected:
+            expected[player_id]['peak_elo'] = peak
+    return expected
+
+def verify_player_stats(apply=False, tolerance=1e-6):
+    """
+    Compare every stored PlayerStats row with a full recompute. If apply is True
+    the table is rewritten from the recompute. Returns a report dict.
+    """
+    expected = recompute_player_stats()
+    stored = {row.player_id: {field: getattr(row, field) for field in STAT_FIELDS}
+              for row in db.session.execute(select(PlayerStats.__table__))}
+
+    def differs(a, b):
+        if a is None or b is None or not isinstance(a, float):
+            return a != b
+        return abs(a - b) > tolerance
+
+    empty = dict.fromkeys(STAT_FIELDS, 0) | {'last_played_at': None, 'peak_elo': None}
+    divergent = []
+    for player_id in sorted(expected.keys() | stored.keys()):
+        want = expected.get(player_id, empty)
+        have = stored.get(player_id, empty)
+        fields = [field for field in STAT_FIELDS if differs(have[field], want[field])]
+        if fields:
+            divergent.append({
+                'player_id': player_id,
+                'stored': {field: have[field] for field in fields},
+                'expected': {field: want[field] for field in fields}
+            })
+
+    if apply and divergent:
+        db.session.execute(delete(PlayerStats))
+        if expected:
+            db.session.execute(insert(PlayerStats.__table__),
+                               [{'player_id': player_id, **values} for player_id, values in expected.items()])
+        db.session.commit()
+
+    return {
+        'players_checked': len(expected.keys() | stored.keys()),
+        'divergent_player_count': len(divergent),
+        'divergent_players': divergent,
+        'applied': apply and bool(divergent)
+    }
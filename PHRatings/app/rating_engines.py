@@ -0,0 +1,244 @@
+"""
+Pluggable rating engines, selected per deployment with Config.RATING_ENGINE.
+
+- 'elo':     the classic Elo update from app/services.py, applied as soon as a
+             result is recorded.
+- 'glicko2': Glicko-2 (Glickman, "Example of the Glicko-2 system"). Results are
+             only recorded when they come in; every player's rating, rating
+             deviation and volatility are updated together when a rating period
+             is closed, in one vectorized pass over all games of the period.
+"""
+from flask import current_app
+from models import db, Player, Match, MatchStatus, PlayerStatus, RatingHistory, RatingPeriod, \
+    GLICKO_DEFAULT_RD, GLICKO_DEFAULT_VOLATILITY
+from app.services import apply_elo_result, revert_elo_result
+from app.player_stats import ratings_changed
+from sqlalchemy import select, insert, update, bindparam
+from datetime import datetime
+import numpy as np
+
+class RatingEngine:
+    """Interface every rating engine implements"""
+    name = None
+    # True if ratings only change when a rating period is closed
+    uses_rating_periods = False
+
+    def record_result(self, winner, loser):
+        """Apply a single result to the two Player objects. Returns the winner's rating change."""
+        raise NotImplementedError
+
+    def revert_result(self, winner, loser, elo_change):
+        """Reverse a result previously applied by record_result()"""
+        raise NotImplementedError
+
+    def can_revert(self, match):
+        """True if revert_result() can still take back the match's effect on ratings"""
+        return True
+
+    def close_period(self, end=None):
+        """Rate all results recorded since the last period. Returns a summary dict."""
+        raise NotImplementedError(f'{self.name} does not use rating periods')
+
+class EloEngine(RatingEngine):
+    name = 'elo'
+
+    def record_result(self, winner, loser):
+        return apply_elo_result(winner, loser)
+
+    def revert_result(self, winner, loser, elo_change):
+        revert_elo_result(winner, loser, elo_change)
+
+# Glicko-2 constants
+GLICKO2_SCALE = 173.7178
+GLICKO2_BASE_RATING = 1500.0
+GLICKO2_TAU = 0.5  # Constrains volatility change over time
+GLICKO2_EPSILON = 1e-6
+GLICKO2_MAX_ITERATIONS = 100
+
+def _g(phi):
+    return 1.0 / np.sqrt(1.0 + 3.0 * phi ** 2 / np.pi ** 2)
+
+def glicko2_rate_period(ratings, deviations, volatilities, winner_idx, loser_idx, tau=GLICKO2_TAU):
+    """
+    Rate one period of games for all players at once.
+
+    ratings/deviations/volatilities are per-player arrays on the Glicko scale;
+    winner_idx/loser_idx index into them, one entry per game. Returns new
+    (ratings, deviations, volatilities) arrays.
+    """
+    ratings = np.asarray(ratings, dtype=np.float64)
+    deviations = np.asarray(deviations, dtype=np.float64)
+    volatilities = np.asarray(volatilities, dtype=np.float64)
+    n = len(ratings)
+
+    mu = (ratings - GLICKO2_BASE_RATING) / GLICKO2_SCALE
+    phi = deviations / GLICKO2_SCALE
+    sigma = volatilities
+
+    # Every game is seen from both sides: (player, opponent, score)
+    player = np.concatenate([winner_idx, loser_idx])
+    opponent = np.concatenate([loser_idx, winner_idx])
+    score = np.concatenate([np.ones(len(winner_idx)), np.zeros(len(loser_idx))])
+
+    g_opponent = _g(phi[opponent])
+    expected = 1.0 / (1.0 + np.exp(-g_opponent * (mu[player] - mu[opponent])))
+    v_inverse = np.bincount(player, weights=g_opponent ** 2 * expected * (1.0 - expected), minlength=n)
+    score_sum = np.bincount(player, weights=g_opponent * (score - expected), minlength=n)
+
+    rated = v_inverse > 0
+    new_mu = mu.copy()
+    new_sigma = sigma.copy()
+    # Players without games only gain uncertainty
+    new_phi = np.sqrt(phi ** 2 + sigma ** 2)
+
+    if rated.any():
+        v = 1.0 / v_inverse[rated]
+        delta = v * score_sum[rated]
+        phi_r = phi[rated]
+        a = np.log(sigma[rated] ** 2)
+
+        def f(x, mask=slice(None)):
+            ex = np.exp(x)
+            d2, p2, vm = delta[mask] ** 2, phi_r[mask] ** 2, v[mask]
+            return ex * (d2 - p2 - vm - ex) / (2.0 * (p2 + vm + ex) ** 2) - (x - a[mask]) / tau ** 2
+
+        # Bracket the root (step 5.2)
+        upper = np.empty_like(a)
+        large = delta ** 2 > phi_r ** 2 + v
+        upper[large] = np.log(delta[large] ** 2 - phi_r[large] ** 2 - v[large])
+        small = np.flatnonzero(~large)
+        k = np.ones(len(small))
+        pending = f(a[small] - k * tau, small) < 0
+        while pending.any():
+            k[pending] += 1
+            pending = f(a[small] - k * tau, small) < 0
+        upper[small] = a[small] - k * tau
+
+        # Illinois iteration on every player at once (step 5.4)
+        A, B = a.copy(), upper
+        fA, fB = f(A), f(B)
+        for _ in range(GLICKO2_MAX_ITERATIONS):
+            active = np.abs(B - A) > GLICKO2_EPSILON
+            if not active.any():
+                break
+            C = A + (A - B) * fA / (fB - fA)
+            fC = f(C)
+            crossed = fC * fB <= 0
+            A = np.where(active & crossed, B, A)
+            fA = np.where(active & crossed, fB, np.where(active, fA / 2.0, fA))
+            B = np.where(active, C, B)
+            fB = np.where(active, fC, fB)
+
+        sigma_prime = np.exp(A / 2.0)
+        phi_star = np.sqrt(phi_r ** 2 + sigma_prime ** 2)
+        phi_prime = 1.0 / np.sqrt(1.0 / phi_star ** 2 + 1.0 / v)
+
+        new_sigma[rated] = sigma_prime
+        new_phi[rated] = phi_prime
+        new_mu[rated] = mu[rated] + phi_prime ** 2 * score_sum[rated]
+
+    return (new_mu * GLICKO2_SCALE + GLICKO2_BASE_RATING,
+            new_phi * GLICKO2_SCALE,
+            new_sigma)
+
+class Glicko2Engine(RatingEngine):
+    name = 'glicko2'
+    uses_rating_periods = True
+
+    def record_result(self, winner, loser):
+        # Ratings change when the period closes; nothing to transfer per match
+        return 0.0
+
+    def revert_result(self, winner, loser, elo_change):
+        # Only unrated results can be reverted (see can_revert); undoing the match drops it from the period
+        pass
+
+    def can_revert(self, match):
+        # A closed period has already rated the match together with every other game in it, which cannot
+        # be taken back without re-rating the whole period
+        return not db.session.query(
+            RatingPeriod.query.filter(RatingPeriod.ended_at >= match.completed_at).exists()
+        ).scalar()
+
+    def close_period(self, end=None):
+        end = end or datetime.now()
+        last_period = RatingPeriod.query.order_by(RatingPeriod.ended_at.desc()).first()
+        start = last_period.ended_at if last_period else None
+
+        games_query = select(Match.player1_id, Match.player2_id, Match.winner_id).where(
+            Match.status == MatchStatus.COMPLETED,
+            Match.completed_at <= end
+        )
+        if start:
+            games_query = games_query.where(Match.completed_at > start)
+        # As in app/replay.py, read plain DBAPI tuples rather than a Row per game
+        connection = db.session.connection()
+        games = np.array(connection.execute(games_query).cursor.fetchall(), dtype=np.int64).reshape(-1, 3)
+
+        players = np.array(connection.execute(
+            select(Player.id, Player.elo, Player.rating_deviation, Player.volatility)
+            .where(Player.status == PlayerStatus.APPROVED)
+            .order_by(Player.id)
+        ).cursor.fetchall(), dtype=np.float64).reshape(-1, 4)  # NULL becomes NaN
+        player_ids = players[:, 0].astype(np.int64)
+        ratings = players[:, 1]
+        deviations = np.where(np.isnan(players[:, 2]), GLICKO_DEFAULT_RD, players[:, 2])
+        volatilities = np.where(np.isnan(players[:, 3]), GLICKO_DEFAULT_VOLATILITY, players[:, 3])
+
+        # Games involving players who are no longer approved are not rated
+        winner_ids = games[:, 2]
+        loser_ids = np.where(games[:, 2] == games[:, 0], games[:, 1], games[:, 0])
+        winner_idx = np.searchsorted(player_ids, winner_ids).clip(max=max(len(player_ids) - 1, 0))
+        loser_idx = np.searchsorted(player_ids, loser_ids).clip(max=max(len(player_ids) - 1, 0))
+        known = (player_ids[winner_idx] == winner_ids) & (player_ids[loser_idx] == loser_ids) \
+            if len(player_ids) else np.zeros(len(games), dtype=bool)
+
+        new_ratings, new_deviations, new_volatilities = glicko2_rate_period(
+            ratings, deviations, volatilities, winner_idx[known], loser_idx[known])
+
+        # Core executemany on the tables: the ORM bulk paths cost more than the rating itself
+        if len(player_ids):
+            players_table = Player.__table__
+            connection.execute(
+                update(players_table).where(players_table.c.id == bindparam('player_id')).values(
+                    elo=bindparam('elo'),
+                    rating_version=players_table.c.rating_version + 1,
+                    leaderboard_version=None,
+                    rating_deviation=bindparam('rating_deviation'),
+                    volatility=bindparam('volatility')
+                ),
+                [{'player_id': player_id, 'elo': rating, 'rating_deviation': deviation, 'volatility': volatility}
+                 for player_id, rating, deviation, volatility in zip(
+                     player_ids.tolist(), new_ratings.tolist(), new_deviations.tolist(), new_volatilities.tolist())]
+            )
+
+        played = np.unique(np.concatenate([winner_idx[known], loser_idx[known]]))
+        if len(played):
+            connection.execute(insert(RatingHistory.__table__), [
+                {'player_id': player_id, 'match_id': None, 'elo': elo, 'elo_change': change, 'recorded_at': end}
+                for player_id, elo, change in zip(
+                    player_ids[played].tolist(), new_ratings[played].tolist(),
+                    (new_ratings[played] - ratings[played]).tolist())
+            ])
+            ratings_changed(player_ids[played].tolist())
+
+        period = RatingPeriod(started_at=start, ended_at=end, games=int(known.sum()), players_rated=int(len(played)))
+        db.session.add(period)
+        db.session.commit()
+
+        return {
+            'period_id': period.id,
+            'started_at': start.isoformat() if start else None,
+            'ended_at': end.isoformat(),
+            'games': period.games,
+            'players_rated': period.players_rated
+        }
+
+RATING_ENGINES = {
+    EloEngine.name: EloEngine(),
+    Glicko2Engine.name: Glicko2Engine()
+}
+
+def get_rating_engine():
+    """Return the rating engine configured for this deployment"""
+    return RATING_ENGINES[current_app.config.get('RATING_ENGINE', 'elo')]
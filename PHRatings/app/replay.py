@@ -0,0 +1,144 @@
+"""
+Full-history ELO replay and verification.
+
+Rebuilds every player's rating from the COMPLETED matches in the Match table
+(ordered by completed_at) and compares the result with the stored Player.elo,
+so drift from undo, manual /sql fixes or concurrent writes can be detected and
+optionally corrected.
+
+Elo is sequential, so the replay itself is a plain loop over Python floats;
+NumPy is used to load the history, map player IDs to positions and compare
+the results, which is where per-row Python work would otherwise dominate.
+"""
+from models import db, DEFAULT_ELO, ELO_K_FACTOR, RATING_UPDATE_RETRIES, Player, Match, MatchStatus
+from app.services import RatingConflictError
+from sqlalchemy import select, update, bindparam
+import numpy as np
+import time
+
+# Report at most this many divergent players (largest differences first)
+MAX_REPORTED_PLAYERS = 100
+
+def load_completed_matches():
+    """
+    Load COMPLETED matches in rating order as compact arrays.
+    Returns (match_ids, winner_ids, loser_ids, stored_elo_changes).
+    """
+    statement = select(Match.id, Match.player1_id, Match.player2_id, Match.winner_id, Match.elo_change) \
+        .where(Match.status == MatchStatus.COMPLETED) \
+        .order_by(Match.completed_at, Match.id)
+
+    # All selected columns are plain numbers, so read the DBAPI tuples directly
+    # instead of building a Row object per match
+    rows = db.session.connection().execute(statement).cursor.fetchall()
+    if not rows:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty, np.empty(0, dtype=np.float64)
+
+    columns = np.array(rows, dtype=np.float64)  # NULL elo_change becomes NaN
+    match_ids, player1_ids, player2_ids, winner_ids = columns[:, :4].astype(np.int64).T
+    loser_ids = np.where(winner_ids == player1_ids, player2_ids, player1_ids)
+    return match_ids, winner_ids, loser_ids, columns[:, 4].copy()
+
+def _replay_scalar(ratings, winner_idx, loser_idx, k):
+    r = ratings.tolist()
+    changes = [0.0] * len(winner_idx)
+    for i, (w, l) in enumerate(zip(winner_idx.tolist(), loser_idx.tolist())):
+        change = k * (1 - 1 / (1 + 10 ** ((r[l] - r[w]) / 400)))
+        r[w] += change
+        r[l] -= change
+        changes[i] = change
+    return np.array(r, dtype=np.float64), np.array(changes, dtype=np.float64)
+
+def replay_ratings(winner_idx, loser_idx, n_players, k=ELO_K_FACTOR, initial_elo=DEFAULT_ELO):
+    """
+    Replay results (compact player indices, in rating order) from initial ratings.
+    Returns (ratings, elo_changes) as float64 arrays.
+    """
+    ratings = np.full(n_players, float(initial_elo), dtype=np.float64)
+    if len(winner_idx) == 0:
+        return ratings, np.empty(0, dtype=np.float64)
+
+    return _replay_scalar(ratings, winner_idx, loser_idx, k)
+
+def _apply_replayed(player_ids, versions, replayed_elos, divergent):
+    """
+    Write replayed ratings with version-guarded UPDATEs. Players rated since
+    their version was read are left alone: their replayed rating is already
+    stale. Returns the indices written.
+    """
+    players = Player.__table__
+    statement = update(players).where(players.c.id == bindparam('player_id'),
+                                      players.c.rating_version == bindparam('read_version')) \
+        .values(elo=bindparam('elo'), rating_version=players.c.rating_version + 1, leaderboard_version=None)
+    for _ in range(RATING_UPDATE_RETRIES):
+        if not len(divergent):
+            return divergent
+        updated = db.session.execute(statement, [
+            {'player_id': int(player_ids[i]), 'elo': float(replayed_elos[i]), 'read_version': int(versions[i])}
+            for i in divergent
+        ]).rowcount
+        if updated == len(divergent):
+            db.session.commit()
+            return divergent
+        db.session.rollback()
+        current = dict(db.session.execute(select(Player.id, Player.rating_version)).all())
+        divergent = np.array([i for i in divergent.tolist() if current.get(int(player_ids[i])) == versions[i]],
+                             dtype=np.int64)
+    raise RatingConflictError(f'Could not apply the replay: players were rated concurrently '
+                              f'{RATING_UPDATE_RETRIES} times')
+
+def verify_ratings(apply=False, tolerance=1e-6, k=ELO_K_FACTOR, max_reported=MAX_REPORTED_PLAYERS):
+    """
+    Replay the full match history and compare with stored ratings.
+    If apply is True, divergent Player.elo values are corrected in one bulk
+    update, except for players rated while the replay ran (reported as
+    skipped). Returns a report dict listing the max_reported largest
+    divergences.
+    """
+    start = time.perf_counter()
+
+    player_rows = db.session.execute(select(Player.id, Player.elo, Player.rating_version).order_by(Player.id)).all()
+    player_ids = np.array([row[0] for row in player_rows], dtype=np.int64)
+    stored_elos = np.array([row[1] for row in player_rows], dtype=np.float64)
+    versions = np.array([row[2] for row in player_rows], dtype=np.int64)
+
+    match_ids, winner_ids, loser_ids, stored_changes = load_completed_matches()
+    winner_idx = np.searchsorted(player_ids, winner_ids).clip(max=max(len(player_ids) - 1, 0))
+    loser_idx = np.searchsorted(player_ids, loser_ids).clip(max=max(len(player_ids) - 1, 0))
+
+    # Skip matches whose players no longer exist
+    known = (player_ids[winner_idx] == winner_ids) & (player_ids[loser_idx] == loser_ids) \
+        if len(player_ids) else np.zeros(len(match_ids), dtype=bool)
+    match_ids, winner_idx, loser_idx, stored_changes = \
+        match_ids[known], winner_idx[known], loser_idx[known], stored_changes[known]
+
+    replayed_elos, replayed_changes = replay_ratings(winner_idx, loser_idx, len(player_ids), k)
+
+    differences = replayed_elos - stored_elos
+    divergent = np.flatnonzero(np.abs(differences) > tolerance)
+    divergent_matches = np.flatnonzero(~(np.abs(replayed_changes - stored_changes) <= tolerance))
+
+    written = skipped = divergent[:0]
+    if apply:
+        written = _apply_replayed(player_ids, versions, replayed_elos, divergent)
+        skipped = np.setdiff1d(divergent, written)
+
+    reported = divergent[np.argsort(-np.abs(differences[divergent]), kind='stable')[:max_reported]]
+    return {
+        'matches': int(len(match_ids)),
+        'players': int(len(player_ids)),
+        'divergent_player_count': int(len(divergent)),
+        'divergent_match_count': int(len(divergent_matches)),
+        'max_abs_difference': float(np.abs(differences).max()) if len(differences) else 0.0,
+        'divergent_players': [{
+            'player_id': int(player_ids[i]),
+            'stored_elo': float(stored_elos[i]),
+            'replayed_elo': float(replayed_elos[i]),
+            'difference': float(differences[i])
+        } for i in reported],
+        'applied': bool(len(written)),
+        'skipped_player_count': int(len(skipped)),
+        'skipped_player_ids': [int(player_ids[i]) for i in skipped[:max_reported]],
+        'seconds': round(time.perf_counter() - start, 6)
+    }
@@ -1,9 +1,28 @@
-from flask import Blueprint, request, jsonify, render_template
-from models import db, Admin, AdminSession, Player, PlayerSession, Challenge, Match, Tournament, TournamentParticipant, PlayerStatus, ChallengeStatus, MatchStatus, TournamentStatus
-from app.auth import require_admin_auth, require_player_auth, authorize_player_action, get_authenticated_user
-from app.services import calculate_elo, cleanup_expired_challenges, cleanup_expired_matches, update_tournament_status
+from flask import Blueprint, request, jsonify, render_template, current_app, url_for, abort
+from models import db, Admin, Player, PlayerStats, Challenge, Match, Tournament, TournamentParticipant, PlayerStatus, ChallengeStatus, MatchStatus, TournamentStatus, \
+    challenge_archive, match_archive, tournament_archive
+from app.auth import require_admin_auth, require_player_auth, authorize_player_action, get_authenticated_user, invalidate_player_sessions, start_session, end_session
+from app.scheduler import scheduler
+from app.deadlines import expiry_timer
+from app.replay import verify_ratings
+from app.history import record_rating_change, remove_rating_change, rating_at, rating_history, downsample
+from app.rating_engines import get_rating_engine
+from app.matchups import matchup_matrix_body
+from app.importer import import_matches, ImportFormatError
+from app.services import RatingConflictError
+from app.archive import archive_cold_rows, archived_rows, ARCHIVE_VACUUM_MODES
+from app.tournament_stats import participant_joined, participant_left, result_recorded, result_undone
+from app.player_stats import player_result_recorded, player_result_undone, verify_player_stats
+from app.pagination import encode_cursor, decode_cursor, keyset_page
+from app.streaming import iter_rows, streamed_response
+from app.negotiation import negotiated
+from app.serializers import row_serializer, enum_value, current_age_now
+from app.data_version import conditional
+from app.leaderboard import leaderboard
+from app.divisions import DIVISION_SEPARATOR, division_keys
 from datetime import datetime, timedelta
-from sqlalchemy import text
+import math
+from sqlalchemy import text, select, func, or_
 
 bp = Blueprint('main', __name__)
 
@@ -24,7 +43,11 @@ def require_admin():
 
 def require_active_player(player_id):
     """Require player to be active or return error"""
-    player = Player.query.filter_by(id=player_id, status=PlayerStatus.APPROVED).first()
+    user, user_type = get_authenticated_user()
+    if user_type == 'player' and user.id == player_id:
+        player = user if user.is_active() else None
+    else:
+        player = Player.query.filter_by(id=player_id, status=PlayerStatus.APPROVED).first()
     if not player:
         return None, (jsonify({'error': 'Player must be approved and active'}), 400)
     return player, None
@@ -57,6 +80,99 @@ def validate_required_fields(data, fields):
         return False, jsonify({'error': f'Missing required fields: {", ".join(missing)}'}), 400
     return True, None, None
 
+def number_field(data, field, integer=False):
+    """Parse data[field] as a finite number, or a whole one; returns (number, error)"""
+    value = data.get(field)
+    try:
+        if isinstance(value, bool):
+            raise ValueError
+        number = float(value)
+    except (TypeError, ValueError):
+        number = math.nan
+    if not math.isfinite(number) or (integer and not number.is_integer()):
+        kind = 'a whole number' if integer else 'a number'
+        return None, (jsonify({'error': f'{field} must be {kind}'}), 400)
+    return (int(number) if integer else number), None
+
+def status_filter(status_enum):
+    """Parse an optional ?status= filter on effective (read-time) status; returns (status or None, error)"""
+    status = request.args.get('status')
+    if not status:
+        return None, None
+    try:
+        return status_enum(status), None
+    except ValueError:
+        valid = ', '.join(s.value for s in status_enum)
+        return None, (jsonify({'error': f'Invalid status. Use one of: {valid}'}), 400)
+
+def include_archived():
+    """True if the listing should also return archived rows (?include_archived=true)"""
+    return request.args.get('include_archived', '').lower() in ('1', 'true', 'yes')
+
+def row_or_404(statement):
+    """First row of a Core select, or abort with 404"""
+    row = db.session.execute(statement).first()
+    if row is None:
+        abort(404)
+    return row
+
+def listing_columns(table, fields, status):
+    """table's columns named fields, in order, with the status expression (live or stored) as 'status'"""
+    return [status.label('status') if name == 'status' else table.c[name] for name in fields]
+
+def offset_and_limit():
+    """(?offset=, ?limit=, None) for offset-paged rankings, or (None, None, error response)"""
+    max_limit = current_app.config['LISTING_MAX_PAGE_SIZE']
+    try:
+        offset = int(request.args.get('offset', 0))
+        limit = int(request.args.get('limit', current_app.config['LISTING_PAGE_SIZE']))
+    except ValueError:
+        return None, None, (jsonify({'error': 'offset and limit must be integers'}), 400)
+    if offset < 0:
+        return None, None, (jsonify({'error': 'offset must be a non-negative integer'}), 400)
+    if not 1 <= limit <= max_limit:
+        return None, None, (jsonify({'error': f'limit must be an integer between 1 and {max_limit}'}), 400)
+    return offset, limit, None
+
+def listing_response(listing, serialize, live, archive=None, key=lambda row: row.id):
+    """
+    One page of a listing ordered by ID (see app/pagination.py), sized by
+    ?limit= and positioned by ?cursor=. live(after, n) and archive(after, n)
+    return up to n rows with an ID above after; archived rows follow the live
+    ones with ?include_archived=true, and every item then carries an archived
+    flag. The body is the list of serialize(row), encoded as it is streamed;
+    the next page's cursor is sent in X-Next-Cursor and a Link rel="next"
+    header.
+    """
+    max_limit = current_app.config['LISTING_MAX_PAGE_SIZE']
+    try:
+        limit = int(request.args.get('limit', current_app.config['LISTING_PAGE_SIZE']))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= max_limit:
+        return jsonify({'error': f'limit must be an integer between 1 and {max_limit}'}), 400
+    try:
+        position = decode_cursor(request.args.get('cursor'), listing)
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    
+    archived_too = include_archived() and archive is not None
+    rows, position = keyset_page(live, archive if archived_too else None, limit, position, key)
+    
+    def items():
+        for row, archived in rows:
+            item = serialize(row)
+            if archived_too:
+                item['archived'] = archived
+            yield item
+    
+    response = streamed_response(items())
+    if position:
+        cursor = encode_cursor(listing, position)
+        response.headers['X-Next-Cursor'] = cursor
+        response.headers['Link'] = f'<{url_for(request.endpoint, **{**request.args.to_dict(), "cursor": cursor})}>; rel="next"'
+    return response
+
 def safe_commit():
     """Safely commit database changes with error handling"""
     try:
@@ -64,7 +180,7 @@ def safe_commit():
         return True, None
     except Exception as e:
         db.session.rollback()
-        return False, jsonify({'error': 'Database error occurred'}), 500
+        return False, (jsonify({'error': 'Database error occurred'}), 500)
 
 # Admin Authentication Endpoints
 @bp.route('/admin/login', methods=['POST'])
@@ -81,20 +197,16 @@ def admin_login():
     if not admin or not admin.check_password(password):
         return jsonify({'error': 'Invalid credentials'}), 401
     
-    # Clean up expired sessions
-    AdminSession.query.filter(AdminSession.expires_at < datetime.now()).delete()
-    
     # Create new session
-    session = AdminSession(admin_id=admin.id)
-    db.session.add(session)
+    token, expires_at = start_session('admin', admin.id)
     
     success, error = safe_commit()
     if not success:
         return error
     
     return jsonify({
-        'token': session.token,
-        'expires_at': session.expires_at.isoformat(),
+        'token': token,
+        'expires_at': expires_at.isoformat(),
         'user_type': 'admin'
     })
 
@@ -110,10 +222,8 @@ def admin_logout():
     
     try:
         token = auth_header.split(' ')[1]
-        session = AdminSession.query.filter_by(token=token).first()
-        if session:
-            db.session.delete(session)
-            safe_commit()
+        end_session(token, 'admin')
+        safe_commit()
     except (IndexError, AttributeError):
         return jsonify({'error': 'Invalid authorization header format'}), 400
     
@@ -137,20 +247,16 @@ def player_login():
     if player.status != PlayerStatus.APPROVED:
         return jsonify({'error': 'Player account is not approved yet'}), 403
     
-    # Clean up expired sessions
-    PlayerSession.query.filter(PlayerSession.expires_at < datetime.now()).delete()
-    
     # Create new session
-    session = PlayerSession(player_id=player.id)
-    db.session.add(session)
+    token, expires_at = start_session('player', player.id)
     
     success, error = safe_commit()
     if not success:
         return error
     
     return jsonify({
-        'token': session.token,
-        'expires_at': session.expires_at.isoformat(),
+        'token': token,
+        'expires_at': expires_at.isoformat(),
         'player_id': player.id,
         'player_name': player.name,
         'user_type': 'player'
@@ -168,10 +274,8 @@ def player_logout():
     
     try:
         token = auth_header.split(' ')[1]
-        session = PlayerSession.query.filter_by(token=token).first()
-        if session:
-            db.session.delete(session)
-            safe_commit()
+        end_session(token, 'player')
+        safe_commit()
     except (IndexError, AttributeError):
         return jsonify({'error': 'Invalid authorization header format'}), 400
     
@@ -186,7 +290,13 @@ def register_player():
     if not valid:
         return error_response, status_code
     
-    name, age, weight, password = data.get('name'), data.get('age'), data.get('weight'), data.get('password')
+    name, password = data.get('name'), data.get('password')
+    age, error = number_field(data, 'age', integer=True)
+    if error:
+        return error
+    weight, error = number_field(data, 'weight')
+    if error:
+        return error
     
     # Check if name already exists
     existing_player = Player.query.filter_by(name=name).first()
@@ -207,6 +317,7 @@ def register_player():
         'elo': player.elo,
         'age': player.age,
         'weight': player.weight,
+        'division': player.division,
         'status': player.status.value
     })
 
@@ -224,6 +335,7 @@ def approve_player(player_id):
     success, error = safe_commit()
     if not success:
         return error
+    invalidate_player_sessions(player_id)
     
     return jsonify({'message': 'Player approved'})
 
@@ -242,23 +354,23 @@ def reject_player(player_id):
     success, error = safe_commit()
     if not success:
         return error
+    invalidate_player_sessions(player_id)
     
     return jsonify({'message': 'Player rejected and removed from database'})
 
+pending_player_listing = row_serializer(('id', 'name', 'age', 'weight', 'registration_date'))
+
 @bp.route('/admin/players/pending', methods=['GET'])
 def list_pending_players():
     admin, error = require_admin()
     if error:
         return error
     
-    pending_players = Player.query.filter_by(status=PlayerStatus.PENDING).all()
-    return jsonify([{
-        'id': p.id,
-        'name': p.name,
-        'age': p.age,
-        'weight': p.weight,
-        'registration_date': p.registration_date
-    } for p in pending_players])
+    rows = db.session.execute(
+        select(Player.id, Player.name, Player.age, Player.weight, Player.registration_date)
+        .where(Player.status == PlayerStatus.PENDING)
+    ).all()
+    return jsonify([pending_player_listing(row) for row in rows])
 
 @bp.route('/players/weight', methods=['PUT'])
 def update_weight():
@@ -267,8 +379,6 @@ def update_weight():
     if not data or 'weight' not in data:
         return jsonify({'error': 'Weight required'}), 400
     
-    new_weight = data.get('weight')
-    
     # Check if admin is specifying a player_id
     user, user_type = get_authenticated_user()
     if not user:
@@ -289,19 +399,22 @@ def update_weight():
     if not player.is_active():
         return jsonify({'error': 'Cannot update weight for inactive player'}), 400
     
+    new_weight, error = number_field(data, 'weight')
+    if error:
+        return error
+    
+    # The division key follows the weight (see app/divisions.py)
     player.weight = new_weight
     success, error = safe_commit()
     if not success:
         return error
     
-    return jsonify({'message': 'Weight updated', 'new_weight': player.weight})
+    return jsonify({'message': 'Weight updated', 'new_weight': player.weight, 'division': player.division})
 
 # Challenge System
 @bp.route('/challenges', methods=['POST'])
 def create_challenge():
     """Create a challenge - must be authenticated as one of the players or as admin"""
-    cleanup_expired_challenges()
-    
     data = request.json
     valid, error_response, status_code = validate_required_fields(data, ['challenger_id', 'challenged_id', 'host_id'])
     if not valid:
@@ -340,6 +453,7 @@ def create_challenge():
     success, error = safe_commit()
     if not success:
         return error
+    expiry_timer.schedule_challenge(challenge)
     
     return jsonify({
         'challenge_id': challenge.id,
@@ -349,8 +463,6 @@ def create_challenge():
 @bp.route('/challenges/<int:challenge_id>/accept', methods=['POST'])
 def accept_challenge(challenge_id):
     """Accept a challenge - must be authenticated as the challenged player or admin"""
-    cleanup_expired_challenges()
-    
     challenge = Challenge.query.get_or_404(challenge_id)
     
     # Authorize that the logged-in user is the challenged player
@@ -358,13 +470,10 @@ def accept_challenge(challenge_id):
     if error:
         return error
     
-    if challenge.status != ChallengeStatus.PENDING:
-        return jsonify({'error': 'Challenge is no longer pending'}), 400
-    
-    if datetime.now() > challenge.expires_at:
-        challenge.status = ChallengeStatus.EXPIRED
-        safe_commit()
+    if challenge.effective_status == ChallengeStatus.EXPIRED:
         return jsonify({'error': 'Challenge has expired'}), 400
+    if challenge.effective_status != ChallengeStatus.PENDING:
+        return jsonify({'error': 'Challenge is no longer pending'}), 400
     
     # Challenge is accepted, create match immediately
     challenge.challenged_accepted_at = datetime.now()
@@ -382,6 +491,7 @@ def accept_challenge(challenge_id):
     success, error = safe_commit()
     if not success:
         return error
+    expiry_timer.schedule_match(match)
     
     return jsonify({
         'message': 'Match created',
@@ -427,6 +537,7 @@ def create_tournament():
     success, error = safe_commit()
     if not success:
         return error
+    expiry_timer.schedule_tournament(tournament)
     
     return jsonify({
         'tournament_id': tournament.id,
@@ -437,8 +548,6 @@ def create_tournament():
 @bp.route('/tournaments/<int:tournament_id>/join', methods=['POST'])
 def join_tournament(tournament_id):
     """Join a tournament - must be authenticated as the joining player or admin"""
-    update_tournament_status()
-    
     tournament = Tournament.query.get_or_404(tournament_id)
     data = request.json
     
@@ -461,7 +570,7 @@ def join_tournament(tournament_id):
     if error:
         return error
     
-    if tournament.status != TournamentStatus.REGISTRATION_OPEN:
+    if tournament.effective_status != TournamentStatus.REGISTRATION_OPEN:
         return jsonify({'error': 'Tournament registration is closed'}), 400
     
     # Tournament host cannot participate in their own tournament
@@ -482,6 +591,7 @@ def join_tournament(tournament_id):
     
     participant = TournamentParticipant(tournament_id=tournament_id, player_id=player_id)
     db.session.add(participant)
+    participant_joined(tournament_id)
     
     success, error = safe_commit()
     if not success:
@@ -492,8 +602,6 @@ def join_tournament(tournament_id):
 @bp.route('/tournaments/<int:tournament_id>/leave', methods=['DELETE'])
 def leave_tournament(tournament_id):
     """Leave a tournament - must be authenticated as the leaving player or admin"""
-    update_tournament_status()
-    
     tournament = Tournament.query.get_or_404(tournament_id)
     data = request.json
     
@@ -516,7 +624,7 @@ def leave_tournament(tournament_id):
     if error:
         return error
     
-    if tournament.status != TournamentStatus.REGISTRATION_OPEN:
+    if tournament.effective_status != TournamentStatus.REGISTRATION_OPEN:
         return jsonify({'error': 'Cannot leave tournament after registration closes'}), 400
     
     # Find the participant record
@@ -530,6 +638,7 @@ def leave_tournament(tournament_id):
     
     # Remove the participant
     db.session.delete(participant)
+    participant_left(participant)
     
     success, error = safe_commit()
     if not success:
@@ -540,8 +649,6 @@ def leave_tournament(tournament_id):
 @bp.route('/tournaments/<int:tournament_id>/record-match', methods=['POST'])
 def record_tournament_match(tournament_id):
     """Host records a match result between any two tournament participants - must be authenticated as host or admin"""
-    update_tournament_status()
-    
     tournament = Tournament.query.get_or_404(tournament_id)
     data = request.json
     
@@ -565,15 +672,11 @@ def record_tournament_match(tournament_id):
     if not host.is_active():
         return jsonify({'error': 'Host must be approved and active'}), 400
     
-    # Verify tournament is active
-    if tournament.status != TournamentStatus.ACTIVE:
-        return jsonify({'error': 'Tournament is not active'}), 400
-    
-    # Check if tournament has expired
-    if datetime.now() > tournament.expires_at:
-        tournament.status = TournamentStatus.EXPIRED
-        safe_commit()
+    # Verify tournament is active (and not past its end)
+    if tournament.effective_status == TournamentStatus.EXPIRED:
         return jsonify({'error': 'Tournament has expired'}), 400
+    if tournament.effective_status != TournamentStatus.ACTIVE:
+        return jsonify({'error': 'Tournament is not active'}), 400
     
     if player1_id == player2_id:
         return jsonify({'error': 'Players must be different'}), 400
@@ -593,8 +696,9 @@ def record_tournament_match(tournament_id):
     # Get players for ELO calculation
     winner, loser = get_winner_loser(winner_id, player1_id, player2_id)
     
-    # Calculate ELO change
-    elo_change = calculate_elo(winner, loser)
+    # Apply the result with the configured rating engine
+    engine = get_rating_engine()
+    elo_change = engine.record_result(winner, loser)
     
     # Create and complete the match immediately
     match = Match(
@@ -612,6 +716,10 @@ def record_tournament_match(tournament_id):
     )
     
     db.session.add(match)
+    if not engine.uses_rating_periods:
+        record_rating_change(match, winner, loser, elo_change)
+    player_result_recorded(match, winner, loser, rated=not engine.uses_rating_periods)
+    result_recorded(match)
     
     success, error = safe_commit()
     if not success:
@@ -619,28 +727,32 @@ def record_tournament_match(tournament_id):
     
     return jsonify(create_match_response(match, winner, loser, 'Tournament match result recorded'))
 
+participant_listing = row_serializer(('player_id', 'player_name', 'player_elo', 'player_status', 'joined_at'),
+                                     player_status=(enum_value, 'player_status'))
+
 @bp.route('/tournaments/<int:tournament_id>/participants', methods=['GET'])
 def get_tournament_participants(tournament_id):
-    tournament = Tournament.query.get_or_404(tournament_id)
+    row_or_404(select(Tournament.id).where(Tournament.id == tournament_id))
     
-    participants = db.session.query(TournamentParticipant, Player).join(
-        Player, TournamentParticipant.player_id == Player.id
-    ).filter(TournamentParticipant.tournament_id == tournament_id).all()
+    rows = db.session.execute(
+        select(Player.id.label('player_id'), Player.name.label('player_name'), Player.elo.label('player_elo'),
+               Player.status.label('player_status'), TournamentParticipant.joined_at)
+        .join(Player, TournamentParticipant.player_id == Player.id)
+        .where(TournamentParticipant.tournament_id == tournament_id)
+    ).all()
+    return jsonify([participant_listing(row) for row in rows])
+
+@bp.route('/tournaments/<int:tournament_id>/matchup-matrix', methods=['GET'])
+def get_matchup_matrix(tournament_id):
+    """Expected score for every pairing of participants, as a flat row-major array"""
+    row_or_404(select(Tournament.id).where(Tournament.id == tournament_id))
     
-    return jsonify([{
-        'player_id': participant.Player.id,
-        'player_name': participant.Player.name,
-        'player_elo': participant.Player.elo,
-        'player_status': participant.Player.status.value,
-        'joined_at': participant.TournamentParticipant.joined_at
-    } for participant in participants])
+    return current_app.response_class(matchup_matrix_body(tournament_id), mimetype='application/json')
 
 # Match Result Recording
 @bp.route('/matches/result', methods=['POST'])
 def record_match_result():
     """Record match result - must be authenticated as the host or admin"""
-    cleanup_expired_matches()
-    
     data = request.json
     
     valid, error_response, status_code = validate_required_fields(data, ['host_id', 'player1_id', 'player2_id', 'winner_id'])
@@ -659,9 +771,9 @@ def record_match_result():
     if not host.is_active():
         return jsonify({'error': 'Host must be approved and active'}), 400
     
-    # Find the first PENDING match between the two players
+    # Find the first PENDING match between the two players that has not expired
     match = Match.query.filter(
-        Match.status == MatchStatus.PENDING,
+        Match.effective_status == MatchStatus.PENDING,
         db.or_(
             db.and_(Match.player1_id == player1_id, Match.player2_id == player2_id),
             db.and_(Match.player1_id == player2_id, Match.player2_id == player1_id)
@@ -674,20 +786,15 @@ def record_match_result():
     if match.host_id != host_id:
         return jsonify({'error': 'Only the match host can record results'}), 400
     
-    # Check expiration only if expires_at is set
-    if match.expires_at and datetime.now() > match.expires_at:
-        match.status = MatchStatus.EXPIRED
-        safe_commit()
-        return jsonify({'error': 'Match has expired'}), 400
-    
     if winner_id not in [match.player1_id, match.player2_id]:
         return jsonify({'error': 'Winner must be one of the match players'}), 400
     
     # Get players for ELO calculation
     winner, loser = get_winner_loser(winner_id, match.player1_id, match.player2_id)
     
-    # Calculate ELO change
-    elo_change = calculate_elo(winner, loser)
+    # Apply the result with the configured rating engine
+    engine = get_rating_engine()
+    elo_change = engine.record_result(winner, loser)
     
     # Update match with result and optional fields
     match.winner_id = winner_id
@@ -696,6 +803,9 @@ def record_match_result():
     match.notes = notes
     match.video_link = video_link
     match.elo_change = elo_change
+    if not engine.uses_rating_periods:
+        record_rating_change(match, winner, loser, elo_change)
+    player_result_recorded(match, winner, loser, rated=not engine.uses_rating_periods)
     
     success, error = safe_commit()
     if not success:
@@ -750,11 +860,18 @@ def undo_last_match():
     # Revert ELO changes
     winner, loser = get_winner_loser(last_match.winner_id, last_match.player1_id, last_match.player2_id)
     
-    winner.elo -= last_match.elo_change
-    loser.elo += last_match.elo_change
+    engine = get_rating_engine()
+    if not engine.can_revert(last_match):
+        return jsonify({'error': 'Cannot undo a match whose rating period has already been closed'}), 400
+    
+    engine.revert_result(winner, loser, last_match.elo_change)
     
     # Update match status
     last_match.status = MatchStatus.UNDONE
+    remove_rating_change(last_match)
+    player_result_undone(last_match)
+    if last_match.tournament_id:
+        result_undone(last_match)
     
     success, error = safe_commit()
     if not success:
@@ -768,77 +885,473 @@ def undo_last_match():
     })
 
 # Listing Endpoints
+# Each listing selects these columns (live and archived rows alike) and builds
+# its items with a serializer compiled once (see app/serializers.py)
+MATCH_FIELDS = ('id', 'player1_id', 'player2_id', 'winner_id', 'host_id', 'tournament_id', 'challenge_id',
+                'status', 'created_at', 'completed_at', 'notes', 'video_link')
+match_listing = row_serializer(MATCH_FIELDS, status=(enum_value, 'status'))
+
+def match_columns(archived=False):
+    if archived:
+        return listing_columns(match_archive, MATCH_FIELDS, match_archive.c.status)
+    return listing_columns(Match.__table__, MATCH_FIELDS, Match.effective_status)
+
 @bp.route('/matches', methods=['GET'])
+@negotiated
+@conditional
 def list_matches():
     player_id = request.args.get('player_id')
     tournament_id = request.args.get('tournament_id')
+    status, error = status_filter(MatchStatus)
+    if error:
+        return error
     
-    query = Match.query
-    if player_id:
-        query = query.filter((Match.player1_id == player_id) | (Match.player2_id == player_id))
+    criteria, archive_criteria = [], []
     if tournament_id:
-        query = query.filter(Match.tournament_id == tournament_id)
-    
-    matches = query.all()
-    return jsonify([{
-        'id': m.id,
-        'player1_id': m.player1_id,
-        'player2_id': m.player2_id,
-        'winner_id': m.winner_id,
-        'host_id': m.host_id,
-        'tournament_id': m.tournament_id,
-        'challenge_id': m.challenge_id,
-        'status': m.status.value,
-        'created_at': m.created_at,
-        'completed_at': m.completed_at,
-        'notes': m.notes,
-        'video_link': m.video_link
-    } for m in matches])
+        criteria.append(Match.tournament_id == tournament_id)
+        archive_criteria.append(match_archive.c.tournament_id == tournament_id)
+    if status:
+        criteria.append(Match.effective_status == status)
+        archive_criteria.append(match_archive.c.status == status)
+    if player_id:
+        archive_criteria.append((match_archive.c.player1_id == player_id) | (match_archive.c.player2_id == player_id))
+    
+    def live(after, limit):
+        statement = select(*match_columns()).where(Match.id > after, *criteria)
+        if player_id:
+            # One index seek per side rather than an OR, which would collect and
+            # sort all of the player's later matches to return the first few
+            statement = statement.where(or_(*(
+                Match.id.in_(select(Match.id).where(side == player_id, Match.id > after, *criteria)
+                             .order_by(Match.id).limit(limit))
+                for side in (Match.player1_id, Match.player2_id)
+            )))
+        return db.session.execute(statement.order_by(Match.id).limit(limit)).all()
+    
+    def archive(after, limit):
+        return archived_rows(match_archive, *archive_criteria, after=after, limit=limit,
+                             columns=match_columns(archived=True))
+    
+    return listing_response('matches', match_listing, live, archive)
+
+def player_stats_columns():
+    """Result counters of the outer-joined PlayerStats row (0 / NULL before the first result)"""
+    return [
+        func.coalesce(PlayerStats.games_played, 0).label('games_played'),
+        func.coalesce(PlayerStats.wins, 0).label('wins'),
+        func.coalesce(PlayerStats.losses, 0).label('losses'),
+        PlayerStats.peak_elo,
+        PlayerStats.last_played_at
+    ]
+
+def player_columns():
+    return [Player.id, Player.name, Player.elo, Player.age, Player.registration_date.label('_registration_date'),
+            Player.weight, Player.division, Player.status, *player_stats_columns()]
+
+player_listing = row_serializer([column.key for column in player_columns()],
+                                status=(enum_value, 'status'),
+                                current_age=(current_age_now, 'age', '_registration_date'))
+player_stats_listing = row_serializer(('player_id', 'elo', 'games_played', 'wins', 'losses', 'peak_elo',
+                                       'last_played_at'))
 
 @bp.route('/players', methods=['GET'])
+@negotiated
+@conditional
 def list_players():
-    players = Player.query.all()
-    
-    return jsonify([{
-        'id': p.id, 
-        'name': p.name, 
-        'elo': p.elo,
-        'age': p.age,
-        'current_age': p.get_current_age(),
-        'weight': p.weight,
-        'status': p.status.value
-    } for p in players])
+    division = request.args.get('division')
+    if division is not None and division not in division_keys():
+        return jsonify({'error': 'Invalid division'}), 400
+    criteria = [Player.division == division] if division is not None else []
+    
+    def live(after, limit):
+        return db.session.execute(
+            select(*player_columns()).outerjoin(PlayerStats, PlayerStats.player_id == Player.id)
+            .where(Player.id > after, *criteria).order_by(Player.id).limit(limit)
+        ).all()
+    
+    return listing_response('players', player_listing, live)
+
+@bp.route('/players/<int:player_id>/stats', methods=['GET'])
+def get_player_stats(player_id):
+    """Result counters for one player, maintained on every recorded result"""
+    row = row_or_404(
+        select(Player.id.label('player_id'), Player.elo, *player_stats_columns())
+        .outerjoin(PlayerStats, PlayerStats.player_id == Player.id).where(Player.id == player_id)
+    )
+    return jsonify(player_stats_listing(row))
+
+def leaderboard_entries(entries):
+    return [{'rank': rank, 'id': player_id, 'name': name, 'elo': elo} for rank, player_id, name, elo in entries]
+
+@bp.route('/leaderboard', methods=['GET'])
+@conditional
+def get_leaderboard():
+    """Approved players by rating from ?offset= (default 0), ?limit= of them; tied players share a rank"""
+    offset, limit, error = offset_and_limit()
+    if error:
+        return error
+    
+    total, entries = leaderboard.top(offset, limit)
+    return jsonify({
+        'total_players': total,
+        'offset': offset,
+        'players': leaderboard_entries(entries)
+    })
+
+@bp.route('/players/<int:player_id>/rank', methods=['GET'])
+def get_player_rank(player_id):
+    """A player's leaderboard rank"""
+    row_or_404(select(Player.id).where(Player.id == player_id))
+    result = leaderboard.rank(player_id)
+    if result is None:
+        return jsonify({'error': 'Player is not on the leaderboard'}), 404
+    
+    rank, name, elo, total = result
+    return jsonify({
+        'player_id': player_id,
+        'name': name,
+        'elo': elo,
+        'rank': rank,
+        'total_players': total
+    })
+
+@bp.route('/players/<int:player_id>/around', methods=['GET'])
+def get_players_around(player_id):
+    """The leaderboard from ?radius= (default 5) places above a player to as many below"""
+    max_radius = current_app.config['LEADERBOARD_MAX_RADIUS']
+    try:
+        radius = int(request.args.get('radius', 5))
+    except ValueError:
+        radius = -1
+    if not 0 <= radius <= max_radius:
+        return jsonify({'error': f'radius must be an integer between 0 and {max_radius}'}), 400
+    
+    row_or_404(select(Player.id).where(Player.id == player_id))
+    result = leaderboard.around(player_id, radius)
+    if result is None:
+        return jsonify({'error': 'Player is not on the leaderboard'}), 404
+    
+    total, entries = result
+    return jsonify({
+        'player_id': player_id,
+        'total_players': total,
+        'players': leaderboard_entries(entries)
+    })
+
+@bp.route('/divisions', methods=['GET'])
+@conditional
+def list_divisions():
+    """Configured weight and age classes, and the number of approved players in each division"""
+    counts = dict(db.session.execute(
+        select(Player.division, func.count()).where(Player.status == PlayerStatus.APPROVED).group_by(Player.division)
+    ).all())
+    config = current_app.config
+    return jsonify({
+        'weight_classes': [{'name': name, 'under': bound} for name, bound in config['DIVISION_WEIGHT_CLASSES']],
+        'age_classes': [{'name': name, 'under': bound} for name, bound in config['DIVISION_AGE_CLASSES']],
+        'divisions': [{'division': key, 'players': counts.get(key, 0)} for key in division_keys()]
+    })
+
+@bp.route('/divisions/<weight_class>/<age_class>/leaderboard', methods=['GET'])
+@conditional
+def get_division_leaderboard(weight_class, age_class):
+    """Approved players of one division by rating, paged like GET /leaderboard"""
+    division = weight_class + DIVISION_SEPARATOR + age_class
+    if division not in division_keys():
+        return jsonify({'error': 'Division not found'}), 404
+    offset, limit, error = offset_and_limit()
+    if error:
+        return error
+    
+    ranked = (Player.division == division, Player.status == PlayerStatus.APPROVED)
+    total = db.session.scalar(select(func.count()).where(*ranked))
+    rows = db.session.execute(
+        select(Player.id, Player.name, Player.elo).where(*ranked)
+        .order_by(Player.elo.desc(), Player.id).offset(offset).limit(limit)
+    ).all()
+    
+    entries = []
+    for position, (player_id, name, elo) in enumerate(rows, start=offset + 1):
+        if not entries:
+            rank = db.session.scalar(select(func.count()).where(*ranked, Player.elo > elo)) + 1
+        elif elo != entries[-1][3]:
+            rank = position
+        else:
+            rank = entries[-1][0]
+        entries.append((rank, player_id, name, elo))
+    
+    return jsonify({
+        'division': division,
+        'total_players': total,
+        'offset': offset,
+        'players': leaderboard_entries(entries)
+    })
+
+@bp.route('/players/<int:player_id>/opponents', methods=['GET'])
+def list_eligible_opponents(player_id):
+    """
+    Approved players in the player's division, highest rated first, up to
+    ?limit=; ?elo_range= keeps those within that many rating points
+    """
+    player = row_or_404(select(Player.id, Player.elo, Player.division, Player.status).where(Player.id == player_id))
+    if player.status != PlayerStatus.APPROVED:
+        return jsonify({'error': 'Player must be approved and active'}), 400
+    max_limit = current_app.config['LISTING_MAX_PAGE_SIZE']
+    try:
+        limit = int(request.args.get('limit', current_app.config['LISTING_PAGE_SIZE']))
+        elo_range = float(request.args['elo_range']) if 'elo_range' in request.args else None
+    except ValueError:
+        return jsonify({'error': 'limit and elo_range must be numbers'}), 400
+    if not 1 <= limit <= max_limit:
+        return jsonify({'error': f'limit must be an integer between 1 and {max_limit}'}), 400
+    
+    criteria = [Player.division == player.division, Player.status == PlayerStatus.APPROVED, Player.id != player.id]
+    if elo_range is not None:
+        criteria.append(Player.elo.between(player.elo - elo_range, player.elo + elo_range))
+    opponents = db.session.execute(
+        select(Player.id, Player.name, Player.elo).where(*criteria).order_by(Player.elo.desc(), Player.id).limit(limit)
+    ).all()
+    
+    return jsonify({
+        'player_id': player.id,
+        'division': player.division,
+        'opponents': [{'id': opponent_id, 'name': name, 'elo': elo} for opponent_id, name, elo in opponents]
+    })
+
+@bp.route('/players/<int:player_id>/history', methods=['GET'])
+def get_player_history(player_id):
+    """
+    Rating history for a player.
+    ?at=<ISO datetime> returns the rating at that moment; otherwise the history
+    between optional ?start/?end is returned, downsampled to ?points if given.
+    """
+    row_or_404(select(Player.id).where(Player.id == player_id))
+    
+    try:
+        at = datetime.fromisoformat(request.args['at']) if 'at' in request.args else None
+        start = datetime.fromisoformat(request.args['start']) if 'start' in request.args else None
+        end = datetime.fromisoformat(request.args['end']) if 'end' in request.args else None
+    except ValueError:
+        return jsonify({'error': 'Invalid datetime format. Use ISO format.'}), 400
+    
+    if at:
+        return jsonify({
+            'player_id': player_id,
+            'at': at.isoformat(),
+            'elo': rating_at(player_id, at)
+        })
+    
+    points = request.args.get('points', type=int)
+    if points is not None and points < 3:
+        return jsonify({'error': 'points must be at least 3'}), 400
+    
+    history = rating_history(player_id, start, end)
+    total = len(history)
+    if points:
+        history = downsample(history, points)
+    
+    return jsonify({
+        'player_id': player_id,
+        'total_points': total,
+        'history': [{
+            'recorded_at': recorded_at.isoformat(),
+            'elo': elo,
+            'match_id': match_id
+        } for recorded_at, elo, match_id in history]
+    })
+
+TOURNAMENT_FIELDS = ('id', 'name', 'host_id', 'start_time', 'status', 'participant_count', 'matches_recorded',
+                     'last_result_at', 'leader_id')
+tournament_listing = row_serializer(TOURNAMENT_FIELDS, status=(enum_value, 'status'))
 
 @bp.route('/tournaments', methods=['GET'])
+@negotiated
+@conditional
 def list_tournaments():
-    update_tournament_status()
-    tournaments = Tournament.query.all()
-    result = []
-    for t in tournaments:
-        participants = TournamentParticipant.query.filter_by(tournament_id=t.id).all()
-        result.append({
-            'id': t.id,
-            'name': t.name,
-            'host_id': t.host_id,
-            'start_time': t.start_time,
-            'status': t.status.value,
-            'participant_count': len(participants)
-        })
-    return jsonify(result)
+    status, error = status_filter(TournamentStatus)
+    if error:
+        return error
+    
+    def live(after, limit):
+        statement = select(*listing_columns(Tournament.__table__, TOURNAMENT_FIELDS, Tournament.effective_status)) \
+            .where(Tournament.id > after)
+        if status:
+            statement = statement.where(Tournament.effective_status == status)
+        return db.session.execute(statement.order_by(Tournament.id).limit(limit)).all()
+    
+    def archive(after, limit):
+        criteria = [tournament_archive.c.status == status] if status else []
+        return archived_rows(tournament_archive, *criteria, after=after, limit=limit,
+                             columns=listing_columns(tournament_archive, TOURNAMENT_FIELDS, tournament_archive.c.status))
+    
+    return listing_response('tournaments', tournament_listing, live, archive)
+
+CHALLENGE_FIELDS = ('id', 'challenger_id', 'challenged_id', 'host_id', 'status', 'created_at', 'expires_at')
+challenge_listing = row_serializer(CHALLENGE_FIELDS, status=(enum_value, 'status'))
 
 @bp.route('/challenges', methods=['GET'])
+@negotiated
+@conditional
 def list_challenges():
-    cleanup_expired_challenges()
-    challenges = Challenge.query.all()
-    return jsonify([{
-        'id': c.id,
-        'challenger_id': c.challenger_id,
-        'challenged_id': c.challenged_id,
-        'host_id': c.host_id,
-        'status': c.status.value,
-        'created_at': c.created_at,
-        'expires_at': c.expires_at
-    } for c in challenges])
+    status, error = status_filter(ChallengeStatus)
+    if error:
+        return error
+    
+    def live(after, limit):
+        statement = select(*listing_columns(Challenge.__table__, CHALLENGE_FIELDS, Challenge.effective_status)) \
+            .where(Challenge.id > after)
+        if status:
+            statement = statement.where(Challenge.effective_status == status)
+        return db.session.execute(statement.order_by(Challenge.id).limit(limit)).all()
+    
+    def archive(after, limit):
+        criteria = [challenge_archive.c.status == status] if status else []
+        return archived_rows(challenge_archive, *criteria, after=after, limit=limit,
+                             columns=listing_columns(challenge_archive, CHALLENGE_FIELDS, challenge_archive.c.status))
+    
+    return listing_response('challenges', challenge_listing, live, archive)
+
+@bp.route('/admin/matches/import', methods=['POST'])
+def import_match_history():
+    """Bulk import historical results from a CSV or NDJSON request body (all or nothing)"""
+    admin, error = require_admin()
+    if error:
+        return error
+    
+    if get_rating_engine().uses_rating_periods:
+        return jsonify({'error': 'Bulk import is only available with the elo rating engine'}), 400
+    
+    fmt = request.args.get('format')
+    if not fmt:
+        fmt = 'csv' if request.mimetype == 'text/csv' else 'ndjson'
+    
+    try:
+        report, errors = import_matches(request.get_data(as_text=True), fmt)
+    except ImportFormatError as e:
+        return jsonify({'error': str(e)}), 400
+    except RatingConflictError as e:
+        return jsonify({'error': str(e)}), 409
+    
+    if errors:
+        return jsonify({'error': 'Import rejected, nothing was written', 'errors': errors, **report}), 400
+    return jsonify(report)
+
+@bp.route('/admin/matches/export', methods=['GET'])
+@negotiated
+def export_matches():
+    """
+    Every match, in ID order, as one streamed JSON array (?format=ndjson for one
+    object per line, or any other negotiated format) of GET /matches items;
+    archived matches follow with ?include_archived=true
+    """
+    admin, error = require_admin()
+    if error:
+        return error
+    
+    archived_too = include_archived()
+    
+    def items():
+        for row in iter_rows(select(*match_columns()).order_by(Match.id)):
+            item = match_listing(row)
+            if archived_too:
+                item['archived'] = False
+            yield item
+        if archived_too:
+            for row in iter_rows(select(*match_columns(archived=True)).order_by(match_archive.c.id)):
+                item = match_listing(row)
+                item['archived'] = True
+                yield item
+    
+    return streamed_response(items())
+
+@bp.route('/admin/ratings/replay', methods=['POST'])
+def replay_ratings():
+    """Replay the full match history and report (optionally fix) ELO drift"""
+    admin, error = require_admin()
+    if error:
+        return error
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        tolerance = float(data.get('tolerance', 1e-6))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid tolerance'}), 400
+    
+    if get_rating_engine().uses_rating_periods:
+        return jsonify({'error': 'Replay is only available with the elo rating engine'}), 400
+    
+    try:
+        report = verify_ratings(apply=bool(data.get('apply')), tolerance=tolerance)
+    except RatingConflictError as e:
+        return jsonify({'error': str(e)}), 409
+    return jsonify(report)
+
+@bp.route('/admin/players/stats/verify', methods=['POST'])
+def verify_stats():
+    """Check every player's stored result counters against a full recompute (optionally fix them)"""
+    admin, error = require_admin()
+    if error:
+        return error
+    
+    data = request.get_json(silent=True) or {}
+    return jsonify(verify_player_stats(apply=bool(data.get('apply'))))
+
+@bp.route('/admin/leaderboard/verify', methods=['POST'])
+def verify_leaderboard():
+    """Check the in-memory leaderboard against the database's ordering (optionally rebuild it)"""
+    admin, error = require_admin()
+    if error:
+        return error
+    
+    data = request.get_json(silent=True) or {}
+    return jsonify(leaderboard.verify(apply=bool(data.get('apply'))))
+
+@bp.route('/admin/ratings/period', methods=['POST'])
+def close_rating_period():
+    """Close the current rating period and rate all of its results at once"""
+    admin, error = require_admin()
+    if error:
+        return error
+    
+    engine = get_rating_engine()
+    if not engine.uses_rating_periods:
+        return jsonify({'error': f'The {engine.name} rating engine does not use rating periods'}), 400
+    
+    return jsonify(engine.close_period())
+
+@bp.route('/admin/archive', methods=['POST'])
+def archive_rows():
+    """Move cold challenges, matches and tournaments into the archive tables"""
+    admin, error = require_admin()
+    if error:
+        return error
+    
+    data = request.get_json(silent=True) or {}
+    days = data.get('days', current_app.config.get('ARCHIVE_AFTER_DAYS', 30))
+    batch_size = data.get('batch_size', current_app.config.get('ARCHIVE_BATCH_SIZE', 1000))
+    vacuum_mode = data.get('vacuum')
+    if not isinstance(days, int) or isinstance(days, bool) or days < 0:
+        return jsonify({'error': 'days must be a non-negative integer'}), 400
+    if not isinstance(batch_size, int) or isinstance(batch_size, bool) or batch_size < 1:
+        return jsonify({'error': 'batch_size must be a positive integer'}), 400
+    if vacuum_mode is not None and vacuum_mode not in ARCHIVE_VACUUM_MODES:
+        return jsonify({'error': f'vacuum must be one of: {", ".join(ARCHIVE_VACUUM_MODES)}'}), 400
+    
+    return jsonify(archive_cold_rows(days, batch_size, vacuum_mode=vacuum_mode))
+
+@bp.route('/admin/maintenance', methods=['GET'])
+def maintenance_stats():
+    """Per-job statistics for the background maintenance scheduler"""
+    admin, error = require_admin()
+    if error:
+        return error
+    
+    return jsonify({
+        'scheduler_running': scheduler.running,
+        'jobs': scheduler.stats(),
+        'expiry_timer_running': expiry_timer.running,
+        'expiry_timer': expiry_timer.stats()
+    })
 
 @bp.route('/sql', methods=['POST'])
 def run_sql():
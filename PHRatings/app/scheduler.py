@@ -0,0 +1,159 @@
+"""
+In-process background scheduler for periodic maintenance jobs.
+
+Jobs run one at a time on a single daemon thread, each inside an application
+context. A job returns the number of rows it touched; the scheduler records
+per-job statistics (runs, rows, time spent, last error) for the admin
+maintenance endpoint.
+"""
+from datetime import datetime
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class Job:
+    def __init__(self, name, func, interval_seconds):
+        self.name = name
+        self.func = func
+        self.interval_seconds = interval_seconds
+        self.next_run = time.monotonic() + interval_seconds
+        self.runs = 0
+        self.rows_total = 0
+        self.seconds_total = 0.0
+        self.last_run_at = None
+        self.last_rows = None
+        self.last_seconds = None
+        self.last_error = None
+
+    def stats(self):
+        return {
+            'interval_seconds': self.interval_seconds,
+            'runs': self.runs,
+            'rows_total': self.rows_total,
+            'seconds_total': round(self.seconds_total, 6),
+            'last_run_at': self.last_run_at.isoformat() if self.last_run_at else None,
+            'last_rows': self.last_rows,
+            'last_seconds': round(self.last_seconds, 6) if self.last_seconds is not None else None,
+            'last_error': self.last_error
+        }
+
+class BackgroundScheduler:
+    def __init__(self):
+        self.app = None
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    def init_app(self, app):
+        from app.services import reap_expired_sessions, cleanup_expired_challenges, \
+            cleanup_expired_matches, update_tournament_status
+
+        self.stop()
+        self.app = app
+        self._jobs = {}
+
+        batch_size = app.config.get('SESSION_REAPER_BATCH_SIZE', 1000)
+        self.add_job('session_reaper',
+                     lambda: reap_expired_sessions(batch_size),
+                     app.config.get('SESSION_REAPER_INTERVAL_SECONDS', 300))
+
+        # Status sweeps; request handlers compute the current status themselves
+        # (see effective_status in models.py) and never write to tidy up
+        sweep_interval = app.config.get('EXPIRY_SWEEP_INTERVAL_SECONDS', 600)
+        self.add_job('challenge_expiry', cleanup_expired_challenges, sweep_interval)
+        self.add_job('match_expiry', cleanup_expired_matches, sweep_interval)
+        self.add_job('tournament_status', update_tournament_status, sweep_interval)
+
+        from app.divisions import roll_divisions
+        self.add_job('division_roll',
+                     lambda: roll_divisions(app.config.get('DIVISION_ROLL_BATCH_SIZE', 1000)),
+                     app.config.get('DIVISION_ROLL_INTERVAL_SECONDS', 3600))
+
+        from app.archive import archive_cold_rows
+        self.add_job('archive',
+                     lambda: sum(archive_cold_rows(app.config.get('ARCHIVE_AFTER_DAYS', 30),
+                                                   app.config.get('ARCHIVE_BATCH_SIZE', 1000))['rows_archived'].values()),
+                     app.config.get('ARCHIVE_INTERVAL_SECONDS', 86400))
+
+        if app.config.get('RATING_ENGINE') == 'glicko2':
+            from app.rating_engines import RATING_ENGINES
+            self.add_job('rating_period',
+                         lambda: RATING_ENGINES['glicko2'].close_period()['games'],
+                         app.config.get('RATING_PERIOD_HOURS', 24) * 3600)
+
+    def add_job(self, name, func, interval_seconds):
+        with self._lock:
+            self._jobs[name] = Job(name, func, interval_seconds)
+        self._wakeup.set()
+
+    def run_job(self, name):
+        """Run a job immediately in the calling thread. Returns the number of rows it touched."""
+        job = self._jobs[name]
+        start = time.perf_counter()
+        rows = 0
+        error = None
+        with self.app.app_context():
+            try:
+                rows = job.func() or 0
+            except Exception as e:
+                from models import db
+                db.session.rollback()
+                error = str(e)
+                logger.exception('Maintenance job %s failed', name)
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            job.runs += 1
+            job.rows_total += rows
+            job.seconds_total += elapsed
+            job.last_run_at = datetime.now()
+            job.last_rows = rows
+            job.last_seconds = elapsed
+            job.last_error = error
+            job.next_run = time.monotonic() + job.interval_seconds
+        return rows
+
+    def stats(self):
+        with self._lock:
+            return {name: job.stats() for name, job in self._jobs.items()}
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='maintenance-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while not self._stopping:
+            with self._lock:
+                due = sorted(self._jobs.values(), key=lambda job: job.next_run)
+            now = time.monotonic()
+            for job in due:
+                if job.next_run > now or self._stopping:
+                    break
+                self.run_job(job.name)
+
+            with self._lock:
+                next_run = min((job.next_run for job in self._jobs.values()), default=None)
+            timeout = None if next_run is None else max(0.0, next_run - time.monotonic())
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+
+scheduler = BackgroundScheduler()
@@ -0,0 +1,45 @@
+"""
+Row serializers for the read endpoints.
+
+Read endpoints select only the columns they return, as Core selects of plain
+row tuples (no ORM objects, identity map or unused columns such as password
+hashes), and turn each row into a dict with a serializer compiled once per
+response shape. row_serializer() generates the function from the row's column
+labels: each item is built by a single dict display indexing the tuple, with
+no per-row attribute lookups, keyword arguments or branches.
+"""
+from operator import attrgetter
+from datetime import datetime
+from app.divisions import current_age
+
+# Enum members are returned by their value
+enum_value = attrgetter('value')
+
+def current_age_now(age, registration_date):
+    """Player.get_current_age() from the two columns"""
+    return current_age(age, registration_date, datetime.now())
+
+def row_serializer(labels, **computed):
+    """
+    Compile fn(row) -> dict for rows whose columns are labelled labels, in
+    order. Each column becomes the key of the same name, except labels
+    starting with '_' (selected only as inputs). computed maps a key to
+    (function, label, ...): the key's value is function applied to those
+    columns, replacing a column of the same name.
+    """
+    index = {label: i for i, label in enumerate(labels)}
+    functions = {}
+    entries = []
+    for label in labels:
+        if not label.startswith('_') and label not in computed:
+            entries.append(f'{label!r}: row[{index[label]}]')
+    for key, (function, *inputs) in computed.items():
+        name = f'_f{len(functions)}'
+        functions[name] = function
+        entries.append(f'{key!r}: {name}({", ".join(f"row[{index[label]}]" for label in inputs)})')
+    source = f'def serialize(row):\n    return {{{", ".join(entries)}}}\n'
+    namespace = dict(functions)
+    exec(source, namespace)
+    serialize = namespace['serialize']
+    serialize.labels = tuple(labels)
+    return serialize
@@ -1,14 +1,26 @@
-﻿from models import db, Player, Challenge, Match, Tournament, ChallengeStatus, MatchStatus, TournamentStatus
+﻿from models import db, ELO_K_FACTOR, RATING_UPDATE_RETRIES, Player, AdminSession, PlayerSession, Challenge, Match, Tournament, ChallengeStatus, MatchStatus, TournamentStatus
 from datetime import datetime
+from sqlalchemy import select, update, delete
+from sqlalchemy.orm.attributes import set_committed_value
 
-def calculate_elo(winner, loser, k=32):
+def elo_change_for(winner_elo, loser_elo, k=ELO_K_FACTOR):
     """
-    Calculate and apply Elo rating changes based on match result.
-    Uses the standard Elo rating system (as used in Chess).
-    
+    Rating points transferred from loser to winner for a single result.
+
     Formula:
     - Expected score: E = 1 / (1 + 10^((opponent_rating - player_rating) / 400))
     - Rating change: ΔR = K × (actual_score - expected_score)
+    """
+    # Calculate winner's expected score (probability of winning)
+    expected_win = 1 / (1 + 10 ** ((loser_elo - winner_elo) / 400))
+    
+    # Calculate rating change for winner (actual_score = 1 for win)
+    return k * (1 - expected_win)
+
+def calculate_elo(winner, loser, k=ELO_K_FACTOR):
+    """
+    Calculate and apply Elo rating changes based on match result.
+    Uses the standard Elo rating system (as used in Chess), see elo_change_for().
     
     Args:
         winner: Player object who won the match
@@ -18,11 +30,7 @@ def calculate_elo(winner, loser, k=32):
     Returns:
         elo_change: The rating points transferred from loser to winner
     """
-    # Calculate winner's expected score (probability of winning)
-    expected_win = 1 / (1 + 10 ** ((loser.elo - winner.elo) / 400))
-    
-    # Calculate rating change for winner (actual_score = 1 for win)
-    elo_change = k * (1 - expected_win)
+    elo_change = elo_change_for(winner.elo, loser.elo, k)
     
     # Update ratings (zero-sum: winner gains what loser loses)
     winner.elo += elo_change
@@ -30,40 +38,128 @@ def calculate_elo(winner, loser, k=32):
     
     return elo_change
 
-def cleanup_expired_challenges():
-    expired_challenges = Challenge.query.filter(
-        Challenge.expires_at < datetime.now(),
-        Challenge.status == ChallengeStatus.PENDING
-    ).all()
-    for challenge in expired_challenges:
-        challenge.status = ChallengeStatus.EXPIRED
-    db.session.commit()
+class RatingConflictError(Exception):
+    """Raised when a rating update keeps losing to concurrent writers"""
+
+def _adjust_elo(player_id, delta, expected_version=None):
+    """
+    UPDATE one player's stored rating relative to its current value and bump
+    rating_version. With expected_version the row is only changed if nobody
+    else has rated the player since it was read. Returns (elo, rating_version)
+    as stored, or None if the version check failed.
+    """
+    players = Player.__table__
+    statement = update(players).where(players.c.id == player_id)
+    if expected_version is not None:
+        statement = statement.where(players.c.rating_version == expected_version)
+    # leaderboard_version is stamped when the write commits (see app/leaderboard.py)
+    statement = statement.values(elo=players.c.elo + delta, rating_version=players.c.rating_version + 1,
+                                 leaderboard_version=None) \
+        .returning(players.c.elo, players.c.rating_version)
+    return db.session.execute(statement).first()
+
+def apply_elo_result(winner, loser, k=ELO_K_FACTOR):
+    """
+    Apply a result to the stored ratings without losing concurrent updates.
+
+    The change is computed from the ratings as loaded and written with
+    version-guarded relative UPDATEs; if another worker rated either player in
+    between, the attempt is compensated and retried from freshly read ratings.
+    The Player objects get the stored values without being marked dirty, so a
+    later flush cannot overwrite a concurrent change. Returns the elo_change.
+    """
+    current = {player.id: player for player in (winner, loser)}
+    for _ in range(RATING_UPDATE_RETRIES):
+        elo_change = elo_change_for(current[winner.id].elo, current[loser.id].elo, k)
+
+        winner_row = _adjust_elo(winner.id, elo_change, current[winner.id].rating_version)
+        if winner_row is not None:
+            loser_row = _adjust_elo(loser.id, -elo_change, current[loser.id].rating_version)
+            if loser_row is not None:
+                break
+            _adjust_elo(winner.id, -elo_change)
+
+        current = {row.id: row for row in db.session.execute(
+            select(Player.id, Player.elo, Player.rating_version).where(Player.id.in_([winner.id, loser.id]))
+        )}
+    else:
+        raise RatingConflictError(f'Could not rate players {winner.id} and {loser.id} '
+                                  f'after {RATING_UPDATE_RETRIES} attempts')
 
-def cleanup_expired_matches():
-    expired_matches = Match.query.filter(
-        Match.expires_at != None,  # Only check matches with expiration
-        Match.expires_at < datetime.now(),
-        Match.status == MatchStatus.PENDING
-    ).all()
-    for match in expired_matches:
-        match.status = MatchStatus.EXPIRED
+    for player, row in ((winner, winner_row), (loser, loser_row)):
+        set_committed_value(player, 'elo', row.elo)
+        set_committed_value(player, 'rating_version', row.rating_version)
+    return elo_change
+
+def revert_elo_result(winner, loser, elo_change):
+    """Reverse a result with relative UPDATEs, which are atomic without a version check"""
+    for player, delta in ((winner, -elo_change), (loser, elo_change)):
+        row = _adjust_elo(player.id, delta)
+        set_committed_value(player, 'elo', row.elo)
+        set_committed_value(player, 'rating_version', row.rating_version)
+
+def cleanup_expired_challenges(now=None):
+    """Mark PENDING challenges past expires_at as EXPIRED in one UPDATE. Returns the number of rows changed."""
+    result = db.session.execute(
+        update(Challenge)
+        .where(Challenge.status == ChallengeStatus.PENDING, Challenge.expires_at < (now or datetime.now()))
+        .values(status=ChallengeStatus.EXPIRED),
+        execution_options={'synchronize_session': False}
+    )
     db.session.commit()
+    return result.rowcount
 
-def update_tournament_status():
-    # Start tournaments
-    tournaments_to_start = Tournament.query.filter(
-        Tournament.start_time <= datetime.now(),
-        Tournament.status == TournamentStatus.REGISTRATION_OPEN
-    ).all()
-    for tournament in tournaments_to_start:
-        tournament.status = TournamentStatus.ACTIVE
+def cleanup_expired_matches(now=None):
+    """Mark PENDING matches past expires_at as EXPIRED in one UPDATE. Returns the number of rows changed."""
+    result = db.session.execute(
+        update(Match)
+        .where(Match.status == MatchStatus.PENDING,
+               Match.expires_at != None,  # Only check matches with expiration
+               Match.expires_at < (now or datetime.now()))
+        .values(status=MatchStatus.EXPIRED),
+        execution_options={'synchronize_session': False}
+    )
+    db.session.commit()
+    return result.rowcount
 
-    # Expire tournaments
-    expired_tournaments = Tournament.query.filter(
-        Tournament.expires_at < datetime.now(),
-        Tournament.status == TournamentStatus.ACTIVE
-    ).all()
-    for tournament in expired_tournaments:
-        tournament.status = TournamentStatus.EXPIRED
+def update_tournament_status(now=None):
+    """Start and expire tournaments with one UPDATE each. Returns the number of rows changed."""
+    now = now or datetime.now()
+    started = db.session.execute(
+        update(Tournament)
+        .where(Tournament.status == TournamentStatus.REGISTRATION_OPEN, Tournament.start_time <= now)
+        .values(status=TournamentStatus.ACTIVE),
+        execution_options={'synchronize_session': False}
+    )
+    expired = db.session.execute(
+        update(Tournament)
+        .where(Tournament.status == TournamentStatus.ACTIVE, Tournament.expires_at < now)
+        .values(status=TournamentStatus.EXPIRED),
+        execution_options={'synchronize_session': False}
+    )
+    db.session.commit()
+    return started.rowcount + expired.rowcount
 
-    db.session.commit()
\ No newline at end of file
+def reap_expired_sessions(batch_size=1000):
+    """
+    Delete expired admin and player sessions in bounded batches.
+    Each batch is its own short transaction so logins are never blocked for
+    long; the expires_at index keeps each batch from scanning the table.
+    Returns the number of rows deleted.
+    """
+    now = datetime.now()
+    reaped = 0
+    for session_model in (AdminSession, PlayerSession):
+        while True:
+            expired_ids = select(session_model.id).where(
+                session_model.expires_at < now
+            ).limit(batch_size)
+            result = db.session.execute(
+                delete(session_model).where(session_model.id.in_(expired_ids)),
+                execution_options={'synchronize_session': False}
+            )
+            db.session.commit()
+            reaped += result.rowcount
+            if result.rowcount < batch_size:
+                break
+    return reaped
\ No newline at end of file
@@ -0,0 +1,66 @@
+"""
+SQLite connection tuning, selected per deployment with Config.SQLITE_PROFILE.
+
+A profile (see Config.SQLITE_PROFILES) is a set of PRAGMAs run on every new
+DBAPI connection plus connection pool options. PRAGMAs are per connection in
+SQLite (except journal_mode, which is stored in the database file), so they
+are applied from the engine's 'connect' event rather than once at startup.
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# Applied in this order; busy_timeout first so the journal_mode switch can wait for a lock
+PRAGMA_ORDER = ('busy_timeout', 'journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store')
+
+def _is_file_database(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+def get_profile(app):
+    """Return the selected profile dict, or None if the database is not SQLite"""
+    if make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name() != 'sqlite':
+        return None
+    name = app.config.get('SQLITE_PROFILE') or 'default'
+    profiles = app.config.get('SQLITE_PROFILES', {})
+    if name not in profiles:
+        raise ValueError(f'Unknown SQLITE_PROFILE {name!r}; choose one of: {", ".join(profiles)}')
+    return profiles[name]
+
+def configure_engine_options(app):
+    """Merge the profile's pool options into SQLALCHEMY_ENGINE_OPTIONS (call before db.init_app)"""
+    profile = get_profile(app)
+    # In-memory databases use a single shared connection; pool sizing does not apply
+    if not profile or not _is_file_database(app.config['SQLALCHEMY_DATABASE_URI']):
+        return
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    for key, value in profile.get('pool', {}).items():
+        options.setdefault(key, value)  # Explicit engine options win
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+def pragma_statements(profile):
+    pragmas = profile.get('pragmas', {})
+    unknown = set(pragmas) - set(PRAGMA_ORDER)
+    if unknown:
+        raise ValueError(f'Unsupported SQLite pragma(s): {", ".join(sorted(unknown))}')
+    return [f'PRAGMA {name} = {pragmas[name]}' for name in PRAGMA_ORDER if name in pragmas]
+
+def install_pragmas(app, engine):
+    """Run the profile's PRAGMAs on every new connection of engine"""
+    profile = get_profile(app)
+    statements = pragma_statements(profile) if profile else []
+    if not statements:
+        return
+
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    event.listen(engine, 'connect', set_pragmas)
+
+def current_pragmas(connection):
+    """Return {pragma: value} as seen by a connection, for diagnostics and tests"""
+    return {name: connection.exec_driver_sql(f'PRAGMA {name}').scalar() for name in PRAGMA_ORDER}
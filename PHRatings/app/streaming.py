@@ -0,0 +1,123 @@
+"""
+Streaming responses.
+
+Large responses are encoded row by row into a chunked response instead of
+building the whole list of dicts and the whole JSON string first. Rows come
+from the database in chunks of STREAM_CHUNK_ROWS (yield_per, so SQLAlchemy
+fetches with fetchmany() and never holds the full result), and each chunk is
+encoded and written before the next one is fetched, so memory stays flat
+whatever the size of the result.
+
+The body is encoded in the format chosen by content negotiation (see
+app/negotiation.py). The JSON array output is byte-for-byte what jsonify()
+produces for the same list in production (compact, sorted keys, trailing
+newline). Debug mode's indented output is not reproduced.
+
+When the client accepts gzip or deflate, chunks are encoded up to
+COMPRESSION_MIN_BYTES before the response starts: a body that ends below it is
+sent as is, a longer one is compressed on the fly, each chunk flushed so the
+client can decode as it arrives.
+
+A streamed response keeps its read transaction open until the last byte is
+sent; in WAL mode that only delays checkpoints, it never blocks writers.
+"""
+from flask import current_app, stream_with_context
+from models import db
+from app.negotiation import FORMATS, msgpack, response_format, content_coding
+from itertools import islice, chain
+import zlib
+
+# zlib wbits for each content coding: gzip wrapper, zlib (RFC 1950) wrapper
+_WBITS = {'gzip': 31, 'deflate': 15}
+
+def iter_rows(statement):
+    """Execute a Core select and yield its rows, fetched STREAM_CHUNK_ROWS at a time"""
+    chunk = current_app.config['STREAM_CHUNK_ROWS']
+    yield from db.session.execute(statement.execution_options(yield_per=chunk))
+
+def _batches(items, size):
+    items = iter(items)
+    while batch := list(islice(items, size)):
+        yield batch
+
+def _json_chunks(batches, dumps):
+    yield '['
+    separator = ''
+    for batch in batches:
+        yield separator + ','.join(dumps(item) for item in batch)
+        separator = ','
+    yield ']\n'
+
+def _ndjson_chunks(batches, dumps):
+    for batch in batches:
+        yield ''.join(dumps(item) + '\n' for item in batch)
+
+def _columns_chunks(batches, dumps):
+    """{"columns": [keys of the first item, sorted], "rows": [[values in column order], ...]}"""
+    columns = None
+    for batch in batches:
+        if columns is None:
+            columns = sorted(batch[0])
+            yield '{"columns":' + dumps(columns) + ',"rows":['
+            separator = ''
+        yield separator + ','.join(dumps([item[column] for column in columns]) for item in batch)
+        separator = ','
+    if columns is None:
+        yield '{"columns":[],"rows":['
+    yield ']}\n'
+
+def _msgpack_chunks(batches, dumps):
+    """The column names, then one array of values per row, as consecutive MessagePack values"""
+    packer = msgpack.Packer(default=current_app.json.default)
+    columns = None
+    for batch in batches:
+        if columns is None:
+            columns = sorted(batch[0])
+            yield packer.pack(columns)
+        yield b''.join(packer.pack([item[column] for column in columns]) for item in batch)
+    if columns is None:
+        yield packer.pack([])
+
+_ENCODERS = {'json': _json_chunks, 'ndjson': _ndjson_chunks, 'columns': _columns_chunks, 'msgpack': _msgpack_chunks}
+
+def encode_chunks(items, fmt='json'):
+    """Yield the encoding of the list of items in fmt, one string (bytes) per STREAM_CHUNK_ROWS items"""
+    json_dumps = current_app.json.dumps
+    def dumps(value):
+        return json_dumps(value, separators=(',', ':'))
+    yield from _ENCODERS[fmt](_batches(items, current_app.config['STREAM_CHUNK_ROWS']), dumps)
+
+def _compressed(chunks, coding):
+    compressor = zlib.compressobj(current_app.config['COMPRESSION_LEVEL'], zlib.DEFLATED, _WBITS[coding])
+    for chunk in chunks:
+        if chunk:
+            yield compressor.compress(chunk.encode() if isinstance(chunk, str) else chunk) + \
+                compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+def streamed_response(items, fmt=None):
+    """
+    A response encoding items lazily, inside the request context, in fmt (by
+    default the negotiated format) and compressed if the client accepts it
+    """
+    fmt = fmt or response_format()
+    mimetype = current_app.json.mimetype if fmt == 'json' else FORMATS[fmt]
+    chunks = encode_chunks(items, fmt)
+    coding = content_coding()
+    if coding is None:
+        return current_app.response_class(stream_with_context(chunks), mimetype=mimetype)
+
+    head, size = [], 0
+    for chunk in chunks:
+        head.append(chunk)
+        size += len(chunk)
+        if size >= current_app.config['COMPRESSION_MIN_BYTES']:
+            break
+    else:
+        # Too small to be worth compressing: send what was encoded
+        return current_app.response_class(head, mimetype=mimetype)
+
+    response = current_app.response_class(stream_with_context(_compressed(chain(head, chunks), coding)),
+                                          mimetype=mimetype)
+    response.content_encoding = coding
+    return response
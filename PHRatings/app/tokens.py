@@ -0,0 +1,173 @@
+"""
+Stateless signed session tokens.
+
+A signed token carries the user type, user id, expiry and a random token id,
+and is authenticated with an HMAC-SHA256 over Config.SECRET_KEY, so it can be
+verified without touching the database. Revoked tokens (logout) are recorded
+by token id in a small deny-list that is kept in memory and persisted to disk;
+entries are pruned once the token they revoke has expired anyway.
+"""
+from flask import current_app
+from contextlib import contextmanager
+from datetime import datetime
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+TOKEN_PREFIX = 'v1'
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+def _b64decode(data):
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+def _sign(secret_key, message):
+    return hmac.new(secret_key.encode(), message.encode('ascii'), hashlib.sha256).digest()
+
+def issue_token(user_type, user_id, expires_at, secret_key=None):
+    """Create a signed token for the given user that is valid until expires_at"""
+    secret_key = secret_key or current_app.config['SECRET_KEY']
+    payload = f'{user_type}:{user_id}:{int(expires_at.timestamp())}:{secrets.token_urlsafe(12)}'
+    message = f'{TOKEN_PREFIX}.{_b64encode(payload.encode())}'
+    return f'{message}.{_b64encode(_sign(secret_key, message))}'
+
+def verify_token(token, secret_key=None):
+    """
+    Verify a signed token.
+    Returns (user_type, user_id, expires_at, token_id), or None if the token is
+    malformed, has a bad signature or has expired. Does not consult the deny-list.
+    """
+    secret_key = secret_key or current_app.config['SECRET_KEY']
+    try:
+        prefix, payload, signature = token.split('.')
+        if prefix != TOKEN_PREFIX:
+            return None
+        if not hmac.compare_digest(_sign(secret_key, f'{prefix}.{payload}'), _b64decode(signature)):
+            return None
+        user_type, user_id, expires_ts, token_id = _b64decode(payload).decode().split(':')
+        expires_at = datetime.fromtimestamp(int(expires_ts))
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+    if user_type not in ('admin', 'player') or expires_at < datetime.now():
+        return None
+    return user_type, int(user_id), expires_at, token_id
+
+@contextmanager
+def _file_lock(path):
+    """Hold an exclusive lock on path (created if missing), shared by every process"""
+    with open(path, 'a+') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+class TokenDenyList:
+    """
+    Set of revoked token ids, each kept until the token would have expired.
+    Persisted as JSON so revocations survive restarts and are seen by other
+    worker processes, which reload the file when its mtime changes. Adding
+    re-reads and rewrites the file under a lock on a sibling .lock file, so
+    concurrent logouts in several processes never drop each other's entries.
+    """
+
+    def __init__(self, path=None, reload_interval=1.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._entries = {}
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.path = app.config.get('TOKEN_DENYLIST_PATH')
+        with self._lock:
+            self._entries = {}
+            self._mtime = None
+            self._load()
+
+    def _load(self):
+        """Reload entries from disk if the file changed (caller holds the lock)"""
+        self._checked_at = time.monotonic()
+        if not self.path:
+            return
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(self.path) as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return
+        self._entries.update({token_id: float(expires_ts) for token_id, expires_ts in stored.items()})
+        self._mtime = mtime
+
+    def _save(self):
+        """Write unexpired entries to disk atomically (caller holds the lock)"""
+        now = time.time()
+        self._entries = {token_id: expires_ts for token_id, expires_ts in self._entries.items() if expires_ts > now}
+        if not self.path:
+            return
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self.path)
+        self._mtime = os.stat(self.path).st_mtime_ns
+
+    def add(self, token_id, expires_at):
+        with self._lock:
+            if not self.path:
+                self._entries[token_id] = expires_at.timestamp()
+                self._save()
+                return
+            with _file_lock(f'{self.path}.lock'):
+                self._mtime = None
+                self._load()
+                self._entries[token_id] = expires_at.timestamp()
+                self._save()
+
+    def __contains__(self, token_id):
+        with self._lock:
+            if time.monotonic() - self._checked_at > self.reload_interval:
+                self._load()
+            return token_id in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+deny_list = TokenDenyList()
+
+def is_revoked(token_id):
+    return token_id in deny_list
+
+def revoke_token(token):
+    """Add a signed token to the deny-list. Returns False if the token is not valid."""
+    verified = verify_token(token)
+    if not verified:
+        return False
+    deny_list.add(verified[3], verified[2])
+    return True
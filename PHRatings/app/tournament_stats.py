@@ -0,0 +1,106 @@
+"""
+Per-tournament summary counters.
+
+Tournament.participant_count, matches_recorded, last_result_at and leader_id
+(the participant with the most wins, earliest joined on ties) and
+TournamentParticipant.wins are kept up to date by relative UPDATEs in the same
+transaction as join, leave, record-match and undo, so listings never count
+rows. repair_tournament_stats() recomputes everything from the participant and
+match tables.
+"""
+from models import db, Tournament, TournamentParticipant, Match, MatchStatus
+from sqlalchemy import select, update, func
+
+def _leader(tournament_id):
+    """Scalar subquery for the participant with the most wins in a tournament (NULL without wins)"""
+    return (select(TournamentParticipant.player_id)
+            .where(TournamentParticipant.tournament_id == tournament_id, TournamentParticipant.wins > 0)
+            .order_by(TournamentParticipant.wins.desc(), TournamentParticipant.id)
+            .limit(1).scalar_subquery())
+
+def _update_tournament(tournament_id, **values):
+    db.session.execute(
+        update(Tournament).where(Tournament.id == tournament_id).values(**values),
+        execution_options={'synchronize_session': False}
+    )
+
+def participant_joined(tournament_id):
+    """Count a new participant (caller commits)"""
+    _update_tournament(tournament_id, participant_count=Tournament.participant_count + 1)
+
+def participant_left(participant):
+    """Uncount a participant that is being deleted (caller commits)"""
+    values = {'participant_count': Tournament.participant_count - 1}
+    if participant.wins:
+        db.session.flush()
+        values['leader_id'] = _leader(participant.tournament_id)
+    _update_tournament(participant.tournament_id, **values)
+
+def _add_win(match, delta):
+    db.session.execute(
+        update(TournamentParticipant)
+        .where(TournamentParticipant.tournament_id == match.tournament_id,
+               TournamentParticipant.player_id == match.winner_id)
+        .values(wins=TournamentParticipant.wins + delta),
+        execution_options={'synchronize_session': False}
+    )
+
+def result_recorded(match):
+    """Count a completed tournament match (caller commits)"""
+    _add_win(match, 1)
+    _update_tournament(match.tournament_id,
+                       matches_recorded=Tournament.matches_recorded + 1,
+                       last_result_at=match.completed_at,
+                       leader_id=_leader(match.tournament_id))
+
+def result_undone(match):
+    """Uncount a tournament match whose status has just been set to UNDONE (caller commits)"""
+    db.session.flush()
+    _add_win(match, -1)
+    _update_tournament(match.tournament_id,
+                       matches_recorded=Tournament.matches_recorded - 1,
+                       last_result_at=_last_result(match.tournament_id),
+                       leader_id=_leader(match.tournament_id))
+
+def _last_result(tournament_id):
+    return (select(func.max(Match.completed_at))
+            .where(Match.tournament_id == tournament_id, Match.status == MatchStatus.COMPLETED)
+            .scalar_subquery())
+
+def _completed_matches(tournament_id):
+    return (select(func.count(Match.id))
+            .where(Match.tournament_id == tournament_id, Match.status == MatchStatus.COMPLETED)
+            .scalar_subquery())
+
+def _summaries(connection):
+    return set(connection.execute(select(
+        Tournament.id, Tournament.participant_count, Tournament.matches_recorded,
+        Tournament.last_result_at, Tournament.leader_id
+    )).all())
+
+def repair_tournament_stats(connection=None):
+    """
+    Recompute every tournament's counters and every participant's wins from
+    scratch (caller commits). Returns the number of tournaments whose stored
+    summary was wrong.
+    """
+    connection = connection or db.session.connection()
+    before = _summaries(connection)
+
+    connection.execute(update(TournamentParticipant).values(wins=(
+        select(func.count(Match.id))
+        .where(Match.tournament_id == TournamentParticipant.tournament_id,
+               Match.winner_id == TournamentParticipant.player_id,
+               Match.status == MatchStatus.COMPLETED)
+        .scalar_subquery()
+    )))
+    connection.execute(update(Tournament).values(
+        participant_count=(select(func.count(TournamentParticipant.id))
+                           .where(TournamentParticipant.tournament_id == Tournament.id)
+                           .scalar_subquery()),
+        matches_recorded=_completed_matches(Tournament.id),
+        last_result_at=_last_result(Tournament.id),
+        leader_id=_leader(Tournament.id)
+    ))
+
+    return len(_summaries(connection) - before)
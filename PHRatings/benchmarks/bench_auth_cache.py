@@ -0,0 +1,70 @@
+"""Benchmark authenticated request latency with the session cache on and off"""
+import sys
+import os
+import tempfile
+import time
+
+# Add the parent directory to the Python path so we can import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from config import Config
+from models import db, Admin, Player, PlayerStatus
+
+REQUESTS = 2000
+
+def make_config(db_path, cache_enabled):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+        AUTH_CACHE_ENABLED = cache_enabled
+    return BenchConfig
+
+def seed(app):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        admin = Admin(username='bench-admin')
+        admin.set_password('bench')
+        db.session.add(admin)
+        for i in range(50):
+            player = Player(name=f'bench-player-{i}', age=30, weight=80.0,
+                            password_hash='', status=PlayerStatus.APPROVED)
+            player.set_password('bench')
+            db.session.add(player)
+        db.session.commit()
+
+def run(db_path, cache_enabled):
+    app = create_app(make_config(db_path, cache_enabled))
+    seed(app)
+    client = app.test_client()
+
+    player_token = client.post('/player/login', json={'name': 'bench-player-0', 'password': 'bench'}).json['token']
+    admin_token = client.post('/admin/login', json={'username': 'bench-admin', 'password': 'bench'}).json['token']
+
+    results = {}
+    cases = [
+        ('player PUT /players/weight', 'put', '/players/weight', player_token, {'weight': 80.0}),
+        ('admin GET /admin/players/pending', 'get', '/admin/players/pending', admin_token, None),
+    ]
+    for label, method, url, token, body in cases:
+        headers = {'Authorization': f'Bearer {token}'}
+        send = getattr(client, method)
+        send(url, headers=headers, json=body)  # warm up
+        start = time.perf_counter()
+        for _ in range(REQUESTS):
+            send(url, headers=headers, json=body)
+        results[label] = (time.perf_counter() - start) / REQUESTS * 1e6
+    return results
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        off = run(db_path, cache_enabled=False)
+        on = run(db_path, cache_enabled=True)
+
+    print(f"{'request':40} {'cache off (us)':>15} {'cache on (us)':>15} {'speedup':>8}")
+    for label in off:
+        print(f"{label:40} {off[label]:15.1f} {on[label]:15.1f} {off[label] / on[label]:7.2f}x")
+
+if __name__ == '__main__':
+    main()
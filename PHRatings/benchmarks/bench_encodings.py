@@ -0,0 +1,94 @@
+"""
+Benchmark payload size, encode time and client decode time of 100k GET /matches
+items in each negotiated format, uncompressed and gzip-compressed
+"""
+import sys
+import os
+import json
+import tempfile
+import time
+import zlib
+from datetime import datetime
+
+# Add the parent directory to the Python path so we can import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import msgpack
+import numpy as np
+from sqlalchemy import select
+from app import create_app
+from app.negotiation import FORMATS
+from app.routes import match_listing, match_columns
+from app.streaming import encode_chunks, _compressed
+from config import Config
+from models import db, Player, PlayerStatus, Match, MatchStatus
+
+MATCHES = 100_000
+PLAYERS = 1_000
+
+def seed(rng):
+    db.session.execute(db.insert(Player), [
+        {'name': f'p{i}', 'password_hash': '', 'age': 30, 'weight': 80.0,
+         'elo': 1200.0, 'status': PlayerStatus.APPROVED} for i in range(PLAYERS)
+    ])
+    p1 = rng.integers(1, PLAYERS + 1, size=MATCHES)
+    p2 = (p1 + rng.integers(1, PLAYERS - 1, size=MATCHES) - 1) % PLAYERS + 1
+    completed_at = datetime(2020, 1, 1)
+    db.session.execute(db.insert(Match), [
+        {'player1_id': a, 'player2_id': b, 'winner_id': a, 'host_id': (b % PLAYERS) + 1,
+         'status': MatchStatus.COMPLETED, 'completed_at': completed_at, 'notes': f'result {i}'}
+        for i, (a, b) in enumerate(zip(p1.tolist(), p2.tolist()))
+    ])
+    db.session.commit()
+
+def decode(fmt, body):
+    if fmt == 'json':
+        return json.loads(body)
+    if fmt == 'ndjson':
+        return [json.loads(line) for line in body.splitlines()]
+    if fmt == 'columns':
+        table = json.loads(body)
+        return [dict(zip(table['columns'], row)) for row in table['rows']]
+    unpacker = msgpack.Unpacker(raw=False)
+    unpacker.feed(body)
+    columns = next(unpacker)
+    return [dict(zip(columns, row)) for row in unpacker]
+
+def to_bytes(chunks):
+    return b''.join(chunk.encode() if isinstance(chunk, str) else chunk for chunk in chunks)
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+            SCHEDULER_ENABLED = False
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            db.create_all()
+            seed(np.random.default_rng(1))
+
+        with app.test_request_context():
+            items = [match_listing(row) for row in db.session.execute(select(*match_columns()))]
+
+            print(f'{MATCHES} matches')
+            print(f'  {"format":<8} {"bytes":>12} {"encode":>9} {"decode":>9} {"gzip bytes":>12} {"gzip encode":>12}')
+            for fmt in FORMATS:
+                start = time.perf_counter()
+                body = to_bytes(encode_chunks(items, fmt))
+                encode_ms = (time.perf_counter() - start) * 1000
+
+                start = time.perf_counter()
+                assert len(decode(fmt, body)) == MATCHES
+                decode_ms = (time.perf_counter() - start) * 1000
+
+                start = time.perf_counter()
+                compressed = b''.join(_compressed(encode_chunks(items, fmt), 'gzip'))
+                gzip_ms = (time.perf_counter() - start) * 1000
+                assert zlib.decompress(compressed, 31) == body
+
+                print(f'  {fmt:<8} {len(body):>12,} {encode_ms:>7.0f}ms {decode_ms:>7.0f}ms '
+                      f'{len(compressed):>12,} {gzip_ms:>10.0f}ms')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark a Glicko-2 rating period of 1M games between 100k players (engine only, and end to end from SQLite)"""
+import sys
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Add the parent directory to the Python path so we can import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from app import create_app
+from app.rating_engines import glicko2_rate_period, RATING_ENGINES
+from config import Config
+from models import db, Player, Match, MatchStatus, PlayerStatus
+
+GAMES = 1_000_000
+PLAYERS = 100_000
+
+def synthetic_results(rng):
+    winners = rng.integers(0, PLAYERS, size=GAMES)
+    losers = (winners + rng.integers(1, PLAYERS, size=GAMES)) % PLAYERS
+    return winners, losers
+
+def bench_engine(winners, losers, rng):
+    ratings = rng.normal(1500, 200, size=PLAYERS)
+    deviations = rng.uniform(50, 350, size=PLAYERS)
+    volatilities = np.full(PLAYERS, 0.06)
+
+    start = time.perf_counter()
+    glicko2_rate_period(ratings, deviations, volatilities, winners, losers)
+    print(f'engine, one vectorized rating period: {time.perf_counter() - start:.2f}s')
+
+def bench_database(winners, losers):
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+            RATING_ENGINE = 'glicko2'
+            SCHEDULER_ENABLED = False
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            db.create_all()
+            db.session.execute(db.insert(Player), [
+                {'name': f'p{i}', 'password_hash': '', 'age': 30, 'weight': 80.0,
+                 'elo': 1500.0, 'status': PlayerStatus.APPROVED} for i in range(PLAYERS)
+            ])
+            start_time = datetime(2020, 1, 1)
+            db.session.execute(db.insert(Match), [
+                {'player1_id': int(w) + 1, 'player2_id': int(l) + 1, 'winner_id': int(w) + 1,
+                 'host_id': 1, 'status': MatchStatus.COMPLETED, 'elo_change': 0.0,
+                 'completed_at': start_time + timedelta(seconds=i)}
+                for i, (w, l) in enumerate(zip(winners.tolist(), losers.tolist()))
+            ])
+            db.session.commit()
+
+            start = time.perf_counter()
+            summary = RATING_ENGINES['glicko2'].close_period()
+            print(f"end to end (load + rate + write back): {time.perf_counter() - start:.2f}s, "
+                  f"{summary['games']} games, {summary['players_rated']} players rated")
+
+def main():
+    print(f'{GAMES} games between {PLAYERS} players')
+    rng = np.random.default_rng(1)
+    winners, losers = synthetic_results(rng)
+    bench_engine(winners, losers, rng)
+    bench_database(winners, losers)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Benchmark bulk import of 100k historical matches from CSV (target: under a minute)"""
+import sys
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Add the parent directory to the Python path so we can import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from app import create_app
+from app.importer import import_matches
+from app.replay import verify_ratings
+from config import Config
+from models import db, Player, PlayerStatus
+
+MATCHES = 100_000
+PLAYERS = 2_000
+
+def synthetic_csv(rng):
+    p1 = rng.integers(0, PLAYERS, size=MATCHES)
+    p2 = (p1 + rng.integers(1, PLAYERS - 1, size=MATCHES)) % PLAYERS
+    host = (p2 + 1) % PLAYERS
+    host = np.where(host == p1, (host + 1) % PLAYERS, host)
+    winners = np.where(rng.random(MATCHES) < 0.5, p1, p2)
+    start = datetime(2015, 1, 1)
+    lines = ['player1,player2,winner,timestamp,host,notes']
+    for i, (a, b, w, h) in enumerate(zip(p1.tolist(), p2.tolist(), winners.tolist(), host.tolist())):
+        timestamp = (start + timedelta(minutes=30 * i)).isoformat()
+        lines.append(f'p{a},p{b},p{w},{timestamp},p{h},paper result {i}')
+    return '\n'.join(lines) + '\n'
+
+def main():
+    text = synthetic_csv(np.random.default_rng(1))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+            SCHEDULER_ENABLED = False
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            db.create_all()
+            db.session.execute(db.insert(Player), [
+                {'name': f'p{i}', 'password_hash': '', 'age': 30, 'weight': 80.0,
+                 'elo': 1200.0, 'status': PlayerStatus.APPROVED} for i in range(PLAYERS)
+            ])
+            db.session.commit()
+
+            start = time.perf_counter()
+            report, errors = import_matches(text, 'csv')
+            elapsed = time.perf_counter() - start
+            assert not errors, errors[:5]
+
+            print(f"imported {report['imported']} matches for {report['players_updated']} players "
+                  f"in {elapsed:.2f}s ({report['imported'] / elapsed:.0f} matches/s)")
+            print(f"replay check: {verify_ratings()['divergent_player_count']} divergent players")
+
+if __name__ == '__main__':
+    main()
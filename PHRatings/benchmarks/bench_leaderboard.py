@@ -0,0 +1,69 @@
+"""Benchmark rank lookups among 100k players: the in-memory leaderboard vs loading and sorting every player"""
+import sys
+import os
+import tempfile
+import time
+
+# Add the parent directory to the Python path so we can import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from app import create_app
+from app.leaderboard import leaderboard
+from config import Config
+from models import db, Player, PlayerStatus
+
+PLAYERS = 100_000
+LOOKUPS = 1_000
+
+def sorted_rank(player_id):
+    """What a rank query cost before the leaderboard"""
+    players = sorted(Player.query.filter_by(status=PlayerStatus.APPROVED).all(), key=lambda p: (-p.elo, p.id))
+    elo = next(p.elo for p in players if p.id == player_id)
+    return 1 + sum(1 for p in players if p.elo > elo)
+
+def main():
+    rng = np.random.default_rng(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+            SCHEDULER_ENABLED = False
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            db.create_all()
+            ratings = rng.normal(1500, 300, size=PLAYERS).round(2)
+            db.session.execute(db.insert(Player), [
+                {'name': f'p{i}', 'password_hash': '', 'age': 30, 'weight': 80.0,
+                 'elo': float(elo), 'status': PlayerStatus.APPROVED} for i, elo in enumerate(ratings)
+            ])
+            db.session.commit()
+
+            print(f'{PLAYERS} approved players')
+            start = time.perf_counter()
+            leaderboard.rebuild()
+            print(f'  seed leaderboard:        {(time.perf_counter() - start) * 1000:8.1f} ms')
+
+            ids = rng.integers(1, PLAYERS + 1, size=LOOKUPS).tolist()
+            start = time.perf_counter()
+            for player_id in ids:
+                leaderboard.rank(player_id)
+            print(f'  rank, leaderboard:       {(time.perf_counter() - start) / LOOKUPS * 1000:8.3f} ms')
+
+            start = time.perf_counter()
+            for player_id in ids[:5]:
+                assert sorted_rank(player_id) == leaderboard.rank(player_id)[0]
+            print(f'  rank, load and sort:     {(time.perf_counter() - start) / 5 * 1000:8.1f} ms')
+
+            start = time.perf_counter()
+            for player_id in ids:
+                leaderboard.around(player_id, 10)
+            print(f'  21 players around one:   {(time.perf_counter() - start) / LOOKUPS * 1000:8.3f} ms')
+
+            start = time.perf_counter()
+            report = leaderboard.verify()
+            assert report['consistent']
+            print(f'  verify against SQL:      {(time.perf_counter() - start) * 1000:8.1f} ms')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark GET /tournaments/<id>/matchup-matrix for a 500-player tournament (cold, cached, and pairwise baseline)"""
+import sys
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Add the parent directory to the Python path so we can import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from app import create_app
+from app.matchups import matchup_cache
+from app.services import elo_change_for
+from config import Config
+from models import db, Player, PlayerStatus, Tournament, TournamentParticipant
+
+PLAYERS = 500
+REQUESTS = 50
+
+def timed_get(client, url, clear_cache):
+    times = []
+    for _ in range(REQUESTS):
+        if clear_cache:
+            matchup_cache.clear()
+        start = time.perf_counter()
+        response = client.get(url)
+        times.append(time.perf_counter() - start)
+        assert response.status_code == 200
+    return np.median(times) * 1000, len(response.data)
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+            SCHEDULER_ENABLED = False
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            db.create_all()
+            rng = np.random.default_rng(1)
+            db.session.execute(db.insert(Player), [
+                {'name': f'p{i}', 'password_hash': '', 'age': 30, 'weight': 80.0,
+                 'elo': float(elo), 'status': PlayerStatus.APPROVED}
+                for i, elo in enumerate(rng.normal(1200, 150, size=PLAYERS))
+            ])
+            tournament = Tournament(name='bench', host_id=1, start_time=datetime.now() + timedelta(hours=1))
+            db.session.add(tournament)
+            db.session.flush()
+            db.session.execute(db.insert(TournamentParticipant), [
+                {'tournament_id': tournament.id, 'player_id': i + 1} for i in range(PLAYERS)
+            ])
+            db.session.commit()
+            url = f'/tournaments/{tournament.id}/matchup-matrix'
+
+            elos = [player.elo for player in Player.query.all()]
+            start = time.perf_counter()
+            [[1 - elo_change_for(a, b, 1) for b in elos] for a in elos]
+            pairwise = (time.perf_counter() - start) * 1000
+
+            client = app.test_client()
+            cold, size = timed_get(client, url, clear_cache=True)
+            cached, _ = timed_get(client, url, clear_cache=False)
+
+        print(f'{PLAYERS} participants, response {size / 1024:.0f} KiB')
+        print(f'pairwise python formula (matrix only): {pairwise:.1f}ms')
+        print(f'endpoint, cold cache:                  {cold:.1f}ms')
+        print(f'endpoint, cached:                      {cached:.1f}ms')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark GET /matches pages at the start and 10,000 pages deep into 1M matches"""
+import sys
+import os
+import tempfile
+import time
+from datetime import datetime
+
+# Add the parent directory to the Python path so we can import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from app import create_app
+from app.pagination import Position, encode_cursor
+from config import Config
+from models import db, Player, PlayerStatus, Match, MatchStatus
+
+MATCHES = 1_000_000
+PLAYERS = 1_000
+PAGE = 100
+REQUESTS = 50
+
+def seed(rng):
+    db.session.execute(db.insert(Player), [
+        {'name': f'p{i}', 'password_hash': '', 'age': 30, 'weight': 80.0,
+         'elo': 1200.0, 'status': PlayerStatus.APPROVED} for i in range(PLAYERS)
+    ])
+    p1 = rng.integers(1, PLAYERS + 1, size=MATCHES)
+    p2 = (p1 + rng.integers(1, PLAYERS - 1, size=MATCHES) - 1) % PLAYERS + 1
+    completed_at = datetime(2020, 1, 1)
+    rows = [{'player1_id': a, 'player2_id': b, 'winner_id': a, 'host_id': (b % PLAYERS) + 1,
+             'status': MatchStatus.COMPLETED, 'completed_at': completed_at}
+            for a, b in zip(p1.tolist(), p2.tolist())]
+    for start in range(0, MATCHES, 100_000):
+        db.session.execute(db.insert(Match), rows[start:start + 100_000])
+    db.session.commit()
+
+def time_page(client, url):
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        response = client.get(url)
+        assert response.status_code == 200 and len(response.json) == PAGE, response.status_code
+    return (time.perf_counter() - start) / REQUESTS * 1000
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+            SCHEDULER_ENABLED = False
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            db.create_all()
+            seed(np.random.default_rng(1))
+
+        client = app.test_client()
+        deep = encode_cursor('matches', Position(False, PAGE * 9_999))
+        print(f'{MATCHES} matches, {PAGE} rows per page, mean of {REQUESTS} requests')
+        print(f'  all matches, page 1:            {time_page(client, f"/matches?limit={PAGE}"):.2f} ms')
+        print(f'  all matches, page 10,000:       {time_page(client, f"/matches?limit={PAGE}&cursor={deep}"):.2f} ms')
+
+        # Player 1 has about 2,000 matches: compare the first page with one near the end
+        with app.app_context():
+            ids = db.session.execute(db.select(Match.id).where(
+                (Match.player1_id == 1) | (Match.player2_id == 1)).order_by(Match.id)).scalars().all()
+        late = encode_cursor('matches', Position(False, ids[-PAGE - 1]))
+        print(f'  player_id=1 ({len(ids)} matches), first page: '
+              f'{time_page(client, f"/matches?player_id=1&limit={PAGE}"):.2f} ms')
+        print(f'  player_id=1, last page:         '
+              f'{time_page(client, f"/matches?player_id=1&limit={PAGE}&cursor={late}"):.2f} ms')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+Benchmark the per-row cost of the listing read path on 100k-row tables:
+ORM objects + dicts built attribute by attribute (before) vs column-projected
+Core selects + compiled serializers (after). Reports time per row and the
+memory allocated per row while a page's items are built (tracemalloc peak).
+"""
+import sys
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+# Add the parent directory to the Python path so we can import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from sqlalchemy import select
+from app import create_app
+from app.routes import match_listing, match_columns, player_listing, player_columns, \
+    challenge_listing, CHALLENGE_FIELDS, tournament_listing, TOURNAMENT_FIELDS, listing_columns
+from config import Config
+from models import db, Player, PlayerStats, PlayerStatus, Match, MatchStatus, Challenge, ChallengeStatus, \
+    Tournament, TournamentStatus
+
+ROWS = 100_000
+REPEATS = 3
+
+def seed(rng):
+    now = datetime(2024, 1, 1)
+    db.session.execute(db.insert(Player), [
+        {'name': f'p{i}', 'password_hash': 'x' * 64, 'age': 30, 'weight': 80.0 + i % 50, 'division': 'open/open',
+         'elo': 1200.0 + i % 400, 'status': PlayerStatus.APPROVED, 'registration_date': now} for i in range(ROWS)
+    ])
+    db.session.execute(db.insert(PlayerStats), [
+        {'player_id': i + 1, 'games_played': 10, 'wins': 5, 'losses': 5, 'peak_elo': 1300.0, 'last_played_at': now}
+        for i in range(0, ROWS, 2)
+    ])
+    p1 = rng.integers(1, ROWS + 1, size=ROWS).tolist()
+    p2 = rng.integers(1, ROWS + 1, size=ROWS).tolist()
+    db.session.execute(db.insert(Match), [
+        {'player1_id': a, 'player2_id': b, 'winner_id': a, 'host_id': b, 'status': MatchStatus.COMPLETED,
+         'created_at': now, 'completed_at': now, 'notes': 'a long note about the match ' * 4}
+        for a, b in zip(p1, p2)
+    ])
+    db.session.execute(db.insert(Challenge), [
+        {'challenger_id': a, 'challenged_id': b, 'host_id': b, 'status': ChallengeStatus.PENDING,
+         'created_at': now, 'expires_at': now + timedelta(days=1)} for a, b in zip(p1, p2)
+    ])
+    db.session.execute(db.insert(Tournament), [
+        {'name': f't{i}', 'host_id': p1[i], 'start_time': now, 'status': TournamentStatus.REGISTRATION_OPEN,
+         'expires_at': now + timedelta(days=1)} for i in range(ROWS)
+    ])
+    db.session.commit()
+
+# The read path as it was: ORM objects, dicts built attribute by attribute
+def before_players():
+    return [{
+        'id': p.id, 'name': p.name, 'elo': p.elo, 'age': p.age, 'current_age': p.get_current_age(),
+        'weight': p.weight, 'division': p.division, 'status': p.status.value,
+        'games_played': s.games_played if s else 0, 'wins': s.wins if s else 0, 'losses': s.losses if s else 0,
+        'peak_elo': s.peak_elo if s else None, 'last_played_at': s.last_played_at if s else None
+    } for p, s in db.session.query(Player, PlayerStats).outerjoin(PlayerStats, PlayerStats.player_id == Player.id)
+        .order_by(Player.id).all()]
+
+def before_matches():
+    return [{
+        'id': m.id, 'player1_id': m.player1_id, 'player2_id': m.player2_id, 'winner_id': m.winner_id,
+        'host_id': m.host_id, 'tournament_id': m.tournament_id, 'challenge_id': m.challenge_id,
+        'status': m.effective_status.value, 'created_at': m.created_at, 'completed_at': m.completed_at,
+        'notes': m.notes, 'video_link': m.video_link
+    } for m in Match.query.order_by(Match.id).all()]
+
+def before_challenges():
+    return [{
+        'id': c.id, 'challenger_id': c.challenger_id, 'challenged_id': c.challenged_id, 'host_id': c.host_id,
+        'status': c.effective_status.value, 'created_at': c.created_at, 'expires_at': c.expires_at
+    } for c in Challenge.query.order_by(Challenge.id).all()]
+
+def before_tournaments():
+    return [{
+        'id': t.id, 'name': t.name, 'host_id': t.host_id, 'start_time': t.start_time,
+        'status': t.effective_status.value, 'participant_count': t.participant_count,
+        'matches_recorded': t.matches_recorded, 'last_result_at': t.last_result_at, 'leader_id': t.leader_id
+    } for t in Tournament.query.order_by(Tournament.id).all()]
+
+# The read path now: the listings' own selects and serializers
+def after_players():
+    statement = select(*player_columns()).outerjoin(PlayerStats, PlayerStats.player_id == Player.id).order_by(Player.id)
+    return [player_listing(row) for row in db.session.execute(statement)]
+
+def after_matches():
+    return [match_listing(row) for row in db.session.execute(select(*match_columns()).order_by(Match.id))]
+
+def after_challenges():
+    columns = listing_columns(Challenge.__table__, CHALLENGE_FIELDS, Challenge.effective_status)
+    return [challenge_listing(row) for row in db.session.execute(select(*columns).order_by(Challenge.id))]
+
+def after_tournaments():
+    columns = listing_columns(Tournament.__table__, TOURNAMENT_FIELDS, Tournament.effective_status)
+    return [tournament_listing(row) for row in db.session.execute(select(*columns).order_by(Tournament.id))]
+
+def measure(build):
+    """(best microseconds per row, bytes allocated per row at peak)"""
+    best = float('inf')
+    for _ in range(REPEATS):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        items = build()
+        best = min(best, time.perf_counter() - start)
+        assert len(items) == ROWS
+        del items
+    db.session.expunge_all()
+    tracemalloc.start()
+    items = build()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del items
+    return best / ROWS * 1e6, peak / ROWS
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+            SCHEDULER_ENABLED = False
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            db.create_all()
+            seed(np.random.default_rng(1))
+
+            print(f'{ROWS} rows per table, best of {REPEATS}')
+            print(f'  {"listing":<12} {"before":>14} {"after":>14} {"speedup":>8} {"before":>12} {"after":>12}')
+            for name, before, after in (('players', before_players, after_players),
+                                        ('matches', before_matches, after_matches),
+                                        ('challenges', before_challenges, after_challenges),
+                                        ('tournaments', before_tournaments, after_tournaments)):
+                assert app.json.dumps(before()) == app.json.dumps(after())
+                before_us, before_bytes = measure(before)
+                after_us, after_bytes = measure(after)
+                print(f'  {name:<12} {before_us:>9.2f} us/row {after_us:>9.2f} us/row {before_us / after_us:>7.1f}x '
+                      f'{before_bytes:>8.0f} B/row {after_bytes:>8.0f} B/row')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Benchmark full-history ELO replay on 1M matches (engine only, and end to end from SQLite)"""
+import sys
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Add the parent directory to the Python path so we can import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from app import create_app
+from app.replay import replay_ratings
+from config import Config
+from models import db, Player, Match, MatchStatus, PlayerStatus
+
+MATCHES = 1_000_000
+PLAYERS = 10_000
+
+def synthetic_results(rng):
+    winners = rng.integers(0, PLAYERS, size=MATCHES)
+    losers = (winners + rng.integers(1, PLAYERS, size=MATCHES)) % PLAYERS
+    return winners, losers
+
+def bench_engine(winners, losers):
+    start = time.perf_counter()
+    replay_ratings(winners, losers, PLAYERS)
+    print(f'engine (replay only): {time.perf_counter() - start:.2f}s')
+
+def bench_database(winners, losers):
+    from app.replay import verify_ratings
+
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            db.create_all()
+            db.session.execute(db.insert(Player), [
+                {'name': f'p{i}', 'password_hash': '', 'age': 30, 'weight': 80.0,
+                 'elo': 1200.0, 'status': PlayerStatus.APPROVED} for i in range(PLAYERS)
+            ])
+            start_time = datetime(2020, 1, 1)
+            db.session.execute(db.insert(Match), [
+                {'player1_id': int(w) + 1, 'player2_id': int(l) + 1, 'winner_id': int(w) + 1,
+                 'host_id': 1, 'status': MatchStatus.COMPLETED, 'elo_change': 0.0,
+                 'completed_at': start_time + timedelta(seconds=i)}
+                for i, (w, l) in enumerate(zip(winners.tolist(), losers.tolist()))
+            ])
+            db.session.commit()
+
+            report = verify_ratings()
+            print(f"end to end (load + replay + compare): {report['seconds']:.2f}s, "
+                  f"{report['divergent_player_count']} divergent players")
+
+def main():
+    print(f'{MATCHES} matches between {PLAYERS} players')
+    winners, losers = synthetic_results(np.random.default_rng(1))
+    bench_engine(winners, losers)
+    bench_database(winners, losers)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Benchmark read/write throughput of each SQLite profile with concurrent readers and writers"""
+import sys
+import os
+import random
+import tempfile
+import threading
+import time
+
+# Add the parent directory to the Python path so we can import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import select, insert, update, or_
+from sqlalchemy.exc import OperationalError
+from app import create_app
+from config import Config
+from models import db, Player, Match, PlayerStatus, MatchStatus
+
+PLAYERS = 1_000
+SEED_MATCHES = 20_000
+READERS = 4
+WRITERS = 4
+SECONDS = 5.0
+
+def seed(rng):
+    db.session.execute(insert(Player), [
+        {'name': f'p{i}', 'password_hash': '', 'age': 30, 'weight': 80.0,
+         'elo': 1200.0, 'status': PlayerStatus.APPROVED} for i in range(PLAYERS)
+    ])
+    db.session.execute(insert(Match), [
+        {'player1_id': rng.randint(1, PLAYERS), 'player2_id': rng.randint(1, PLAYERS), 'host_id': 1,
+         'status': MatchStatus.COMPLETED} for _ in range(SEED_MATCHES)
+    ])
+    db.session.commit()
+
+def reader(app, deadline, counts, seed_value):
+    rng = random.Random(seed_value)
+    with app.app_context():
+        while time.perf_counter() < deadline:
+            player_id = rng.randint(1, PLAYERS)
+            try:
+                db.session.execute(select(Player.elo).where(Player.id == player_id)).scalar()
+                db.session.execute(select(Match.id).where(
+                    or_(Match.player1_id == player_id, Match.player2_id == player_id)).limit(20)).all()
+                db.session.rollback()
+                counts['reads'] += 1
+            except OperationalError:
+                db.session.rollback()
+                counts['errors'] += 1
+        db.session.remove()
+
+def writer(app, deadline, counts, seed_value):
+    rng = random.Random(seed_value)
+    with app.app_context():
+        while time.perf_counter() < deadline:
+            winner, loser = rng.sample(range(1, PLAYERS + 1), 2)
+            try:
+                db.session.execute(insert(Match).values(
+                    player1_id=winner, player2_id=loser, winner_id=winner, host_id=1,
+                    status=MatchStatus.COMPLETED, elo_change=16.0))
+                db.session.execute(update(Player).where(Player.id == winner).values(elo=Player.elo + 16))
+                db.session.execute(update(Player).where(Player.id == loser).values(elo=Player.elo - 16))
+                db.session.commit()
+                counts['writes'] += 1
+            except OperationalError:
+                db.session.rollback()
+                counts['errors'] += 1
+        db.session.remove()
+
+def run_profile(profile, tmp):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, f'{profile}.db')
+        SQLITE_PROFILE = profile
+        SCHEDULER_ENABLED = False
+        EXPIRY_TIMER_ENABLED = False
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        seed(random.Random(1))
+
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    deadline = time.perf_counter() + SECONDS
+    threads = [threading.Thread(target=reader, args=(app, deadline, counts, i)) for i in range(READERS)]
+    threads += [threading.Thread(target=writer, args=(app, deadline, counts, 100 + i)) for i in range(WRITERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context():
+        db.engine.dispose()
+    return counts
+
+def main():
+    print(f"{READERS} reader and {WRITERS} writer threads for {SECONDS:.0f}s per profile")
+    print(f"{'profile':<10} {'reads/s':>10} {'writes/s':>10} {'locked errors':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in Config.SQLITE_PROFILES:
+            counts = run_profile(profile, tmp)
+            print(f"{profile:<10} {counts['reads'] / SECONDS:>10.0f} {counts['writes'] / SECONDS:>10.0f} "
+                  f"{counts['errors']:>14}")
+
+if __name__ == '__main__':
+    main()
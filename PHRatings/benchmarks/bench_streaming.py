@@ -0,0 +1,105 @@
+"""
+Benchmark peak memory of listing 1M matches: streamed export vs a fully built
+list + jsonify(). Peak RSS is read from /proc (Linux only).
+"""
+import sys
+import os
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+# Add the parent directory to the Python path so we can import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from flask import jsonify
+from app import create_app
+from config import Config
+from models import db, Admin, Player, PlayerStatus, Match, MatchStatus
+
+MATCHES = 1_000_000
+PLAYERS = 1_000
+
+def make_app(path):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + path
+        SCHEDULER_ENABLED = False
+    return create_app(BenchConfig)
+
+def seed(app, rng):
+    with app.app_context():
+        db.create_all()
+        admin = Admin(username='bench')
+        admin.set_password('bench')
+        db.session.add(admin)
+        db.session.execute(db.insert(Player), [
+            {'name': f'p{i}', 'password_hash': '', 'age': 30, 'weight': 80.0,
+             'elo': 1200.0, 'status': PlayerStatus.APPROVED} for i in range(PLAYERS)
+        ])
+        p1 = rng.integers(1, PLAYERS + 1, size=MATCHES)
+        p2 = (p1 + rng.integers(1, PLAYERS - 1, size=MATCHES) - 1) % PLAYERS + 1
+        completed_at = datetime(2020, 1, 1)
+        for start in range(0, MATCHES, 100_000):
+            db.session.execute(db.insert(Match), [
+                {'player1_id': a, 'player2_id': b, 'winner_id': a, 'host_id': (b % PLAYERS) + 1,
+                 'status': MatchStatus.COMPLETED, 'completed_at': completed_at, 'notes': f'result {start + i}'}
+                for i, (a, b) in enumerate(zip(p1[start:start + 100_000].tolist(), p2[start:start + 100_000].tolist()))
+            ])
+        db.session.commit()
+
+def _status_mib(field):
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) / 1024
+
+def reset_peak_rss():
+    """Reset VmHWM (Linux) so the peak covers only what follows, not app startup"""
+    with open('/proc/self/clear_refs', 'w') as clear_refs:
+        clear_refs.write('5')
+    return _status_mib('VmRSS')
+
+def peak_rss():
+    return _status_mib('VmHWM')
+
+def run(mode, path):
+    """Serve the full listing once in this process and print bytes, time and peak RSS growth"""
+    app = make_app(path)
+    client = app.test_client()
+    token = client.post('/admin/login', json={'username': 'bench', 'password': 'bench'}).json['token']
+    baseline = reset_peak_rss()
+    start = time.perf_counter()
+
+    if mode == 'streamed':
+        response = client.get('/admin/matches/export', headers={'Authorization': f'Bearer {token}'}, buffered=False)
+        size = sum(len(chunk) for chunk in response.iter_encoded())
+        response.close()
+    else:
+        # What GET /matches did before pagination and streaming
+        with app.test_request_context():
+            matches = Match.query.all()
+            size = len(jsonify([{
+                'id': m.id, 'player1_id': m.player1_id, 'player2_id': m.player2_id, 'winner_id': m.winner_id,
+                'host_id': m.host_id, 'tournament_id': m.tournament_id, 'challenge_id': m.challenge_id,
+                'status': m.effective_status.value, 'created_at': m.created_at, 'completed_at': m.completed_at,
+                'notes': m.notes, 'video_link': m.video_link
+            } for m in matches]).data)
+
+    elapsed = time.perf_counter() - start
+    print(f'  {mode:<9} {size / 2**20:7.1f} MiB of JSON in {elapsed:5.2f}s, '
+          f'peak RSS +{peak_rss() - baseline:7.1f} MiB')
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        seed(make_app(path), np.random.default_rng(1))
+        print(f'{MATCHES} matches')
+        for mode in ('buffered', 'streamed'):
+            subprocess.run([sys.executable, __file__, mode, path], check=True)
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3:
+        run(*sys.argv[1:])
+    else:
+        main()
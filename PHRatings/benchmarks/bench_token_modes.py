@@ -0,0 +1,74 @@
+"""Benchmark authenticated request throughput for database-backed vs signed session tokens"""
+import sys
+import os
+import tempfile
+import threading
+import time
+
+# Add the parent directory to the Python path so we can import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from config import Config
+from models import db, Admin, Player, PlayerStatus
+
+THREADS = 8
+REQUESTS_PER_THREAD = 500
+
+MODES = [
+    ('database, cache off', 'database', False),
+    ('database, cache on', 'database', True),
+    ('signed', 'signed', True),
+]
+
+def make_config(tmp, token_mode, cache_enabled):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+        SESSION_TOKEN_MODE = token_mode
+        TOKEN_DENYLIST_PATH = os.path.join(tmp, 'denylist.json')
+        AUTH_CACHE_ENABLED = cache_enabled
+    return BenchConfig
+
+def seed(app):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        admin = Admin(username='bench-admin')
+        admin.set_password('bench')
+        db.session.add(admin)
+        for i in range(THREADS):
+            player = Player(name=f'bench-player-{i}', age=30, weight=80.0,
+                            password_hash='', status=PlayerStatus.APPROVED)
+            player.set_password('bench')
+            db.session.add(player)
+        db.session.commit()
+
+def run(tmp, token_mode, cache_enabled):
+    app = create_app(make_config(tmp, token_mode, cache_enabled))
+    seed(app)
+    token = app.test_client().post('/admin/login', json={'username': 'bench-admin', 'password': 'bench'}).json['token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    def worker():
+        client = app.test_client()
+        for _ in range(REQUESTS_PER_THREAD):
+            client.get('/admin/players/pending', headers=headers)
+
+    threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return THREADS * REQUESTS_PER_THREAD / elapsed
+
+def main():
+    print(f'{THREADS} threads x {REQUESTS_PER_THREAD} requests of GET /admin/players/pending')
+    print(f"{'token mode':25} {'requests/s':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, token_mode, cache_enabled in MODES:
+            print(f'{label:25} {run(tmp, token_mode, cache_enabled):12.0f}')
+
+if __name__ == '__main__':
+    main()
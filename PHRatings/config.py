@@ -6,4 +6,105 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'your-secret-key-here'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'elo.db')
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # SQLite connection tuning (see app/sqlite_profile.py): PRAGMAs run on every
+    # connection plus pool options. 'default' leaves SQLite's own settings.
+    SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE') or 'durable'
+    SQLITE_PROFILES = {
+        # Rollback journal, synchronous=FULL, no busy timeout: concurrent writers
+        # fail at once with "database is locked"
+        'default': {},
+        # WAL lets readers run alongside the writer; writers wait up to 5s for the
+        # lock instead of failing. Every commit is still synced to disk.
+        'durable': {
+            'pragmas': {
+                'busy_timeout': 5000,
+                'journal_mode': 'WAL',
+                'synchronous': 'FULL',
+                'cache_size': -16000,  # KiB
+                'temp_store': 'MEMORY',
+            },
+            'pool': {'pool_size': 5, 'max_overflow': 10, 'pool_timeout': 30},
+        },
+        # As 'durable' with synchronous=NORMAL (in WAL mode a power loss can drop
+        # the last commits, never corrupt the file), a 64 MiB page cache and
+        # 256 MiB of memory-mapped I/O
+        'fast': {
+            'pragmas': {
+                'busy_timeout': 5000,
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL',
+                'cache_size': -65536,
+                'mmap_size': 268435456,
+                'temp_store': 'MEMORY',
+            },
+            'pool': {'pool_size': 10, 'max_overflow': 20, 'pool_timeout': 30},
+        },
+    }
+
+    # Session tokens: 'database' (AdminSession/PlayerSession rows) or 'signed'
+    # (stateless HMAC-signed tokens, see app/tokens.py)
+    SESSION_TOKEN_MODE = os.environ.get('SESSION_TOKEN_MODE') or 'database'
+    TOKEN_DENYLIST_PATH = os.environ.get('TOKEN_DENYLIST_PATH') or \
+        os.path.join(basedir, 'token_denylist.json')
+
+    # Bearer-token resolution cache (see app/auth.py)
+    AUTH_CACHE_ENABLED = True
+    AUTH_CACHE_MAX_SIZE = 10000
+    AUTH_CACHE_TTL_SECONDS = 30
+
+    # Listing pages (see app/pagination.py): rows per page without ?limit=, and
+    # the largest ?limit= accepted
+    LISTING_PAGE_SIZE = 100
+    LISTING_MAX_PAGE_SIZE = 1000
+    # Rows fetched and encoded per chunk of a streamed response (see app/streaming.py)
+    STREAM_CHUNK_ROWS = 1000
+    # Streamed bodies of at least this many bytes are gzip/deflate compressed
+    # for clients that accept it (see app/streaming.py)
+    COMPRESSION_MIN_BYTES = 1024
+    COMPRESSION_LEVEL = 6
+
+    # In-memory leaderboard (see app/leaderboard.py): rating range and bucket
+    # width of its rank index; ratings outside the range are still ranked
+    LEADERBOARD_MIN_RATING = 0
+    LEADERBOARD_MAX_RATING = 4000
+    LEADERBOARD_BUCKET_WIDTH = 1
+    # Largest ?radius= of GET /players/<id>/around
+    LEADERBOARD_MAX_RADIUS = 50
+
+    # Weight and age divisions (see app/divisions.py): (name, upper bound) pairs
+    # in increasing order, a player falling in the first class whose bound is
+    # above their weight / current age; the last class has no bound
+    DIVISION_WEIGHT_CLASSES = [('flyweight', 130), ('lightweight', 155), ('middleweight', 180),
+                               ('cruiserweight', 205), ('heavyweight', None)]
+    DIVISION_AGE_CLASSES = [('junior', 18), ('open', 35), ('masters', 50), ('seniors', None)]
+    # Players whose age has moved them to another division are reassigned by a
+    # scheduler job this often
+    DIVISION_ROLL_INTERVAL_SECONDS = 3600
+    DIVISION_ROLL_BATCH_SIZE = 1000
+
+    # Tournaments whose serialized matchup matrix is kept (see app/matchups.py)
+    MATCHUP_CACHE_MAX_SIZE = 256
+
+    # Background maintenance scheduler (see app/scheduler.py), started by run.py
+    SCHEDULER_ENABLED = True
+    SESSION_REAPER_INTERVAL_SECONDS = 300
+    SESSION_REAPER_BATCH_SIZE = 1000
+    # Challenge/match expiry and tournament start/end fire from a deadline timer
+    # (see app/deadlines.py); the sweeps are a fallback for deadlines it did not
+    # see, such as objects created by another worker process
+    EXPIRY_TIMER_ENABLED = True
+    EXPIRY_SWEEP_INTERVAL_SECONDS = 600
+
+    # Rating engine: 'elo' (applied per match) or 'glicko2' (applied per rating
+    # period, see app/rating_engines.py). Periods are closed by the scheduler
+    # every RATING_PERIOD_HOURS or on demand via POST /admin/ratings/period.
+    RATING_ENGINE = os.environ.get('RATING_ENGINE') or 'elo'
+    RATING_PERIOD_HOURS = 24
+
+    # Archival of cold challenges, matches and tournaments (see app/archive.py),
+    # run by the scheduler or on demand via POST /admin/archive
+    ARCHIVE_AFTER_DAYS = 30
+    ARCHIVE_BATCH_SIZE = 1000
+    ARCHIVE_INTERVAL_SECONDS = 86400
\ No newline at end of file
@@ -1,4 +1,6 @@
 from app import db
+from sqlalchemy import case, type_coerce
+from sqlalchemy.ext.hybrid import hybrid_property
 from datetime import datetime, timedelta
 from enum import Enum
 import hashlib
@@ -10,6 +12,11 @@ MATCH_TIMEOUT_HOURS = 8
 TOURNAMENT_TIMEOUT_HOURS = 24
 ADMIN_SESSION_TIMEOUT_HOURS = 24
 PLAYER_SESSION_TIMEOUT_HOURS = 24
+DEFAULT_ELO = 1200
+ELO_K_FACTOR = 32
+RATING_UPDATE_RETRIES = 10
+GLICKO_DEFAULT_RD = 350.0
+GLICKO_DEFAULT_VOLATILITY = 0.06
 
 # Enums
 class PlayerStatus(Enum):
@@ -50,7 +57,7 @@ class AdminSession(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     admin_id = db.Column(db.Integer, db.ForeignKey('admin.id'), nullable=False)
     token = db.Column(db.String(64), unique=True, nullable=False)
-    expires_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
 
     def __init__(self, admin_id, **kwargs):
@@ -63,11 +70,29 @@ class Player(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(80), unique=True, nullable=False)
     password_hash = db.Column(db.String(128), nullable=False)
-    elo = db.Column(db.Float, default=1200)
+    elo = db.Column(db.Float, default=DEFAULT_ELO)
+    rating_version = db.Column(db.Integer, nullable=False, default=0)  # Bumped by every rating write
+    rating_deviation = db.Column(db.Float, default=GLICKO_DEFAULT_RD)  # Glicko-2 only
+    volatility = db.Column(db.Float, default=GLICKO_DEFAULT_VOLATILITY)  # Glicko-2 only
     age = db.Column(db.Integer, nullable=False)
     weight = db.Column(db.Float, nullable=False)
-    status = db.Column(db.Enum(PlayerStatus), default=PlayerStatus.PENDING)
+    status = db.Column(db.Enum(PlayerStatus), default=PlayerStatus.PENDING, index=True)
     registration_date = db.Column(db.DateTime, server_default=db.func.now())
+    division = db.Column(db.String(64))  # 'weight class/age class', see app/divisions.py
+    division_refresh_at = db.Column(db.DateTime)  # When the current age next changes
+    # Data version of the last change to name, rating or status; NULL until that
+    # change commits (see app/leaderboard.py)
+    leaderboard_version = db.Column(db.Integer)
+
+    __table_args__ = (
+        # Division listings (by ID), leaderboards and opponent searches (by rating)
+        db.Index('ix_player_division', 'division'),
+        db.Index('ix_player_division_status_elo', 'division', 'status', 'elo'),
+        # Age roll
+        db.Index('ix_player_division_refresh_at', 'division_refresh_at'),
+        # Leaderboard catch-up and commit stamping
+        db.Index('ix_player_leaderboard_version', 'leaderboard_version'),
+    )
 
     def set_password(self, password):
         self.password_hash = hashlib.sha256(password.encode()).hexdigest()
@@ -81,11 +106,20 @@ class Player(db.Model):
     def is_active(self):
         return self.status == PlayerStatus.APPROVED
 
+class PlayerStats(db.Model):
+    """Per-player result counters, maintained by app/player_stats.py"""
+    player_id = db.Column(db.Integer, db.ForeignKey('player.id'), primary_key=True)
+    games_played = db.Column(db.Integer, nullable=False, default=0)
+    wins = db.Column(db.Integer, nullable=False, default=0)
+    losses = db.Column(db.Integer, nullable=False, default=0)
+    last_played_at = db.Column(db.DateTime)
+    peak_elo = db.Column(db.Float)  # Highest rating after a rated result
+
 class PlayerSession(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     player_id = db.Column(db.Integer, db.ForeignKey('player.id'), nullable=False)
     token = db.Column(db.String(64), unique=True, nullable=False)
-    expires_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
 
     def __init__(self, player_id, **kwargs):
@@ -104,10 +138,29 @@ class Challenge(db.Model):
     accepted_at = db.Column(db.DateTime)
     expires_at = db.Column(db.DateTime)
 
+    __table_args__ = (
+        db.Index('ix_challenge_status_expires_at', 'status', 'expires_at'),
+    )
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.expires_at = datetime.now() + timedelta(minutes=CHALLENGE_TIMEOUT_MINUTES)
 
+    @hybrid_property
+    def effective_status(self):
+        """Status as of now, including an expiry the background sweep has not stored yet"""
+        if self.status == ChallengeStatus.PENDING and self.expires_at < datetime.now():
+            return ChallengeStatus.EXPIRED
+        return self.status
+
+    @effective_status.expression
+    def effective_status(cls):
+        return type_coerce(case(
+            (db.and_(cls.status == ChallengeStatus.PENDING, cls.expires_at < datetime.now()),
+             ChallengeStatus.EXPIRED.name),
+            else_=cls.status
+        ), cls.status.type)
+
 class Match(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     player1_id = db.Column(db.Integer, db.ForeignKey('player.id'), nullable=False)
@@ -124,11 +177,40 @@ class Match(db.Model):
     notes = db.Column(db.Text)
     video_link = db.Column(db.String(255))
 
+    __table_args__ = (
+        db.Index('ix_match_status_expires_at', 'status', 'expires_at'),
+        db.Index('ix_match_status_completed_at', 'status', 'completed_at'),
+        # Pending match between two players
+        db.Index('ix_match_player1_player2_status', 'player1_id', 'player2_id', 'status'),
+        # ?player_id= and ?tournament_id= listing pages: (column, id) range seeks
+        db.Index('ix_match_player1_id', 'player1_id'),
+        db.Index('ix_match_player2_id', 'player2_id'),
+        db.Index('ix_match_tournament_id', 'tournament_id'),
+        # Host's last recorded match (undo)
+        db.Index('ix_match_host_completed_at', 'host_id', 'completed_at'),
+        db.Index('ix_match_tournament_status', 'tournament_id', 'status'),
+    )
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         if 'expires_at' not in kwargs:
             self.expires_at = datetime.now() + timedelta(hours=MATCH_TIMEOUT_HOURS)
 
+    @hybrid_property
+    def effective_status(self):
+        """Status as of now, including an expiry the background sweep has not stored yet"""
+        if self.status == MatchStatus.PENDING and self.expires_at and self.expires_at < datetime.now():
+            return MatchStatus.EXPIRED
+        return self.status
+
+    @effective_status.expression
+    def effective_status(cls):
+        return type_coerce(case(
+            (db.and_(cls.status == MatchStatus.PENDING, cls.expires_at != None, cls.expires_at < datetime.now()),
+             MatchStatus.EXPIRED.name),
+            else_=cls.status
+        ), cls.status.type)
+
 class Tournament(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
@@ -137,13 +219,98 @@ class Tournament(db.Model):
     status = db.Column(db.Enum(TournamentStatus), default=TournamentStatus.REGISTRATION_OPEN)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     expires_at = db.Column(db.DateTime)
+    # Summary counters, maintained by app/tournament_stats.py
+    participant_count = db.Column(db.Integer, nullable=False, default=0)
+    matches_recorded = db.Column(db.Integer, nullable=False, default=0)
+    last_result_at = db.Column(db.DateTime)
+    leader_id = db.Column(db.Integer, db.ForeignKey('player.id'))  # Most wins, earliest joined on ties
+
+    __table_args__ = (
+        db.Index('ix_tournament_status_start_time', 'status', 'start_time'),
+        db.Index('ix_tournament_status_expires_at', 'status', 'expires_at'),
+    )
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.expires_at = self.start_time + timedelta(hours=TOURNAMENT_TIMEOUT_HOURS)
 
+    @hybrid_property
+    def effective_status(self):
+        """Status as of now, including transitions the background sweep has not stored yet"""
+        now = datetime.now()
+        status = self.status
+        if status == TournamentStatus.REGISTRATION_OPEN and self.start_time <= now:
+            status = TournamentStatus.ACTIVE
+        if status == TournamentStatus.ACTIVE and self.expires_at < now:
+            status = TournamentStatus.EXPIRED
+        return status
+
+    @effective_status.expression
+    def effective_status(cls):
+        now = datetime.now()
+        started = db.and_(cls.status == TournamentStatus.REGISTRATION_OPEN, cls.start_time <= now)
+        return type_coerce(case(
+            (db.and_(started, cls.expires_at < now), TournamentStatus.EXPIRED.name),
+            (started, TournamentStatus.ACTIVE.name),
+            (db.and_(cls.status == TournamentStatus.ACTIVE, cls.expires_at < now), TournamentStatus.EXPIRED.name),
+            else_=cls.status
+        ), cls.status.type)
+
 class TournamentParticipant(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     tournament_id = db.Column(db.Integer, db.ForeignKey('tournament.id'), nullable=False)
     player_id = db.Column(db.Integer, db.ForeignKey('player.id'), nullable=False)
-    joined_at = db.Column(db.DateTime, server_default=db.func.now())
\ No newline at end of file
+    joined_at = db.Column(db.DateTime, server_default=db.func.now())
+    wins = db.Column(db.Integer, nullable=False, default=0)  # Completed matches won in this tournament
+
+    __table_args__ = (
+        db.Index('ix_tournament_participant_tournament_player', 'tournament_id', 'player_id'),
+    )
+
+class RatingHistory(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    player_id = db.Column(db.Integer, db.ForeignKey('player.id'), nullable=False)
+    match_id = db.Column(db.Integer, db.ForeignKey('match.id'), index=True)
+    elo = db.Column(db.Float, nullable=False)  # Rating after the change
+    elo_change = db.Column(db.Float, nullable=False)
+    recorded_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_rating_history_player_recorded_at', 'player_id', 'recorded_at'),
+    )
+
+class RatingPeriod(db.Model):
+    """A closed Glicko-2 rating period (see app/rating_engines.py)"""
+    id = db.Column(db.Integer, primary_key=True)
+    started_at = db.Column(db.DateTime)
+    ended_at = db.Column(db.DateTime, nullable=False, index=True)
+    games = db.Column(db.Integer, nullable=False)
+    players_rated = db.Column(db.Integer, nullable=False)
+    processed_at = db.Column(db.DateTime, server_default=db.func.now())
+
+class SchemaMigration(db.Model):
+    """A schema migration applied to this database (see app/migrations.py)"""
+    id = db.Column(db.String(80), primary_key=True)
+    applied_at = db.Column(db.DateTime, nullable=False)
+
+class DataVersion(db.Model):
+    """Single-row change counter, bumped by every committing write (see app/data_version.py)"""
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False)
+    changed_at = db.Column(db.DateTime, nullable=False)  # UTC
+
+# Archive tables (see app/archive.py): same columns as the live table, without
+# foreign keys or secondary indexes, plus the time the row was archived. Rows
+# are keyed by their own archive_id: the live table's id is only indexed, as
+# SQLite may hand an archived id out again (a deleted participant, say).
+def archive_table(model):
+    columns = [db.Column(column.name, column.type, index=column.primary_key)
+               for column in model.__table__.columns]
+    return db.Table(f'{model.__tablename__}_archive',
+                    db.Column('archive_id', db.Integer, primary_key=True), *columns,
+                    db.Column('archived_at', db.DateTime, nullable=False))
+
+challenge_archive = archive_table(Challenge)
+match_archive = archive_table(Match)
+tournament_archive = archive_table(Tournament)
+tournament_participant_archive = archive_table(TournamentParticipant)
@@ -1,7 +1,20 @@
 from app import create_app
+from app.scheduler import scheduler
+from app.deadlines import expiry_timer
+from app.leaderboard import leaderboard
 
 app = create_app()
 
+# Seed the in-memory leaderboard before the first request needs it
+with app.app_context():
+    leaderboard.rebuild()
+
+# Background maintenance (expired session reaping, ...) runs in the server process
+if app.config['SCHEDULER_ENABLED']:
+    scheduler.start()
+if app.config['EXPIRY_TIMER_ENABLED']:
+    expiry_timer.start()
+
 # REMOVED: init-db CLI command - now handled by scripts/init_db.py
 
 if __name__ == '__main__':
@@ -0,0 +1,33 @@
+"""Move cold challenges, matches and tournaments into the archive tables"""
+import sys
+import os
+import argparse
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.archive import archive_cold_rows, ARCHIVE_VACUUM_MODES
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--days', type=int, help='archive rows older than this (default: ARCHIVE_AFTER_DAYS)')
+    parser.add_argument('--batch-size', type=int, help='rows per transaction (default: ARCHIVE_BATCH_SIZE)')
+    parser.add_argument('--max-batches', type=int, help='stop after this many batches per table')
+    parser.add_argument('--vacuum', choices=ARCHIVE_VACUUM_MODES, help='return freed pages to the filesystem')
+    args = parser.parse_args()
+
+    app = create_app()
+
+    with app.app_context():
+        days = args.days if args.days is not None else app.config.get('ARCHIVE_AFTER_DAYS', 30)
+        batch_size = args.batch_size or app.config.get('ARCHIVE_BATCH_SIZE', 1000)
+        report = archive_cold_rows(days, batch_size, max_batches=args.max_batches, vacuum_mode=args.vacuum)
+
+    for kind, rows in report['rows_archived'].items():
+        print(f"Archived {rows} {kind}")
+    print(f"Database size {report['bytes_before']} -> {report['bytes_after']} bytes "
+          f"({report['bytes_reclaimed']} reclaimed, {report['free_bytes']} free) in {report['seconds']:.2f}s")
+
+if __name__ == '__main__':
+    main()
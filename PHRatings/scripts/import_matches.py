@@ -0,0 +1,46 @@
+"""Bulk import historical match results from a CSV or NDJSON file"""
+import sys
+import os
+import argparse
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.importer import import_matches, ImportFormatError
+from app.rating_engines import get_rating_engine
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('path', help='file with player1, player2, winner, timestamp, host, notes columns')
+    parser.add_argument('--format', choices=['csv', 'ndjson'],
+                        help='input format (default: from the file extension)')
+    args = parser.parse_args()
+
+    fmt = args.format or ('csv' if args.path.lower().endswith('.csv') else 'ndjson')
+    with open(args.path, encoding='utf-8-sig') as f:
+        text = f.read()
+
+    app = create_app()
+
+    with app.app_context():
+        if get_rating_engine().uses_rating_periods:
+            print("Bulk import is only available with the elo rating engine.")
+            sys.exit(1)
+        try:
+            report, errors = import_matches(text, fmt)
+        except ImportFormatError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+
+    if errors:
+        print(f"Import rejected, nothing was written: {report['error_count']} of {report['rows']} rows are invalid")
+        for error in errors:
+            print(f"  line {error['line']}: {error['error']}")
+        sys.exit(1)
+
+    print(f"Imported {report['imported']} matches, updated {report['players_updated']} players "
+          f"in {report['seconds']:.2f}s")
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 from app import create_app
 from models import db
+from app.migrations import stamp
 
 def init_database():
     """Create all database tables"""
@@ -20,16 +21,19 @@ def init_database():
         
         if existing_tables:
             print(f"Database already initialized with tables: {', '.join(existing_tables)}")
+            print("To upgrade it to the current schema without losing data, run 'python scripts/migrate.py' instead.")
             response = input("Recreate all tables? This will DELETE all data! (yes/no): ")
             if response.lower() == 'yes':
                 db.drop_all()
                 print("Dropped all existing tables.")
                 db.create_all()
+                stamp()
                 print("Database tables recreated successfully!")
             else:
                 print("Initialization cancelled.")
         else:
             db.create_all()
+            stamp()
             print("Database tables created successfully!")
             print("\nNext step: Run 'python scripts/create_admin.py' to create your first admin account.")
 
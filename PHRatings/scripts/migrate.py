@@ -0,0 +1,34 @@
+"""Upgrade an existing database to the current schema without losing data"""
+import sys
+import os
+import argparse
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.migrations import migrate, pending_migrations
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--status', action='store_true', help='list pending migrations without applying them')
+    args = parser.parse_args()
+
+    app = create_app()
+
+    with app.app_context():
+        if args.status:
+            pending = pending_migrations()
+            for migration_id, func in pending:
+                print(f"  {migration_id}: {func.__doc__}")
+            print(f"{len(pending)} pending migration(s)")
+            return
+
+        applied = migrate()
+
+    for migration_id in applied:
+        print(f"Applied {migration_id}")
+    print("Database is up to date." if applied else "No pending migrations.")
+
+if __name__ == '__main__':
+    main()
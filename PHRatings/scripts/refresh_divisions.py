@@ -0,0 +1,22 @@
+"""Reassign every player's weight/age division, e.g. after changing the configured classes"""
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.divisions import refresh_divisions
+from models import db
+
+def main():
+    app = create_app()
+
+    with app.app_context():
+        with db.engine.begin() as connection:
+            count = refresh_divisions(connection)
+
+    print(f"Reassigned the divisions of {count} players.")
+
+if __name__ == '__main__':
+    main()
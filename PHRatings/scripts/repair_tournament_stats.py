@@ -0,0 +1,22 @@
+"""Recompute every tournament's summary counters from its participants and matches"""
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.tournament_stats import repair_tournament_stats
+from models import db
+
+def main():
+    app = create_app()
+
+    with app.app_context():
+        fixed = repair_tournament_stats()
+        db.session.commit()
+
+    print(f"Recomputed tournament counters; {fixed} tournament(s) had stale values.")
+
+if __name__ == '__main__':
+    main()
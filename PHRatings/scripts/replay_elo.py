@@ -0,0 +1,57 @@
+"""Replay the full match history to verify (and optionally fix) stored ELO ratings"""
+import sys
+import os
+import argparse
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.replay import verify_ratings
+from app.rating_engines import get_rating_engine
+from app.services import RatingConflictError
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--apply', action='store_true', help='write corrected ratings back to the database')
+    parser.add_argument('--tolerance', type=float, default=1e-6, help='ignore differences up to this many points')
+    args = parser.parse_args()
+
+    app = create_app()
+
+    with app.app_context():
+        if get_rating_engine().uses_rating_periods:
+            print("Replay is only available with the elo rating engine.")
+            sys.exit(1)
+        try:
+            report = verify_ratings(apply=args.apply, tolerance=args.tolerance)
+        except RatingConflictError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+
+    print(f"Replayed {report['matches']} completed matches for {report['players']} players "
+          f"in {report['seconds']:.2f}s")
+    print(f"Matches whose stored elo_change differs: {report['divergent_match_count']}")
+
+    if not report['divergent_player_count']:
+        print("All stored ratings match the replayed history.")
+        return
+
+    print(f"Players with divergent ratings: {report['divergent_player_count']} "
+          f"(max difference {report['max_abs_difference']:.4f})")
+    if len(report['divergent_players']) < report['divergent_player_count']:
+        print(f"Largest {len(report['divergent_players'])} differences:")
+    for player in report['divergent_players']:
+        print(f"  player {player['player_id']}: stored {player['stored_elo']:.4f}, "
+              f"replayed {player['replayed_elo']:.4f} ({player['difference']:+.4f})")
+
+    if report['skipped_player_count']:
+        print(f"{report['skipped_player_count']} players were rated while the replay ran and were left unchanged; "
+              f"run it again to check them.")
+    if report['applied']:
+        print("Corrected ratings written to the database.")
+    else:
+        print("Run again with --apply to write the replayed ratings.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+"""Check every player's stored result counters against a full recompute from the match history"""
+import sys
+import os
+import argparse
+
+# Add the parent directory to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.player_stats import verify_player_stats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--apply', action='store_true', help='rewrite the stats table from the recompute')
+    args = parser.parse_args()
+
+    app = create_app()
+
+    with app.app_context():
+        report = verify_player_stats(apply=args.apply)
+
+    print(f"Checked {report['players_checked']} players: {report['divergent_player_count']} divergent")
+    for player in report['divergent_players']:
+        for field, expected in player['expected'].items():
+            print(f"  player {player['player_id']} {field}: stored {player['stored'][field]}, expected {expected}")
+    if report['applied']:
+        print("Stats table rewritten from the recompute.")
+
+if __name__ == '__main__':
+    main()
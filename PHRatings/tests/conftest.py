@@ -2,24 +2,32 @@
 import pytest
 import sys
 import os
+from sqlalchemy import event
 from datetime import datetime, timedelta
 
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app import create_app
+from config import Config
 from models import db, Admin, Player, PlayerSession, AdminSession, Tournament, Challenge, Match, PlayerStatus, TournamentStatus, ChallengeStatus, MatchStatus
 
+class TestConfig(Config):
+    """Configuration used by the test app (applied before extensions are initialized)"""
+    __test__ = False
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    WTF_CSRF_ENABLED = False
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLITE_PROFILE = 'default'
+    TOKEN_DENYLIST_PATH = None
+    SCHEDULER_ENABLED = False
+    EXPIRY_TIMER_ENABLED = False
+
 @pytest.fixture(scope='function')
 def app():
     """Create and configure a test app instance"""
-    test_app = create_app()
-    test_app.config.update({
-        'TESTING': True,
-        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
-        'WTF_CSRF_ENABLED': False,
-        'SQLALCHEMY_TRACK_MODIFICATIONS': False
-    })
+    test_app = create_app(TestConfig)
     
     with test_app.app_context():
         db.create_all()
@@ -27,6 +35,115 @@ def app():
         db.session.remove()
         db.drop_all()
 
+class QueryCounter:
+    """Records every SQL statement executed against the test database"""
+    __test__ = False
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def reset(self):
+        self.statements = []
+
+    def assert_at_most(self, limit):
+        assert self.count <= limit, \
+            f'Expected at most {limit} queries, got {self.count}:\n' + '\n'.join(self.statements)
+
+@pytest.fixture(scope='function')
+def query_counter(app):
+    """Count SQL statements; call reset() right before the code being measured"""
+    counter = QueryCounter()
+    event.listen(db.engine, 'before_cursor_execute', counter)
+    yield counter
+    event.remove(db.engine, 'before_cursor_execute', counter)
+
+class QueryPlanRecorder:
+    """Records statements with their parameters and reports the tables SQLite would scan for them"""
+    __test__ = False
+
+    def __init__(self):
+        self.executions = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE', 'WITH')):
+            self.executions.append((statement, parameters))
+
+    def reset(self):
+        self.executions = []
+
+    def table_scans(self):
+        """Return [(statement, plan detail), ...] for every full table or index scan"""
+        scans = []
+        connection = db.engine.raw_connection()
+        try:
+            for statement, parameters in self.executions:
+                for _, _, _, detail in connection.cursor().execute('EXPLAIN QUERY PLAN ' + statement, parameters):
+                    if detail.startswith('SCAN ') and not detail.startswith('SCAN CONSTANT ROW'):
+                        scans.append((statement, detail))
+        finally:
+            connection.close()
+        return scans
+
+    def assert_no_table_scans(self):
+        assert self.executions, 'No statements were recorded'
+        scans = self.table_scans()
+        assert not scans, 'Full scans:\n' + '\n'.join(f'{detail}: {statement}' for statement, detail in scans)
+
+@pytest.fixture(scope='function')
+def query_plans(app):
+    """Record statements for EXPLAIN QUERY PLAN checks; call reset() right before the code being checked"""
+    recorder = QueryPlanRecorder()
+    event.listen(db.engine, 'before_cursor_execute', recorder)
+    yield recorder
+    event.remove(db.engine, 'before_cursor_execute', recorder)
+
+def login(client, player):
+    """Log a player fixture in and return the session token"""
+    return client.post('/player/login', json={
+        'name': player['name'],
+        'password': player['password']
+    }).json['token']
+
+def auth(token):
+    """Authorization header for a session token"""
+    return {'Authorization': f'Bearer {token}'}
+
+def record_match(client, players, winner=0):
+    """Record a result between players 0 and 1, hosted by player 2; returns (host token, response body)"""
+    with client.application.app_context():
+        db.session.add(Match(player1_id=players[0]['id'], player2_id=players[1]['id'], host_id=players[2]['id']))
+        db.session.commit()
+
+    token = login(client, players[2])
+    response = client.post('/matches/result', headers=auth(token), json={
+        'host_id': players[2]['id'],
+        'player1_id': players[0]['id'],
+        'player2_id': players[1]['id'],
+        'winner_id': players[winner]['id']
+    })
+    assert response.status_code == 200
+    return token, response.json
+
+def add_matches(players, count, status=MatchStatus.COMPLETED, swap_every=2):
+    """Add count matches between players 0 and 1 (sides swapped every swap_every matches); returns their IDs"""
+    ids = []
+    for i in range(count):
+        a, b = (players[0], players[1]) if (i // swap_every) % 2 == 0 else (players[1], players[0])
+        match = Match(player1_id=a['id'], player2_id=b['id'], host_id=players[2]['id'],
+                      winner_id=a['id'], status=status, completed_at=datetime.now())
+        db.session.add(match)
+        db.session.flush()
+        ids.append(match.id)
+    db.session.commit()
+    return ids
+
 @pytest.fixture(scope='function')
 def client(app):
     """Create a test client"""
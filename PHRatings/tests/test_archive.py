@@ -0,0 +1,161 @@
+"""Tests for archival of cold challenges, matches and tournaments"""
+import pytest
+from datetime import datetime, timedelta
+from models import db, Challenge, Match, Tournament, TournamentParticipant, \
+    ChallengeStatus, MatchStatus, TournamentStatus, challenge_archive, match_archive, \
+    tournament_archive, tournament_participant_archive
+from app.archive import archive_cold_rows, archive_batch
+
+OLD = datetime.now() - timedelta(days=60)
+
+def add_match(players, status, created_at=OLD, **fields):
+    match = Match(player1_id=players[0]['id'], player2_id=players[1]['id'], host_id=players[2]['id'],
+                  status=status, created_at=created_at, **fields)
+    db.session.add(match)
+    db.session.commit()
+    return match.id
+
+def count(table):
+    return db.session.execute(db.select(db.func.count()).select_from(table)).scalar()
+
+class TestArchiver:
+    """Test which rows are moved and how"""
+
+    def test_archives_only_cold_matches(self, app, multiple_approved_players):
+        """Test that old expired/undone matches move and completed or recent ones stay"""
+        expired = add_match(multiple_approved_players, MatchStatus.EXPIRED)
+        undone = add_match(multiple_approved_players, MatchStatus.UNDONE)
+        completed = add_match(multiple_approved_players, MatchStatus.COMPLETED)
+        recent = add_match(multiple_approved_players, MatchStatus.EXPIRED, created_at=datetime.now())
+        newest = add_match(multiple_approved_players, MatchStatus.EXPIRED)
+
+        report = archive_cold_rows(days=30, batch_size=1)
+
+        assert report['rows_archived']['matches'] == 2
+        assert {m.id for m in Match.query.all()} == {completed, recent, newest}
+        archived = db.session.execute(db.select(match_archive)).all()
+        assert {row.id for row in archived} == {expired, undone}
+        assert all(row.archived_at is not None for row in archived)
+        assert {row.status for row in archived} == {MatchStatus.EXPIRED, MatchStatus.UNDONE}
+
+    def test_archives_tournament_with_participants(self, app, multiple_approved_players):
+        """Test that empty finished tournaments take their participants along"""
+        start = datetime.now() - timedelta(days=60)
+        empty = Tournament(name='Empty', host_id=multiple_approved_players[2]['id'], start_time=start,
+                           status=TournamentStatus.EXPIRED)
+        played = Tournament(name='Played', host_id=multiple_approved_players[2]['id'], start_time=start,
+                            status=TournamentStatus.EXPIRED)
+        newest = Tournament(name='Newest', host_id=multiple_approved_players[2]['id'], start_time=start,
+                            status=TournamentStatus.EXPIRED)
+        db.session.add_all([empty, played, newest])
+        db.session.commit()
+        db.session.add(TournamentParticipant(tournament_id=empty.id, player_id=multiple_approved_players[0]['id']))
+        db.session.commit()
+        add_match(multiple_approved_players, MatchStatus.COMPLETED, tournament_id=played.id)
+
+        report = archive_cold_rows(days=30)
+
+        assert report['rows_archived']['tournaments'] == 1
+        assert Tournament.query.count() == 2
+        assert TournamentParticipant.query.count() == 0
+        assert count(tournament_archive) == 1
+        assert count(tournament_participant_archive) == 1
+
+    def test_reused_participant_id_archives_again(self, app, multiple_approved_players):
+        """Test that a participant ID handed out again after archiving can be archived a second time"""
+        players = multiple_approved_players
+        start = datetime.now() - timedelta(days=60)
+        first, second, newest = [Tournament(name=name, host_id=players[2]['id'], start_time=start,
+                                            status=TournamentStatus.EXPIRED) for name in ('First', 'Second', 'Newest')]
+        db.session.add_all([first, second, newest])
+        db.session.commit()
+        first_id, second_id = first.id, second.id
+        db.session.add(TournamentParticipant(tournament_id=first_id, player_id=players[0]['id']))
+        db.session.commit()
+        # The only participant row goes, so its ID is reused by the next one
+        archive_batch('tournaments', datetime.now(), 1)
+        participant = TournamentParticipant(tournament_id=second_id, player_id=players[1]['id'])
+        db.session.add(participant)
+        db.session.commit()
+        participant_id = participant.id
+
+        assert archive_batch('tournaments', datetime.now(), 1) == 1
+
+        archived = db.session.execute(db.select(tournament_participant_archive)).all()
+        assert [(row.id, row.tournament_id) for row in archived] == [(participant_id, first_id),
+                                                                     (participant_id, second_id)]
+
+    def test_max_batches_bounds_work(self, app, multiple_approved_players):
+        """Test that a run stops after max_batches batches per kind"""
+        for _ in range(6):
+            add_match(multiple_approved_players, MatchStatus.EXPIRED)
+
+        report = archive_cold_rows(days=30, batch_size=2, max_batches=2)
+
+        assert report['rows_archived']['matches'] == 4
+        assert count(match_archive) == 4
+
+    def test_report_and_vacuum(self, app, multiple_approved_players):
+        """Test the size report with a full vacuum"""
+        for _ in range(3):
+            db.session.add(Challenge(challenger_id=multiple_approved_players[0]['id'],
+                                     challenged_id=multiple_approved_players[1]['id'],
+                                     host_id=multiple_approved_players[2]['id'],
+                                     status=ChallengeStatus.EXPIRED, created_at=OLD))
+        db.session.commit()
+
+        report = archive_cold_rows(days=30, vacuum_mode='full')
+
+        assert report['rows_archived']['challenges'] == 2
+        assert report['vacuum'] == 'full'
+        assert report['bytes_reclaimed'] == report['bytes_before'] - report['bytes_after']
+        assert report['free_bytes'] == 0
+        assert count(challenge_archive) == 2
+
+class TestArchiveEndpoints:
+    """Test POST /admin/archive and ?include_archived on the listings"""
+
+    def test_listing_includes_archived_on_request(self, client, admin_token, multiple_approved_players):
+        """Test that archived matches only show up with include_archived=true"""
+        with client.application.app_context():
+            archived_id = add_match(multiple_approved_players, MatchStatus.UNDONE)
+            add_match(multiple_approved_players, MatchStatus.EXPIRED)
+
+        response = client.post('/admin/archive', headers={'Authorization': f'Bearer {admin_token}'}, json={})
+        assert response.status_code == 200
+        assert response.json['rows_archived']['matches'] == 1
+
+        assert len(client.get('/matches').json) == 1
+        listing = client.get('/matches?include_archived=true').json
+        assert len(listing) == 2
+        archived = [m for m in listing if m['archived']]
+        assert [m['id'] for m in archived] == [archived_id]
+        assert archived[0]['status'] == 'undone'
+
+        filtered = client.get('/matches?include_archived=true&status=expired').json
+        assert [m['archived'] for m in filtered] == [False]
+
+    def test_archived_tournaments_and_challenges(self, client, admin_token, multiple_approved_players):
+        """Test the other listings with include_archived=true"""
+        with client.application.app_context():
+            start = datetime.now() - timedelta(days=60)
+            for name in ('Old', 'Newest'):
+                db.session.add(Tournament(name=name, host_id=multiple_approved_players[2]['id'],
+                                          start_time=start, status=TournamentStatus.COMPLETED))
+            db.session.commit()
+
+        client.post('/admin/archive', headers={'Authorization': f'Bearer {admin_token}'}, json={})
+
+        tournaments = client.get('/tournaments?include_archived=true').json
+        assert [(t['name'], t['archived']) for t in tournaments] == [('Newest', False), ('Old', True)]
+        assert tournaments[1]['participant_count'] == 0
+        assert client.get('/challenges?include_archived=1').json == []
+
+    def test_requires_admin_and_valid_options(self, client, admin_token, player_token):
+        """Test authorization and option validation"""
+        assert client.post('/admin/archive', headers={'Authorization': f'Bearer {player_token}'},
+                           json={}).status_code == 401
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        assert client.post('/admin/archive', headers=headers, json={'days': -1}).status_code == 400
+        assert client.post('/admin/archive', headers=headers, json={'batch_size': 0}).status_code == 400
+        assert client.post('/admin/archive', headers=headers, json={'vacuum': 'always'}).status_code == 400
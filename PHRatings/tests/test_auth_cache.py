@@ -0,0 +1,116 @@
+"""Tests for the bearer-token session cache"""
+import pytest
+from datetime import datetime, timedelta
+from models import db
+from app.auth import SessionCache, session_cache, get_authenticated_user, authorize_player_action
+
+class TestSessionCache:
+    """Test the SessionCache container"""
+
+    def test_put_and_get(self):
+        """Test storing and reading back a token resolution"""
+        cache = SessionCache(max_size=10, ttl_seconds=30)
+        expires_at = datetime.now() + timedelta(hours=1)
+        cache.put('abc', 'player', 7, expires_at)
+
+        assert cache.get('abc') == ('player', 7, expires_at)
+        assert cache.get('missing') is None
+
+    def test_evicts_least_recently_used(self):
+        """Test that the least recently used entry is evicted when full"""
+        cache = SessionCache(max_size=2, ttl_seconds=30)
+        expires_at = datetime.now() + timedelta(hours=1)
+        cache.put('a', 'player', 1, expires_at)
+        cache.put('b', 'player', 2, expires_at)
+        cache.get('a')
+        cache.put('c', 'player', 3, expires_at)
+
+        assert cache.get('b') is None
+        assert cache.get('a') is not None
+        assert cache.get('c') is not None
+
+    def test_ttl_and_session_expiry(self):
+        """Test that entries expire after the TTL or when the session expires"""
+        cache = SessionCache(max_size=10, ttl_seconds=0)
+        cache.put('a', 'player', 1, datetime.now() + timedelta(hours=1))
+        assert cache.get('a') is None
+
+        cache = SessionCache(max_size=10, ttl_seconds=30)
+        cache.put('b', 'player', 1, datetime.now() - timedelta(seconds=1))
+        assert cache.get('b') is None
+
+    def test_invalidate_user(self):
+        """Test dropping every token of one user"""
+        cache = SessionCache(max_size=10, ttl_seconds=30)
+        expires_at = datetime.now() + timedelta(hours=1)
+        cache.put('a', 'player', 1, expires_at)
+        cache.put('b', 'player', 1, expires_at)
+        cache.put('c', 'admin', 1, expires_at)
+        cache.invalidate_user('player', 1)
+
+        assert len(cache) == 1
+        assert cache.get('c') is not None
+
+class TestCachedAuthentication:
+    """Test token resolution through the cache"""
+
+    def test_cached_player_request_uses_one_query(self, app, player_token, approved_player, query_counter):
+        """Test that a cached player token costs at most one query"""
+        headers = {'Authorization': f'Bearer {player_token}'}
+        with app.test_request_context(headers=headers):
+            get_authenticated_user()
+        db.session.expunge_all()
+
+        with app.test_request_context(headers=headers):
+            query_counter.reset()
+            user, user_type = get_authenticated_user()
+            player, error = authorize_player_action(approved_player['id'])
+            assert user_type == 'player'
+            assert user.id == approved_player['id']
+            assert error is None
+            query_counter.assert_at_most(1)
+
+    def test_admin_acting_for_player_uses_one_query(self, app, admin_token, approved_player, query_counter):
+        """Test that an admin acting for a player costs at most one query"""
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        with app.test_request_context(headers=headers):
+            authorize_player_action(approved_player['id'])
+        db.session.expunge_all()
+
+        with app.test_request_context(headers=headers):
+            query_counter.reset()
+            player, error = authorize_player_action(approved_player['id'])
+            assert error is None
+            assert player.id == approved_player['id']
+            query_counter.assert_at_most(1)
+
+    def test_logout_invalidates_cached_token(self, client, player_token):
+        """Test that player logout revokes a cached token immediately"""
+        headers = {'Authorization': f'Bearer {player_token}'}
+        assert client.put('/players/weight', headers=headers, json={'weight': 175.0}).status_code == 200
+
+        client.post('/player/logout', headers=headers)
+
+        response = client.put('/players/weight', headers=headers, json={'weight': 176.0})
+        assert response.status_code == 401
+
+    def test_admin_logout_invalidates_cached_token(self, client, admin_token):
+        """Test that admin logout revokes a cached token immediately"""
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        assert client.get('/admin/players/pending', headers=headers).status_code == 200
+
+        client.post('/admin/logout', headers=headers)
+
+        assert client.get('/admin/players/pending', headers=headers).status_code == 401
+
+    def test_cache_disabled_still_authenticates(self, client, player_token):
+        """Test authentication with the cache turned off"""
+        session_cache.enabled = False
+        try:
+            response = client.put('/players/weight',
+                                  headers={'Authorization': f'Bearer {player_token}'},
+                                  json={'weight': 175.0})
+            assert response.status_code == 200
+            assert len(session_cache) == 0
+        finally:
+            session_cache.enabled = True
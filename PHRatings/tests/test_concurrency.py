@@ -0,0 +1,127 @@
+"""Stress tests for concurrent rating writes"""
+import json
+import random
+import threading
+import pytest
+from collections import defaultdict
+from models import db, Player, PlayerStatus, DEFAULT_ELO
+from app import create_app
+from app import importer
+from app.rating_engines import EloEngine
+from app.services import elo_change_for
+from tests.conftest import TestConfig
+
+THREADS = 8
+RESULTS_PER_THREAD = 40
+PLAYERS = 4
+
+@pytest.fixture
+def file_app(tmp_path):
+    """An app on a file database, so every thread gets its own connection"""
+    class FileConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'concurrency.db')
+        SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'timeout': 30}}
+
+    app = create_app(FileConfig)
+    with app.app_context():
+        db.create_all()
+        for i in range(PLAYERS):
+            db.session.add(Player(name=f'Stress{i}', age=30, weight=80.0, password_hash='',
+                                  status=PlayerStatus.APPROVED))
+        db.session.commit()
+        player_ids = [player.id for player in Player.query.all()]
+    yield app, player_ids
+    with app.app_context():
+        db.drop_all()
+
+class TestConcurrentRatingWrites:
+    """Test that concurrent workers never lose a rating update"""
+
+    def test_elo_conserved_under_contention(self, file_app):
+        """Test that many threads rating the same few players conserve ELO and lose no update"""
+        app, player_ids = file_app
+        engine = EloEngine()
+        barrier = threading.Barrier(THREADS)
+        applied = []
+        errors = []
+        lock = threading.Lock()
+
+        def worker(seed):
+            rng = random.Random(seed)
+            try:
+                with app.app_context():
+                    barrier.wait()
+                    for n in range(RESULTS_PER_THREAD):
+                        winner_id, loser_id = rng.sample(player_ids, 2)
+                        winner = db.session.get(Player, winner_id)
+                        loser = db.session.get(Player, loser_id)
+                        if n % 5 == 4:
+                            # Mix in undo-style reverts of a fixed amount
+                            engine.revert_result(winner, loser, 10.0)
+                            change = -10.0
+                        else:
+                            change = engine.record_result(winner, loser)
+                        db.session.commit()
+                        with lock:
+                            applied.append((winner_id, loser_id, change))
+                    db.session.remove()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert len(applied) == THREADS * RESULTS_PER_THREAD
+
+        expected = defaultdict(lambda: float(DEFAULT_ELO))
+        for winner_id, loser_id, change in applied:
+            expected[winner_id] += change
+            expected[loser_id] -= change
+
+        with app.app_context():
+            stored = dict(db.session.execute(db.select(Player.id, Player.elo)).all())
+        assert sum(stored.values()) == pytest.approx(PLAYERS * DEFAULT_ELO)
+        for player_id in player_ids:
+            assert stored[player_id] == pytest.approx(expected[player_id])
+
+    def test_import_keeps_concurrent_result(self, file_app, monkeypatch):
+        """Test that a result recorded while an import is rating is not overwritten by the import"""
+        app, player_ids = file_app
+        winner_id, loser_id, host_id = player_ids[:3]
+        rate = importer.apply_ratings
+        attempts = []
+
+        def record_concurrent_result():
+            with app.app_context():
+                EloEngine().record_result(db.session.get(Player, loser_id), db.session.get(Player, winner_id))
+                db.session.commit()
+                db.session.remove()
+
+        def rate_with_interruption(matches, ratings):
+            # Another worker rates the same players after the import read them, once
+            if not attempts:
+                thread = threading.Thread(target=record_concurrent_result)
+                thread.start()
+                thread.join()
+            attempts.append(dict(ratings))
+            return rate(matches, ratings)
+
+        monkeypatch.setattr(importer, 'apply_ratings', rate_with_interruption)
+        with app.app_context():
+            report, errors = importer.import_matches(json.dumps({
+                'player1': winner_id, 'player2': loser_id, 'winner': winner_id,
+                'timestamp': '2024-01-01T10:00:00', 'host': host_id}), 'ndjson')
+
+            assert errors == [] and report['imported'] == 1
+            # The second attempt rated from the ratings the concurrent result left behind
+            assert len(attempts) == 2
+            after_concurrent = attempts[1]
+            assert after_concurrent[winner_id] < DEFAULT_ELO
+            change = elo_change_for(after_concurrent[winner_id], after_concurrent[loser_id])
+            stored = dict(db.session.execute(db.select(Player.id, Player.elo)).all())
+            assert stored[winner_id] == pytest.approx(after_concurrent[winner_id] + change)
+            assert stored[loser_id] == pytest.approx(after_concurrent[loser_id] - change)
@@ -0,0 +1,155 @@
+"""Tests for the data version and conditional GETs on the listings"""
+import pytest
+import time
+from datetime import datetime, timedelta, timezone
+from werkzeug.http import http_date
+from app import create_app
+from app import data_version
+from app.data_version import current_version
+from app.services import cleanup_expired_challenges
+from models import db, Player, DataVersion, Challenge
+from tests.conftest import TestConfig
+
+def register(client, name):
+    response = client.post('/players', json={'name': name, 'password': 'secret', 'age': 30, 'weight': 170})
+    assert response.status_code == 200
+
+class TestVersionCounter:
+    """Test which transactions bump the version"""
+
+    def test_writes_bump(self, app, client):
+        """Test that a committed write bumps the version and a rollback does not"""
+        with app.app_context():
+            assert current_version() == (0, None)
+        register(client, 'Newcomer')
+
+        with app.app_context():
+            version, changed_at = current_version()
+            assert version == 1
+            assert abs(changed_at - datetime.now(timezone.utc).replace(tzinfo=None)) < timedelta(minutes=1)
+
+            db.session.get(Player, 1).weight = 200
+            db.session.rollback()
+            assert current_version()[0] == 1
+
+    def test_sessions_and_idle_sweeps_do_not_bump(self, app, client, multiple_approved_players):
+        """Test that logins and sweeps that change nothing leave the version alone"""
+        with app.app_context():
+            before = current_version()
+        client.post('/player/login', json={'name': 'Player1', 'password': 'password1'})
+        with app.app_context():
+            assert cleanup_expired_challenges() == 0
+            db.session.commit()
+            assert current_version() == before
+
+    def test_shared_across_engines(self, tmp_path):
+        """Test that a write through one engine (worker process) is seen by another"""
+        class FileConfig(TestConfig):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'version.db')
+
+        writer, reader = create_app(FileConfig), create_app(FileConfig)
+        with writer.app_context():
+            db.create_all()
+        etag = reader.test_client().get('/players').headers['ETag']
+
+        register(writer.test_client(), 'Elsewhere')
+
+        response = reader.test_client().get('/players', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+        for app in (writer, reader):
+            with app.app_context():
+                db.engine.dispose()
+
+class TestConditionalGet:
+    """Test ETag and Last-Modified handling on the listings"""
+
+    @pytest.mark.parametrize('listing', ['/players', '/matches', '/challenges', '/tournaments'])
+    def test_not_modified_until_a_write(self, client, challenge, listing):
+        """Test 304 for the current ETag, and a fresh 200 after a write"""
+        first = client.get(listing)
+        first.close()
+        etag = first.headers['ETag']
+        assert etag.startswith('W/"v')
+        assert first.headers['Last-Modified']
+        assert 'no-cache' in first.headers['Cache-Control']
+
+        response = client.get(listing, headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.data == b''
+        assert response.headers['ETag'] == etag
+
+        register(client, 'Changer')
+        response = client.get(listing, headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+
+    def test_if_modified_since(self, app, client, challenge):
+        """Test If-Modified-Since against the time of the last change"""
+        with app.app_context():
+            changed_at = current_version()[1]
+        later = http_date(changed_at + timedelta(seconds=1))
+        earlier = http_date(changed_at - timedelta(seconds=1))
+
+        assert client.get('/challenges', headers={'If-Modified-Since': later}).status_code == 304
+        assert client.get('/challenges', headers={'If-Modified-Since': earlier}).status_code == 200
+        # If-None-Match takes precedence
+        assert client.get('/challenges', headers={'If-Modified-Since': later,
+                                                  'If-None-Match': 'W/"v0"'}).status_code == 200
+
+    def test_change_within_the_same_second(self, app, client, challenge, monkeypatch):
+        """Test that a copy from the second of the last change is not revalidated with 304 until that second is over"""
+        second = datetime(2024, 5, 1, 12, 0, 0)
+        changed = {}
+
+        def change_at(offset):
+            with app.app_context():
+                changed['at'] = second + timedelta(microseconds=offset)
+                db.session.execute(db.update(DataVersion).values(changed_at=changed['at']))
+                db.session.commit()
+
+        monkeypatch.setattr(data_version, '_utcnow', lambda: changed['now'])
+        change_at(300_000)
+        changed['now'] = second + timedelta(microseconds=500_000)
+        response = client.get('/challenges')
+        assert response.headers['Last-Modified'] == http_date(second)
+        # Changed again later in the same second: the copy must not be confirmed
+        change_at(800_000)
+        assert client.get('/challenges', headers={'If-Modified-Since': http_date(second)}).status_code == 200
+
+        changed['now'] = second + timedelta(seconds=2)
+        response = client.get('/challenges')
+        assert response.headers['Last-Modified'] == http_date(second + timedelta(seconds=1))
+        assert client.get('/challenges', headers={'If-Modified-Since': response.headers['Last-Modified']}) \
+            .status_code == 304
+
+    def test_deadline_passing_without_a_write(self, app, client, challenge, query_plans):
+        """Test that a challenge expiring on the clock alone changes the ETag"""
+        with app.app_context():
+            db.session.execute(db.update(Challenge).values(expires_at=datetime.now() + timedelta(seconds=0.3)))
+            db.session.commit()
+        first = client.get('/challenges')
+        assert first.json[0]['status'] == 'pending'
+        first.close()
+        assert client.get('/challenges', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+        time.sleep(0.4)
+        response = client.get('/challenges', headers={'If-None-Match': first.headers['ETag']})
+        assert response.status_code == 200
+        assert response.json[0]['status'] == 'expired'
+        response.close()
+        assert response.headers['ETag'] != first.headers['ETag']
+        query_plans.reset()
+        assert client.get('/challenges', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+        query_plans.assert_no_table_scans()
+
+        # The sweep stores the expiry: a write, so the tag moves on again
+        with app.app_context():
+            assert cleanup_expired_challenges() == 1
+        assert client.get('/challenges', headers={'If-None-Match': response.headers['ETag']}).status_code == 200
+
+    def test_errors_are_not_tagged(self, client):
+        """Test that a rejected request gets no validators"""
+        response = client.get('/challenges?status=bogus')
+        assert response.status_code == 400
+        assert 'ETag' not in response.headers
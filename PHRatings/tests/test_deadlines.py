@@ -0,0 +1,131 @@
+"""Tests for the deadline-driven expiry timer"""
+import time
+import pytest
+from datetime import datetime, timedelta
+from models import db, Player, PlayerStatus, Challenge, Match, Tournament, \
+    ChallengeStatus, MatchStatus, TournamentStatus
+from app import create_app
+from app.deadlines import expiry_timer
+from tests.conftest import TestConfig
+
+class TestExpiryTimer:
+    """Test deadline bookkeeping and transitions"""
+
+    def test_pop_due_in_deadline_order(self, app):
+        """Test that only due entries are popped, earliest first"""
+        now = datetime.now()
+        expiry_timer.schedule('challenge_expiry', 3, now + timedelta(minutes=3))
+        expiry_timer.schedule('challenge_expiry', 1, now + timedelta(minutes=1))
+        expiry_timer.schedule('challenge_expiry', 2, now + timedelta(minutes=2))
+
+        due = expiry_timer.pop_due(now + timedelta(minutes=2))
+        assert [object_id for _, _, object_id in due] == [1, 2]
+        assert len(expiry_timer) == 1
+        assert expiry_timer.next_due() == now + timedelta(minutes=3)
+
+    def test_created_challenge_expires_when_due(self, client, player_token, multiple_approved_players, approved_player):
+        """Test that creating a challenge schedules its expiry"""
+        response = client.post('/challenges', headers={'Authorization': f'Bearer {player_token}'}, json={
+            'challenger_id': approved_player['id'],
+            'challenged_id': multiple_approved_players[0]['id'],
+            'host_id': multiple_approved_players[1]['id']
+        })
+        challenge_id = response.json['challenge_id']
+        due = datetime.fromisoformat(response.json['expires_at'])
+        assert expiry_timer.next_due() == due
+
+        with client.application.app_context():
+            assert expiry_timer.fire_due(due - timedelta(seconds=1)) == 0
+            assert expiry_timer.fire_due(due) == 1
+            assert db.session.get(Challenge, challenge_id).status == ChallengeStatus.EXPIRED
+        assert len(expiry_timer) == 0
+
+    def test_stale_entry_is_noop(self, app, challenge):
+        """Test that a deadline for a challenge that was accepted meanwhile changes nothing"""
+        db.session.get(Challenge, challenge['id']).status = ChallengeStatus.MATCH_CREATED
+        db.session.commit()
+
+        expiry_timer.schedule('challenge_expiry', challenge['id'], datetime.now() - timedelta(seconds=1))
+        assert expiry_timer.fire_due() == 0
+        assert db.session.get(Challenge, challenge['id']).status == ChallengeStatus.MATCH_CREATED
+
+    def test_rebuild_and_tournament_lifecycle(self, app, tournament, pending_match):
+        """Test that rebuild finds pending deadlines and a tournament starts then ends"""
+        assert expiry_timer.rebuild() == 3  # match expiry, tournament start and end
+
+        t = db.session.get(Tournament, tournament['id'])
+        start, end = t.start_time, t.expires_at
+        match_due = db.session.get(Match, pending_match['id']).expires_at
+
+        expiry_timer.fire_due(start)
+        db.session.expire_all()
+        assert db.session.get(Tournament, tournament['id']).status == TournamentStatus.ACTIVE
+
+        expiry_timer.fire_due(max(end, match_due))
+        db.session.expire_all()
+        assert db.session.get(Tournament, tournament['id']).status == TournamentStatus.EXPIRED
+        assert db.session.get(Match, pending_match['id']).status == MatchStatus.EXPIRED
+
+    def test_failed_transition_backs_off(self, app, challenge, monkeypatch):
+        """Test that deadlines whose transition fails are retried later, with a growing delay"""
+        now = datetime.now()
+        expiry_timer.schedule('challenge_expiry', challenge['id'], now - timedelta(seconds=1))
+
+        def fail():
+            raise RuntimeError('database is locked')
+        monkeypatch.setattr(db.session, 'commit', fail)
+        with pytest.raises(RuntimeError):
+            expiry_timer.fire_due(now)
+        assert expiry_timer.next_due() == now + timedelta(seconds=1)
+        assert expiry_timer.fire_due(now + timedelta(milliseconds=500)) == 0
+        with pytest.raises(RuntimeError):
+            expiry_timer.fire_due(now + timedelta(seconds=1))
+        assert expiry_timer.next_due() == now + timedelta(seconds=3)
+        assert expiry_timer.stats()['consecutive_failures'] == 2
+
+        monkeypatch.undo()
+        db.session.get(Challenge, challenge['id']).expires_at = now - timedelta(seconds=1)
+        db.session.commit()
+        assert expiry_timer.fire_due(now + timedelta(seconds=3)) == 1
+        assert expiry_timer.stats()['consecutive_failures'] == 0
+
+class TestExpiryTimerThread:
+    """Test the timer thread against a file database"""
+
+    def test_fires_without_polling(self, tmp_path):
+        """Test that a deadline scheduled after start wakes the thread and is applied"""
+        class FileConfig(TestConfig):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'timer.db')
+
+        app = create_app(FileConfig)
+        with app.app_context():
+            db.create_all()
+            players = [Player(name=f'T{i}', age=30, weight=80.0, password_hash='', status=PlayerStatus.APPROVED)
+                       for i in range(3)]
+            db.session.add_all(players)
+            db.session.flush()
+            challenge = Challenge(challenger_id=players[0].id, challenged_id=players[1].id, host_id=players[2].id)
+            challenge.expires_at = datetime.now() + timedelta(hours=1)
+            db.session.add(challenge)
+            db.session.commit()
+            challenge_id = challenge.id
+            db.session.remove()
+
+        expiry_timer.start()
+        try:
+            due = datetime.now() + timedelta(milliseconds=200)
+            with app.app_context():
+                db.session.query(Challenge).filter_by(id=challenge_id).update({'expires_at': due})
+                db.session.commit()
+                db.session.remove()
+            expiry_timer.schedule('challenge_expiry', challenge_id, due)
+
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline and expiry_timer.transitions == 0:
+                time.sleep(0.05)
+        finally:
+            expiry_timer.stop()
+
+        assert expiry_timer.transitions == 1
+        with app.app_context():
+            assert db.session.get(Challenge, challenge_id).status == ChallengeStatus.EXPIRED
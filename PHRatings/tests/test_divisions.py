@@ -0,0 +1,140 @@
+"""Tests for stored weight/age divisions"""
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from app.divisions import class_for, current_age, next_age_change, roll_divisions
+from app.scheduler import scheduler
+from models import db, Player, PlayerStatus
+
+WEIGHT_CLASSES = [('light', 150), ('middle', 180), ('heavy', None)]
+
+def add_player(app, name, weight=170.0, age=30, elo=1200.0, status=PlayerStatus.APPROVED, registered=None):
+    with app.app_context():
+        player = Player(name=name, age=age, weight=weight, elo=elo, password_hash='', status=status,
+                        registration_date=registered)
+        db.session.add(player)
+        db.session.commit()
+        return player.id, player.division
+
+class TestDivisionKeys:
+    """Test class boundaries and age roll times"""
+
+    def test_class_for(self):
+        """Test that a value falls in the first class whose bound is above it"""
+        assert class_for(WEIGHT_CLASSES, 120) == 'light'
+        assert class_for(WEIGHT_CLASSES, 150) == 'middle'
+        assert class_for(WEIGHT_CLASSES, 179.9) == 'middle'
+        assert class_for(WEIGHT_CLASSES, 400) == 'heavy'
+
+    def test_next_age_change_matches_current_age(self):
+        """Test that the refresh time is exactly when the computed age increases"""
+        registered = datetime(2020, 3, 1, 12, 0)
+        for now in (datetime(2020, 3, 1, 12, 0), datetime(2021, 2, 28), datetime(2023, 11, 5)):
+            change = next_age_change(registered, now)
+            assert change > now
+            before = current_age(30, registered, now)
+            assert current_age(30, registered, change - timedelta(seconds=1)) == before
+            assert current_age(30, registered, change) == before + 1
+
+class TestDivisionAssignment:
+    """Test that stored keys follow registration, weight changes and birthdays"""
+
+    def test_registration_assigns_division(self, client):
+        """Test the key returned on registration"""
+        response = client.post('/players', json={'name': 'Newcomer', 'password': 'secret', 'age': 16, 'weight': 150})
+        assert response.json['division'] == 'lightweight/junior'
+
+    def test_weight_update_moves_division(self, client, approved_player, player_token):
+        """Test that PUT /players/weight refreshes the key"""
+        assert client.get('/players').json[0]['division'] == 'cruiserweight/open'
+        response = client.put('/players/weight', headers={'Authorization': f'Bearer {player_token}'},
+                              json={'weight': 120})
+        assert response.status_code == 200
+        assert response.json['division'] == 'flyweight/open'
+        assert client.get('/players?division=flyweight/open').json[0]['id'] == approved_player['id']
+
+    def test_numeric_strings_and_bad_input(self, client, approved_player, player_token):
+        """Test that numbers sent as strings are stored as numbers and anything else is a 400"""
+        response = client.post('/players', json={'name': 'Strings', 'password': 'secret', 'age': '30', 'weight': '150'})
+        assert response.status_code == 200
+        assert (response.json['age'], response.json['weight'], response.json['division']) == \
+            (30, 150.0, 'lightweight/open')
+
+        for age, weight in (('thirty', 150), (30, 'heavy'), (30.5, 150), (30, 'nan'), (True, 150)):
+            response = client.post('/players', json={'name': 'Bad', 'password': 'secret', 'age': age, 'weight': weight})
+            assert response.status_code == 400
+
+        headers = {'Authorization': f'Bearer {player_token}'}
+        response = client.put('/players/weight', headers=headers, json={'weight': '125.5'})
+        assert (response.status_code, response.json['new_weight'], response.json['division']) == \
+            (200, 125.5, 'flyweight/open')
+        assert client.put('/players/weight', headers=headers, json={'weight': 'a lot'}).status_code == 400
+
+    def test_failed_commit_is_500(self, client, monkeypatch):
+        """Test that a database error on commit becomes a JSON 500"""
+        def fail():
+            raise RuntimeError('disk full')
+        monkeypatch.setattr(db.session, 'commit', fail)
+        response = client.post('/players', json={'name': 'Unlucky', 'password': 'secret', 'age': 30, 'weight': 150})
+        assert response.status_code == 500
+        assert response.json == {'error': 'Database error occurred'}
+
+    def test_age_roll(self, app):
+        """Test that the roll job moves a player whose age crossed a class bound"""
+        player_id, division = add_player(app, 'Birthday', age=34, registered=datetime.now() - timedelta(days=300))
+        assert division == 'middleweight/open'
+        with app.app_context():
+            assert roll_divisions() == 0
+
+            # A year passes: move the registration (and the refresh time) back
+            db.session.execute(update(Player).where(Player.id == player_id).values(
+                registration_date=datetime.now() - timedelta(days=700),
+                division_refresh_at=datetime.now() - timedelta(days=1)))
+            db.session.commit()
+            assert scheduler.run_job('division_roll') == 1
+
+            player = db.session.get(Player, player_id)
+            assert player.division == 'middleweight/masters'
+            assert player.division_refresh_at > datetime.now()
+
+class TestDivisionEndpoints:
+    """Test division listings, leaderboards and opponent searches"""
+
+    def test_list_divisions(self, client, multiple_approved_players, pending_player):
+        """Test classes and per-division counts of approved players"""
+        response = client.get('/divisions')
+        assert response.json['weight_classes'][-1] == {'name': 'heavyweight', 'under': None}
+        counts = {d['division']: d['players'] for d in response.json['divisions']}
+        assert len(counts) == 20
+        assert (counts['middleweight/open'], counts['cruiserweight/open'], counts['lightweight/open']) == (2, 1, 0)
+        assert client.get('/players?division=nope').status_code == 400
+
+    def test_division_leaderboard(self, client, app):
+        """Test ranks with ties inside one division, other divisions excluded"""
+        ids = [add_player(app, f'Mid{i}', elo=elo)[0] for i, elo in enumerate([1300, 1400, 1300, 1250])]
+        add_player(app, 'Heavy', weight=250, elo=2000)
+        add_player(app, 'Pending', elo=1500, status=PlayerStatus.PENDING)
+
+        response = client.get('/divisions/middleweight/open/leaderboard?offset=1&limit=3')
+        assert response.status_code == 200
+        assert response.json['total_players'] == 4
+        assert [(p['rank'], p['id']) for p in response.json['players']] == [(2, ids[0]), (2, ids[2]), (4, ids[3])]
+        assert client.get('/divisions/middleweight/ancient/leaderboard').status_code == 404
+
+    def test_eligible_opponents(self, client, app):
+        """Test same-division approved opponents, optionally within a rating range"""
+        me, _ = add_player(app, 'Me', elo=1400)
+        near, _ = add_player(app, 'Near', elo=1450)
+        far, _ = add_player(app, 'Far', elo=1700)
+        add_player(app, 'Junior', age=15, elo=1400)
+        pending, _ = add_player(app, 'Pending', status=PlayerStatus.PENDING)
+
+        response = client.get(f'/players/{me}/opponents')
+        assert response.json['division'] == 'middleweight/open'
+        assert [p['id'] for p in response.json['opponents']] == [far, near]
+        response = client.get(f'/players/{me}/opponents?elo_range=100')
+        assert [p['id'] for p in response.json['opponents']] == [near]
+
+        assert client.get(f'/players/{pending}/opponents').status_code == 400
+        assert client.get(f'/players/{me}/opponents?elo_range=wide').status_code == 400
+        assert client.get('/players/9999/opponents').status_code == 404
@@ -0,0 +1,126 @@
+"""Tests for read-time derived status"""
+import sqlite3
+import pytest
+from datetime import datetime, timedelta
+from models import db, Challenge, Match, Tournament, ChallengeStatus, MatchStatus, TournamentStatus
+from app import create_app
+from tests.conftest import TestConfig, login, auth
+
+def add_tournament(host_id, name, start, status=TournamentStatus.REGISTRATION_OPEN):
+    tournament = Tournament(name=name, host_id=host_id, start_time=start, status=status)
+    db.session.add(tournament)
+    return tournament
+
+class TestEffectiveStatus:
+    """Test that the Python property and the SQL expression agree"""
+
+    def test_tournament_transitions(self, app, approved_player):
+        """Test every tournament transition in Python and in SQL"""
+        now = datetime.now()
+        cases = {
+            'future': (add_tournament(approved_player['id'], 'future', now + timedelta(hours=1)),
+                       TournamentStatus.REGISTRATION_OPEN),
+            'started': (add_tournament(approved_player['id'], 'started', now - timedelta(hours=1)),
+                        TournamentStatus.ACTIVE),
+            'over': (add_tournament(approved_player['id'], 'over', now - timedelta(days=2)),
+                     TournamentStatus.EXPIRED),
+            'active over': (add_tournament(approved_player['id'], 'active over', now - timedelta(days=2),
+                                           TournamentStatus.ACTIVE), TournamentStatus.EXPIRED),
+            'completed': (add_tournament(approved_player['id'], 'completed', now - timedelta(days=2),
+                                         TournamentStatus.COMPLETED), TournamentStatus.COMPLETED),
+        }
+        db.session.commit()
+
+        for name, (tournament, expected) in cases.items():
+            assert tournament.effective_status == expected, name
+
+        from_sql = dict(db.session.execute(db.select(Tournament.name, Tournament.effective_status)).all())
+        assert from_sql == {name: expected for name, (_, expected) in cases.items()}
+
+    def test_challenge_and_match_expiry(self, app, challenge, pending_match):
+        """Test expiry of pending challenges and matches in Python and in SQL"""
+        db.session.get(Challenge, challenge['id']).expires_at = datetime.now() - timedelta(seconds=1)
+        db.session.commit()
+
+        assert db.session.get(Challenge, challenge['id']).effective_status == ChallengeStatus.EXPIRED
+        assert Challenge.query.filter(Challenge.effective_status == ChallengeStatus.EXPIRED).count() == 1
+        assert Challenge.query.filter_by(status=ChallengeStatus.PENDING).count() == 1
+
+        assert Match.query.filter(Match.effective_status == MatchStatus.PENDING).count() == 1
+        db.session.get(Match, pending_match['id']).expires_at = None
+        db.session.commit()
+        assert Match.query.filter(Match.effective_status == MatchStatus.PENDING).count() == 1
+
+class TestExpiredWrites:
+    """Test that writes to expired objects say so"""
+
+    def test_accept_expired_challenge(self, client, challenge, multiple_approved_players):
+        """Test accepting a challenge past its deadline"""
+        with client.application.app_context():
+            db.session.get(Challenge, challenge['id']).expires_at = datetime.now() - timedelta(seconds=1)
+            db.session.commit()
+
+        response = client.post(f'/challenges/{challenge["id"]}/accept',
+                               headers=auth(login(client, multiple_approved_players[1])), json={})
+        assert (response.status_code, response.json) == (400, {'error': 'Challenge has expired'})
+
+    def test_record_match_in_expired_tournament(self, client, multiple_approved_players):
+        """Test recording a result after the tournament ended"""
+        players = multiple_approved_players
+        with client.application.app_context():
+            tournament = add_tournament(players[2]['id'], 'Over', datetime.now() - timedelta(days=2),
+                                        TournamentStatus.ACTIVE)
+            db.session.commit()
+            tournament_id = tournament.id
+
+        response = client.post(f'/tournaments/{tournament_id}/record-match', headers=auth(login(client, players[2])),
+                               json={'host_id': players[2]['id'], 'player1_id': players[0]['id'],
+                                     'player2_id': players[1]['id'], 'winner_id': players[0]['id']})
+        assert (response.status_code, response.json) == (400, {'error': 'Tournament has expired'})
+
+class TestStatusFilters:
+    """Test ?status= on the listing endpoints"""
+
+    def test_filter_tournaments(self, client, tournament):
+        """Test filtering tournaments by effective status"""
+        assert len(client.get('/tournaments?status=registration_open').json) == 1
+        assert client.get('/tournaments?status=active').json == []
+        assert client.get('/tournaments?status=bogus').status_code == 400
+
+    def test_filter_challenges(self, client, challenge):
+        """Test filtering challenges by effective status"""
+        assert len(client.get('/challenges?status=pending').json) == 1
+        assert client.get('/challenges?status=expired').json == []
+
+class TestReadsDuringWrites:
+    """Test that GET endpoints work while another connection holds the write lock"""
+
+    def test_listing_while_locked(self, tmp_path):
+        """Test that listings with due transitions are answered without waiting for the write lock"""
+        path = tmp_path / 'locked.db'
+
+        class FileConfig(TestConfig):
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+            SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'timeout': 0.2}}
+
+        app = create_app(FileConfig)
+        with app.app_context():
+            db.create_all()
+            from models import Player, PlayerStatus
+            host = Player(name='Host', age=30, weight=80.0, password_hash='', status=PlayerStatus.APPROVED)
+            db.session.add(host)
+            db.session.flush()
+            add_tournament(host.id, 'started', datetime.now() - timedelta(hours=1))
+            db.session.commit()
+            db.session.remove()
+
+        writer = sqlite3.connect(path)
+        writer.execute('BEGIN IMMEDIATE')
+        try:
+            response = app.test_client().get('/tournaments')
+        finally:
+            writer.rollback()
+            writer.close()
+
+        assert response.status_code == 200
+        assert response.json[0]['status'] == 'active'
@@ -0,0 +1,91 @@
+"""Tests for bulk historical match import"""
+import json
+import pytest
+from models import db, Player, Match, MatchStatus, RatingHistory
+from app.importer import import_matches, ImportFormatError
+from app.replay import verify_ratings
+
+CSV_HEADER = 'player1,player2,winner,timestamp,host,notes\n'
+
+class TestImportMatches:
+    """Test validation and rating application"""
+
+    def test_csv_by_name_applied_chronologically(self, app, multiple_approved_players):
+        """Test that rows are rated in timestamp order, not file order"""
+        text = CSV_HEADER + \
+            'Player1,Player2,Player2,2024-01-02T10:00:00,Player3,rematch\n' + \
+            'Player1,Player2,Player1,2024-01-01T10:00:00,Player3,\n'
+
+        report, errors = import_matches(text, 'csv')
+
+        assert errors == []
+        assert report['imported'] == 2
+        first, second = Match.query.order_by(Match.completed_at).all()
+        assert first.winner_id == multiple_approved_players[0]['id']
+        assert first.elo_change == pytest.approx(16)
+        assert second.notes == 'rematch'
+        assert second.status == MatchStatus.COMPLETED
+        assert RatingHistory.query.count() == 4
+        assert verify_ratings()['divergent_player_count'] == 0
+
+    def test_ndjson_by_id(self, app, multiple_approved_players):
+        """Test NDJSON input with numeric player IDs"""
+        p1, p2, host = (p['id'] for p in multiple_approved_players)
+        text = json.dumps({'player1': p1, 'player2': p2, 'winner': p1,
+                           'timestamp': '2024-01-01T10:00:00', 'host': host}) + '\n'
+
+        report, errors = import_matches(text, 'ndjson')
+
+        assert errors == []
+        assert db.session.get(Player, p1).elo == pytest.approx(1216)
+
+    def test_invalid_rows_reject_everything(self, app, multiple_approved_players):
+        """Test that one bad row means nothing is written, with errors by line"""
+        text = CSV_HEADER + \
+            'Player1,Player2,Player1,2024-01-01T10:00:00,Player3,\n' + \
+            'Player1,Nobody,Player1,2024-01-01T11:00:00,Player3,\n' + \
+            'Player1,Player2,Player3,2024-01-01T12:00:00,Player3,\n' + \
+            'Player1,Player2,Player1,not-a-date,Player3,\n'
+
+        report, errors = import_matches(text, 'csv')
+
+        assert report['error_count'] == 3
+        assert [e['line'] for e in errors] == [3, 4, 5]
+        assert Match.query.count() == 0
+        assert db.session.get(Player, multiple_approved_players[0]['id']).elo == 1200
+
+    def test_rejects_results_before_existing_history(self, app, multiple_approved_players):
+        """Test that results older than a player's last recorded match are refused"""
+        text = CSV_HEADER + 'Player1,Player2,Player1,2024-01-02T10:00:00,Player3,\n'
+        import_matches(text, 'csv')
+
+        text = CSV_HEADER + 'Player2,Player1,Player1,2024-01-01T10:00:00,Player3,\n'
+        _, errors = import_matches(text, 'csv')
+        assert 'Predates' in errors[0]['error']
+
+    def test_missing_header(self, app):
+        """Test that a CSV without the required columns is a format error"""
+        with pytest.raises(ImportFormatError):
+            import_matches('a,b\n1,2\n', 'csv')
+
+class TestImportEndpoint:
+    """Test POST /admin/matches/import"""
+
+    def test_requires_admin(self, client, player_token):
+        """Test that players cannot import"""
+        response = client.post('/admin/matches/import', headers={'Authorization': f'Bearer {player_token}'},
+                               data=CSV_HEADER, content_type='text/csv')
+        assert response.status_code == 401
+
+    def test_import_csv(self, client, admin_token, multiple_approved_players):
+        """Test a successful CSV import and a rejected one"""
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        response = client.post('/admin/matches/import', headers=headers, content_type='text/csv',
+                               data=CSV_HEADER + 'Player1,Player2,Player1,2024-01-01T10:00:00,Player3,\n')
+        assert response.status_code == 200
+        assert response.json['imported'] == 1
+
+        response = client.post('/admin/matches/import', headers=headers, content_type='text/csv',
+                               data=CSV_HEADER + 'Player1,Player1,Player1,2024-02-01T10:00:00,Player3,\n')
+        assert response.status_code == 400
+        assert response.json['errors'][0]['error'] == 'Cannot play against yourself'
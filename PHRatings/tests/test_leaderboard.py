@@ -0,0 +1,217 @@
+"""Tests for the in-memory leaderboard"""
+import pytest
+from app import create_app
+from app.data_version import current_version
+from app.leaderboard import FenwickTree, Leaderboard, leaderboard
+from models import db, Player, PlayerStatus
+from tests.conftest import TestConfig, record_match
+
+def add_players(app, ratings, status=PlayerStatus.APPROVED, prefix='Rated'):
+    """Insert players with the given ratings; returns their IDs"""
+    with app.app_context():
+        players = [Player(name=f'{prefix}{i}', age=30, weight=170.0, password_hash='', elo=elo, status=status)
+                   for i, elo in enumerate(ratings)]
+        db.session.add_all(players)
+        db.session.commit()
+        return [p.id for p in players]
+
+class TestFenwickTree:
+    """Test the prefix-sum tree over bucket sizes"""
+
+    def test_prefix_and_find(self):
+        """Test prefix sums and locating the k-th item across empty counters"""
+        counts = [2, 0, 3, 0, 0, 1, 4]
+        tree = FenwickTree(counts)
+        for index in range(len(counts) + 1):
+            assert tree.prefix(index) == sum(counts[:index])
+
+        expected = [(i, k) for i, count in enumerate(counts) for k in range(count)]
+        assert [tree.find(k) for k in range(sum(counts))] == expected
+
+        tree.add(1, 2)
+        tree.add(6, -4)
+        assert tree.prefix(7) == 8
+        assert tree.find(2) == (1, 0)
+
+class TestRanking:
+    """Test ordering and ranks"""
+
+    def test_ties_share_a_rank(self, app):
+        """Test competition ranking with ties and ties broken by ID in the order"""
+        ids = add_players(app, [1500, 1600, 1500, 1400, 1600])
+        with app.app_context():
+            total, entries = leaderboard.top(0, 10)
+            assert total == 5
+            assert [(rank, player_id) for rank, player_id, _, _ in entries] == [
+                (1, ids[1]), (1, ids[4]), (3, ids[0]), (3, ids[2]), (5, ids[3])
+            ]
+            # A page starting inside a tie keeps the tie's rank
+            assert [rank for rank, _, _, _ in leaderboard.top(3, 2)[1]] == [3, 5]
+            assert leaderboard.rank(ids[2])[0] == 3
+
+    def test_out_of_range_and_fractional_ratings(self, app):
+        """Test ratings outside the bucket range and within one bucket still order correctly"""
+        board = Leaderboard(min_rating=1000, max_rating=2000, bucket_width=100)
+        ids = add_players(app, [2500.5, 900, 1210.25, 1210.75, 2100])
+        with app.app_context():
+            _, entries = board.top(0, 10)
+            assert [player_id for _, player_id, _, _ in entries] == [ids[0], ids[4], ids[3], ids[2], ids[1]]
+            assert board.verify()['consistent']
+
+    def test_pending_players_excluded(self, app):
+        """Test that only approved players are ranked"""
+        approved = add_players(app, [1300])
+        pending = add_players(app, [1400], status=PlayerStatus.PENDING, prefix='Pending')
+        with app.app_context():
+            assert len(leaderboard) == 1
+            assert leaderboard.rank(pending[0]) is None
+            assert leaderboard.rank(approved[0])[0] == 1
+
+class TestSynchronisation:
+    """Test that the board follows committed changes"""
+
+    def test_result_updates_without_rebuild(self, app, client, multiple_approved_players, monkeypatch):
+        """Test that a recorded result is applied incrementally"""
+        players = multiple_approved_players
+        with app.app_context():
+            leaderboard.sync()
+        rebuilds = []
+        monkeypatch.setattr(leaderboard, 'rebuild', lambda *args: rebuilds.append(args))
+
+        record_match(client, players, winner=1)
+
+        with app.app_context():
+            rank, _, elo, _ = leaderboard.rank(players[1]['id'])
+            assert (rank, elo) == (1, pytest.approx(1216))
+            assert leaderboard.rank(players[0]['id'])[0] == 3
+            assert leaderboard.version == current_version()[0]
+        assert rebuilds == []
+
+    def test_approval_adds_player(self, client, admin_token, pending_player):
+        """Test that approving a player puts them on the board"""
+        with client.application.app_context():
+            assert leaderboard.rank(pending_player['id']) is None
+        response = client.post(f'/admin/players/{pending_player["id"]}/approve',
+                               headers={'Authorization': f'Bearer {admin_token}'})
+        assert response.status_code == 200
+        with client.application.app_context():
+            assert leaderboard.rank(pending_player['id'])[0] == 1
+            assert leaderboard.version == current_version()[0]
+
+    def test_orm_rating_write_applied(self, app, multiple_approved_players, monkeypatch):
+        """Test that a rating set on the ORM object is picked up without a rebuild"""
+        players = multiple_approved_players
+        with app.app_context():
+            leaderboard.sync()
+            monkeypatch.setattr(leaderboard, 'rebuild', None)
+            db.session.get(Player, players[2]['id']).elo = 1800
+            db.session.commit()
+            assert leaderboard.rank(players[2]['id'])[0] == 1
+            assert leaderboard.verify()['consistent']
+
+    def test_unrelated_player_write_reads_nothing(self, app, client, multiple_approved_players, player_token,
+                                                  monkeypatch):
+        """Test that a weight change moves the data version but neither rebuilds nor re-reads any player"""
+        with app.app_context():
+            leaderboard.sync()
+            version = leaderboard.version
+        monkeypatch.setattr(leaderboard, 'rebuild', None)
+        applied = []
+        apply_changes = leaderboard.apply_changes
+        monkeypatch.setattr(leaderboard, 'apply_changes', lambda version: applied.append(apply_changes(version)))
+
+        response = client.put('/players/weight', headers={'Authorization': f'Bearer {player_token}'},
+                              json={'weight': 120})
+        assert response.status_code == 200
+
+        with app.app_context():
+            assert leaderboard.rank(multiple_approved_players[0]['id'])[0] == 1
+            assert leaderboard.version > version
+        assert applied == [0]
+
+    def test_write_from_another_process(self, tmp_path, monkeypatch):
+        """Test that a write through another engine (worker process) is applied without a rebuild"""
+        class FileConfig(TestConfig):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'leaderboard.db')
+
+        reader, writer = create_app(FileConfig), create_app(FileConfig)
+        with reader.app_context():
+            db.create_all()
+        ids = add_players(reader, [1200, 1300])
+        with reader.app_context():
+            assert leaderboard.rank(ids[0])[0] == 2
+
+        with writer.app_context():
+            db.session.get(Player, ids[0]).elo = 1400
+            db.session.commit()
+
+        with reader.app_context():
+            monkeypatch.setattr(leaderboard, 'rebuild', None)
+            assert leaderboard.rank(ids[0])[0] == 1
+            monkeypatch.undo()
+            assert leaderboard.verify()['consistent']
+        for app in (reader, writer):
+            with app.app_context():
+                db.engine.dispose()
+
+    def test_verify_detects_and_repairs(self, app):
+        """Test verify against SQL, and a rebuild of a corrupted board with apply"""
+        ids = add_players(app, [1500, 1400, 1300])
+        with app.app_context():
+            report = leaderboard.verify()
+            assert report['consistent'] and report['players_checked'] == 3
+
+            # Corrupt the board without moving the data version
+            leaderboard._remove(ids[2])
+            leaderboard._add(ids[2], 'Rated2', 1600)
+            report = leaderboard.verify()
+            assert not report['consistent']
+            assert report['first_divergence']['position'] == 0
+            assert report['wrong_ranks'] == 3
+            assert not report['rebuilt']
+
+            assert leaderboard.verify(apply=True)['rebuilt']
+            assert leaderboard.verify()['consistent']
+
+class TestLeaderboardEndpoints:
+    """Test the leaderboard routes"""
+
+    def test_leaderboard_pages(self, client, app):
+        """Test offset/limit paging and validation"""
+        ids = add_players(app, [1000 + 10 * i for i in range(12)])
+        response = client.get('/leaderboard?offset=2&limit=3')
+        assert response.status_code == 200
+        assert response.json['total_players'] == 12
+        assert response.json['offset'] == 2
+        assert response.json['players'] == [
+            {'rank': 3 + i, 'id': ids[9 - i], 'name': f'Rated{9 - i}', 'elo': 1090 - 10 * i} for i in range(3)
+        ]
+        assert client.get('/leaderboard', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+        for query in ('offset=-1', 'limit=0', 'limit=abc', 'limit=100000'):
+            assert client.get(f'/leaderboard?{query}').status_code == 400
+
+    def test_rank_and_around(self, client, app, pending_player):
+        """Test a player's rank, their neighbourhood, and 404s"""
+        ids = add_players(app, [1000 + 10 * i for i in range(12)])
+        response = client.get(f'/players/{ids[5]}/rank')
+        assert response.status_code == 200
+        assert (response.json['rank'], response.json['total_players']) == (7, 12)
+
+        response = client.get(f'/players/{ids[5]}/around?radius=2')
+        assert [p['rank'] for p in response.json['players']] == [5, 6, 7, 8, 9]
+        response = client.get(f'/players/{ids[11]}/around?radius=2')
+        assert [p['id'] for p in response.json['players']] == [ids[11], ids[10], ids[9]]
+
+        assert client.get(f'/players/{ids[5]}/around?radius=1000').status_code == 400
+        assert client.get(f'/players/{pending_player["id"]}/rank').status_code == 404
+        assert client.get(f'/players/{pending_player["id"]}/around').status_code == 404
+        assert client.get('/players/9999/rank').status_code == 404
+
+    def test_verify_endpoint(self, client, admin_token, multiple_approved_players):
+        """Test that verification is admin only and reports a consistent board"""
+        assert client.post('/admin/leaderboard/verify').status_code == 401
+        response = client.post('/admin/leaderboard/verify', headers={'Authorization': f'Bearer {admin_token}'})
+        assert response.status_code == 200
+        assert response.json['consistent']
+        assert response.json['players_checked'] == 3
@@ -0,0 +1,156 @@
+"""Tests for background maintenance jobs and the scheduler"""
+import pytest
+from datetime import datetime, timedelta
+from flask import Flask
+from config import Config
+from models import db, AdminSession, PlayerSession, Challenge, Match, Tournament, \
+    ChallengeStatus, MatchStatus, TournamentStatus
+from app.services import reap_expired_sessions, cleanup_expired_challenges, cleanup_expired_matches, \
+    update_tournament_status
+from app.scheduler import scheduler
+
+def add_sessions(player_id, expired, active):
+    for _ in range(expired):
+        session = PlayerSession(player_id=player_id)
+        session.expires_at = datetime.now() - timedelta(hours=1)
+        db.session.add(session)
+    for _ in range(active):
+        db.session.add(PlayerSession(player_id=player_id))
+    db.session.commit()
+
+class TestSessionReaper:
+    """Test expired session cleanup"""
+
+    def test_reaps_only_expired_sessions(self, app, approved_player):
+        """Test that expired sessions are deleted and active ones kept"""
+        add_sessions(approved_player['id'], expired=5, active=2)
+
+        assert reap_expired_sessions(batch_size=2) == 5
+        assert PlayerSession.query.count() == 2
+
+    def test_reaps_admin_sessions(self, app, admin_user):
+        """Test that expired admin sessions are deleted"""
+        session = AdminSession(admin_id=admin_user['id'])
+        session.expires_at = datetime.now() - timedelta(minutes=1)
+        db.session.add(session)
+        db.session.commit()
+
+        assert reap_expired_sessions() == 1
+        assert AdminSession.query.count() == 0
+
+    def test_login_does_not_delete_expired_sessions(self, client, approved_player):
+        """Test that login is a plain insert and leaves cleanup to the reaper"""
+        with client.application.app_context():
+            add_sessions(approved_player['id'], expired=3, active=0)
+
+        response = client.post('/player/login', json={
+            'name': approved_player['name'],
+            'password': approved_player['password']
+        })
+
+        assert response.status_code == 200
+        with client.application.app_context():
+            assert PlayerSession.query.count() == 4
+
+def backdate(model, object_id, **fields):
+    db.session.query(model).filter_by(id=object_id).update(fields)
+    db.session.commit()
+    db.session.expire_all()
+
+class TestExpirySweeps:
+    """Test the set-based status sweeps and that requests no longer run them"""
+
+    def test_challenge_sweep_is_one_update(self, app, challenge, query_counter):
+        """Test that expiring challenges is a single UPDATE statement"""
+        backdate(Challenge, challenge['id'], expires_at=datetime.now() - timedelta(minutes=1))
+
+        query_counter.reset()
+        assert cleanup_expired_challenges() == 1
+        assert len([s for s in query_counter.statements if s.startswith('UPDATE')]) == 1
+        assert db.session.get(Challenge, challenge['id']).status == ChallengeStatus.EXPIRED
+        assert cleanup_expired_challenges() == 0
+
+    def test_match_sweep(self, app, pending_match):
+        """Test that only expired PENDING matches are changed"""
+        backdate(Match, pending_match['id'], expires_at=datetime.now() - timedelta(minutes=1))
+
+        assert cleanup_expired_matches() == 1
+        assert db.session.get(Match, pending_match['id']).status == MatchStatus.EXPIRED
+
+    def test_tournament_sweep(self, app, tournament):
+        """Test that a tournament past both its start and end is started and expired in one sweep"""
+        backdate(Tournament, tournament['id'], start_time=datetime.now() - timedelta(days=2),
+                 expires_at=datetime.now() - timedelta(days=1))
+
+        assert update_tournament_status() == 2
+        assert db.session.get(Tournament, tournament['id']).status == TournamentStatus.EXPIRED
+
+    def test_get_challenges_does_not_write(self, client, challenge, query_counter):
+        """Test that listing reports an expired challenge without writing it back"""
+        with client.application.app_context():
+            backdate(Challenge, challenge['id'], expires_at=datetime.now() - timedelta(minutes=1))
+
+        query_counter.reset()
+        response = client.get('/challenges')
+
+        assert response.json[0]['status'] == 'expired'
+        assert not [s for s in query_counter.statements if not s.startswith('SELECT')]
+
+    def test_join_after_start_rejected_before_sweep(self, client, tournament, player_token):
+        """Test that a started tournament is closed for registration even if the sweep has not run"""
+        with client.application.app_context():
+            backdate(Tournament, tournament['id'], start_time=datetime.now() - timedelta(minutes=1))
+
+        response = client.post(f'/tournaments/{tournament["id"]}/join',
+                               headers={'Authorization': f'Bearer {player_token}'}, json={})
+
+        assert response.status_code == 400
+        assert response.json['error'] == 'Tournament registration is closed'
+
+    def test_sweeps_registered(self, app, challenge):
+        """Test that the sweeps run as scheduler jobs with stats"""
+        backdate(Challenge, challenge['id'], expires_at=datetime.now() - timedelta(minutes=1))
+
+        assert scheduler.run_job('challenge_expiry') == 1
+        stats = scheduler.stats()
+        assert stats['challenge_expiry']['last_rows'] == 1
+        assert {'match_expiry', 'tournament_status'} <= set(stats)
+
+class TestScheduler:
+    """Test the background scheduler and its stats endpoint"""
+
+    def test_run_job_records_stats(self, app, approved_player):
+        """Test that running a job records rows and time spent"""
+        add_sessions(approved_player['id'], expired=3, active=1)
+
+        assert scheduler.run_job('session_reaper') == 3
+
+        stats = scheduler.stats()['session_reaper']
+        assert stats['runs'] == 1
+        assert stats['rows_total'] == 3
+        assert stats['last_seconds'] >= 0
+        assert stats['last_error'] is None
+
+    def test_sweep_interval_defaults_to_config(self, app):
+        """Test that an app without EXPIRY_SWEEP_INTERVAL_SECONDS gets the interval config.py documents"""
+        try:
+            scheduler.init_app(Flask('bare'))
+            intervals = {name: job['interval_seconds'] for name, job in scheduler.stats().items()}
+        finally:
+            scheduler.init_app(app)
+
+        assert intervals['challenge_expiry'] == Config.EXPIRY_SWEEP_INTERVAL_SECONDS
+        assert intervals['tournament_status'] == Config.EXPIRY_SWEEP_INTERVAL_SECONDS
+
+    def test_maintenance_endpoint(self, client, admin_token):
+        """Test that admins can read scheduler stats"""
+        response = client.get('/admin/maintenance', headers={'Authorization': f'Bearer {admin_token}'})
+
+        assert response.status_code == 200
+        assert 'session_reaper' in response.json['jobs']
+
+    def test_maintenance_endpoint_requires_admin(self, client, player_token):
+        """Test that players cannot read scheduler stats"""
+        response = client.get('/admin/maintenance', headers={'Authorization': f'Bearer {player_token}'})
+
+        assert response.status_code == 401
@@ -0,0 +1,68 @@
+"""Tests for the tournament matchup matrix"""
+import pytest
+import numpy as np
+from models import db, Player, TournamentParticipant
+from app.matchups import expected_score_matrix, matchup_cache
+from app.services import elo_change_for
+
+def add_participants(app, tournament_id, players):
+    with app.app_context():
+        for player in players:
+            db.session.add(TournamentParticipant(tournament_id=tournament_id, player_id=player['id']))
+        db.session.commit()
+
+def set_elo(app, player_id, elo):
+    with app.app_context():
+        db.session.get(Player, player_id).elo = elo
+        db.session.commit()
+
+class TestExpectedScoreMatrix:
+    """Test the broadcast computation"""
+
+    def test_matches_pairwise_formula(self):
+        """Test that every cell agrees with the pairwise ELO expectation"""
+        elos = np.array([1000.0, 1200.0, 1350.0, 1600.0])
+        matrix = expected_score_matrix(elos)
+
+        for i in range(4):
+            for j in range(4):
+                # elo_change_for() is K * (1 - expected win)
+                assert matrix[i, j] == pytest.approx(1 - elo_change_for(elos[i], elos[j], 1))
+        assert np.allclose(matrix + matrix.T, 1.0)
+
+class TestMatchupMatrixEndpoint:
+    """Test GET /tournaments/<id>/matchup-matrix"""
+
+    def test_flat_matrix(self, client, tournament, multiple_approved_players):
+        """Test the ID index and the flat row-major layout"""
+        add_participants(client.application, tournament['id'], multiple_approved_players)
+        set_elo(client.application, multiple_approved_players[0]['id'], 1400)
+
+        response = client.get(f'/tournaments/{tournament["id"]}/matchup-matrix')
+
+        assert response.status_code == 200
+        ids = response.json['player_ids']
+        scores = response.json['expected_scores']
+        assert ids == sorted(p['id'] for p in multiple_approved_players)
+        assert len(scores) == 9
+        assert response.json['scale'] == 10000
+        assert scores[0] == 5000
+        assert scores[1] == 7597
+        assert scores[1] + scores[3] == 10000
+
+    def test_cache_invalidated_by_rating_change(self, client, tournament, multiple_approved_players):
+        """Test that a cached matrix is rebuilt once a participant's rating changes"""
+        add_participants(client.application, tournament['id'], multiple_approved_players)
+        url = f'/tournaments/{tournament["id"]}/matchup-matrix'
+
+        first = client.get(url)
+        assert first.json['expected_scores'][1] == 5000
+        assert len(matchup_cache) == 1
+        assert client.get(url).data == first.data
+
+        set_elo(client.application, multiple_approved_players[1]['id'], 1000)
+        assert client.get(url).json['expected_scores'][1] == 7597
+
+    def test_unknown_tournament(self, client):
+        """Test 404 for a missing tournament"""
+        assert client.get('/tournaments/9999/matchup-matrix').status_code == 404
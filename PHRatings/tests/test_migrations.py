@@ -0,0 +1,148 @@
+"""Tests for schema migrations of existing databases"""
+import pytest
+from sqlalchemy import MetaData, Table, Column, ForeignKey, inspect, text
+from app import create_app
+from app.migrations import MIGRATIONS, migrate, pending_migrations, stamp
+from models import db, tournament_participant_archive
+from tests.conftest import TestConfig
+
+ADDED_TABLES = ('rating_history', 'rating_period', 'schema_migration', 'challenge_archive', 'match_archive',
+                'tournament_archive', 'tournament_participant_archive', 'player_stats', 'data_version')
+ADDED_COLUMNS = {('player', 'rating_version'), ('player', 'rating_deviation'), ('player', 'volatility'),
+                 ('tournament', 'participant_count'), ('tournament', 'matches_recorded'),
+                 ('tournament', 'last_result_at'), ('tournament', 'leader_id'), ('tournament_participant', 'wins'),
+                 ('player', 'division'), ('player', 'division_refresh_at'), ('player', 'leaderboard_version')}
+
+def old_schema():
+    """The original schema: today's tables without the added tables, columns and indexes"""
+    metadata = MetaData()
+    for table in db.metadata.sorted_tables:
+        if table.name in ADDED_TABLES:
+            continue
+        Table(table.name, metadata, *[
+            Column(column.name, column.type, *[ForeignKey(fk.target_fullname) for fk in column.foreign_keys],
+                   primary_key=column.primary_key, nullable=column.nullable, unique=column.unique)
+            for column in table.columns if (table.name, column.name) not in ADDED_COLUMNS
+        ])
+    return metadata
+
+@pytest.fixture
+def old_app(tmp_path):
+    """An app on a file database with the schema from before the migrations"""
+    class FileConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'old.db')
+
+    app = create_app(FileConfig)
+    with app.app_context():
+        old_schema().create_all(db.engine)
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql(
+                "INSERT INTO player (name, password_hash, elo, age, weight, status) "
+                "VALUES ('Old Player', 'x', 1234.5, 30, 180.0, 'APPROVED'), "
+                "('Rival', 'x', 1200.0, 30, 180.0, 'APPROVED'), ('Host', 'x', 1200.0, 30, 180.0, 'APPROVED')")
+            connection.exec_driver_sql(
+                "INSERT INTO tournament (name, host_id, start_time, status, expires_at) "
+                "VALUES ('Open', 3, '2024-01-01 10:00:00', 'ACTIVE', '2024-01-02 10:00:00')")
+            connection.exec_driver_sql(
+                "INSERT INTO tournament_participant (tournament_id, player_id) VALUES (1, 1), (1, 2)")
+            connection.exec_driver_sql(
+                "INSERT INTO match (player1_id, player2_id, winner_id, host_id, tournament_id, status, completed_at) "
+                "VALUES (1, 2, 2, 3, 1, 'COMPLETED', '2024-01-01 11:00:00')")
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+class TestMigrations:
+    """Test upgrading an old database in place"""
+
+    def test_migrate_adds_schema_and_keeps_data(self, old_app):
+        """Test that every migration applies and existing rows survive with defaults"""
+        assert migrate() == [migration_id for migration_id, _ in MIGRATIONS]
+
+        inspector = inspect(db.engine)
+        assert set(ADDED_TABLES) <= set(inspector.get_table_names())
+        match_indexes = {index['name'] for index in inspector.get_indexes('match')}
+        assert {'ix_match_player1_player2_status', 'ix_match_host_completed_at'} <= match_indexes
+
+        row = db.session.execute(text(
+            "SELECT name, elo, rating_version, rating_deviation, volatility FROM player WHERE name = 'Old Player'"
+        )).one()
+        assert tuple(row) == ('Old Player', 1234.5, 0, 350.0, 0.06)
+
+    def test_migrate_backfills_tournament_summary(self, old_app):
+        """Test that tournament counters are computed from existing participants and matches"""
+        migrate()
+
+        row = db.session.execute(text(
+            'SELECT participant_count, matches_recorded, last_result_at, leader_id FROM tournament')).one()
+        assert tuple(row) == (2, 1, '2024-01-01 11:00:00', 2)
+
+        row = db.session.execute(text('SELECT games_played, wins, losses FROM player_stats WHERE player_id = 2')).one()
+        assert tuple(row) == (1, 1, 0)
+
+    def test_migrate_backfills_divisions(self, old_app):
+        """Test that existing players get their division key and refresh time"""
+        migrate()
+
+        rows = db.session.execute(text('SELECT division, division_refresh_at FROM player ORDER BY id')).all()
+        assert [division for division, _ in rows] == ['cruiserweight/open'] * 3
+        assert all(refresh_at is not None for _, refresh_at in rows)
+
+    def test_migrate_rekeys_archive_tables(self, old_app):
+        """Test that an archive table keyed by the live id is rebuilt around archive_id, keeping its rows"""
+        columns = [column for column in tournament_participant_archive.columns if column.name != 'archive_id']
+        Table(tournament_participant_archive.name, MetaData(), *[
+            Column(column.name, column.type, primary_key=column.name == 'id', nullable=column.nullable)
+            for column in columns
+        ]).create(db.engine)
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql(
+                "INSERT INTO tournament_participant_archive (id, tournament_id, player_id, wins, archived_at) "
+                "VALUES (7, 1, 1, 0, '2024-02-01 00:00:00')")
+
+        migrate()
+
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql(
+                "INSERT INTO tournament_participant_archive (id, tournament_id, player_id, wins, archived_at) "
+                "VALUES (7, 1, 2, 0, '2024-03-01 00:00:00')")
+        rows = db.session.execute(text(
+            'SELECT archive_id, id, player_id FROM tournament_participant_archive ORDER BY archive_id')).all()
+        assert [tuple(row) for row in rows] == [(1, 7, 1), (2, 7, 2)]
+        indexes = {index['name'] for index in inspect(db.engine).get_indexes('tournament_participant_archive')}
+        assert 'ix_tournament_participant_archive_id' in indexes
+
+    def test_migrate_is_idempotent(self, old_app):
+        """Test that a second run has nothing to do"""
+        migrate()
+
+        assert pending_migrations() == []
+        assert migrate() == []
+
+    def test_interrupted_migration_can_rerun(self, old_app):
+        """Test that steps already applied without being recorded are skipped"""
+        migration_id, func = MIGRATIONS[6]
+        with db.engine.begin() as connection:
+            func(connection)
+
+        assert migration_id in migrate()
+
+    @pytest.mark.parametrize('applied', range(1, len(MIGRATIONS)))
+    def test_database_from_an_intermediate_revision(self, old_app, applied):
+        """Test a database that already has part of the schema but no recorded migrations"""
+        with db.engine.begin() as connection:
+            for _, func in MIGRATIONS[:applied]:
+                func(connection)
+
+        assert migrate() == [migration_id for migration_id, _ in MIGRATIONS]
+        row = db.session.execute(text(
+            "SELECT elo, rating_version, division, leaderboard_version FROM player WHERE name = 'Old Player'")).one()
+        assert tuple(row) == (1234.5, 0, 'cruiserweight/open', 0)
+        row = db.session.execute(text('SELECT participant_count, matches_recorded FROM tournament')).one()
+        assert tuple(row) == (2, 1)
+
+    def test_stamp_fresh_database(self, app):
+        """Test that a database built by create_all() needs no migrations"""
+        stamp()
+
+        assert pending_migrations() == []
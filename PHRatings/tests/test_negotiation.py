@@ -0,0 +1,104 @@
+"""Tests for negotiated listing formats and compression"""
+import gzip
+import json
+import zlib
+import pytest
+from app.streaming import encode_chunks
+from tests.conftest import add_matches
+
+msgpack = pytest.importorskip('msgpack')
+
+COLUMNS = 'application/vnd.phratings.columns+json'
+
+def from_columns(body):
+    table = json.loads(body)
+    return [dict(zip(table['columns'], row)) for row in table['rows']]
+
+def from_msgpack(body):
+    unpacker = msgpack.Unpacker(raw=False)
+    unpacker.feed(body)
+    columns = next(unpacker)
+    return [dict(zip(columns, row)) for row in unpacker]
+
+class TestFormats:
+    """Test each format against the default JSON"""
+
+    @pytest.mark.parametrize('count', [0, 1, 5])
+    def test_encoders_round_trip(self, app, count):
+        """Test that columns and MessagePack decode to the JSON items, in any chunking"""
+        app.config['STREAM_CHUNK_ROWS'] = 2
+        items = [{'id': i, 'name': f'p{i}', 'elo': 1200.5 + i, 'note': None} for i in range(count)]
+        with app.test_request_context():
+            assert from_columns(''.join(encode_chunks(items, 'columns'))) == items
+            assert from_msgpack(b''.join(encode_chunks(items, 'msgpack'))) == items
+
+    @pytest.mark.parametrize('listing', ['/players', '/matches', '/challenges', '/tournaments'])
+    def test_listings_negotiate(self, client, challenge, multiple_approved_players, listing):
+        """Test Accept and ?format= on every listing; anything unknown gets the JSON"""
+        with client.application.app_context():
+            add_matches(multiple_approved_players, 2)
+        default = client.get(listing)
+        assert default.headers['Content-Type'] == 'application/json'
+        expected = default.json
+
+        response = client.get(listing, headers={'Accept': COLUMNS})
+        assert response.mimetype == COLUMNS
+        assert from_columns(response.data) == expected
+        response = client.get(listing, headers={'Accept': 'application/x-msgpack, application/json;q=0.5'})
+        assert response.mimetype == 'application/msgpack'
+        assert from_msgpack(response.data) == expected
+        response = client.get(f'{listing}?format=ndjson', headers={'Accept': COLUMNS})
+        assert [json.loads(line) for line in response.data.splitlines()] == expected
+
+        assert client.get(listing, headers={'Accept': 'text/html'}).data == default.data
+        assert client.get(f'{listing}?format=xml').status_code == 400
+
+    def test_export_negotiates(self, client, admin_token, multiple_approved_players):
+        """Test the full export in MessagePack"""
+        with client.application.app_context():
+            add_matches(multiple_approved_players, 3)
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        expected = client.get('/admin/matches/export', headers=headers).json
+        response = client.get('/admin/matches/export', headers={**headers, 'Accept': 'application/msgpack'})
+        assert from_msgpack(response.data) == expected
+
+class TestCaching:
+    """Test validators and Vary per representation"""
+
+    def test_etag_per_format(self, client, multiple_approved_players):
+        """Test that each format has its own ETag, and the JSON one is unchanged"""
+        json_response = client.get('/players')
+        json_response.close()
+        msgpack_response = client.get('/players', headers={'Accept': 'application/msgpack'})
+        msgpack_response.close()
+        assert json_response.headers['ETag'].startswith('W/"v') and json_response.headers['ETag'].endswith('"')
+        assert msgpack_response.headers['ETag'] == json_response.headers['ETag'][:-1] + '-msgpack"'
+        assert set(json_response.vary) == {'Accept', 'Accept-Encoding'}
+
+        inm = {'If-None-Match': msgpack_response.headers['ETag']}
+        assert client.get('/players', headers={**inm, 'Accept': 'application/msgpack'}).status_code == 304
+        assert client.get('/players', headers=inm).status_code == 200
+
+class TestCompression:
+    """Test gzip/deflate above the size threshold"""
+
+    @pytest.mark.parametrize('coding, decompress', [('gzip', gzip.decompress), ('deflate', zlib.decompress)])
+    def test_compressed_above_threshold(self, app, client, multiple_approved_players, coding, decompress):
+        """Test a compressed body decodes to the identity body, chunk boundaries included"""
+        app.config['STREAM_CHUNK_ROWS'] = 2
+        app.config['COMPRESSION_MIN_BYTES'] = 200
+        with app.app_context():
+            add_matches(multiple_approved_players, 7)
+        identity = client.get('/matches').data
+
+        response = client.get('/matches', headers={'Accept-Encoding': f'{coding}, br'})
+        assert response.is_streamed
+        assert response.content_encoding == coding
+        assert decompress(response.data) == identity
+
+    def test_small_bodies_not_compressed(self, app, client, multiple_approved_players):
+        """Test a body below the threshold is sent as is, with its length"""
+        response = client.get('/players', headers={'Accept-Encoding': 'gzip'})
+        assert response.content_encoding is None
+        assert response.headers['Content-Length'] == str(len(response.data))
+        assert len(response.json) == 3
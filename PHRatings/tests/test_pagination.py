@@ -0,0 +1,113 @@
+"""Tests for keyset pagination of the listing endpoints"""
+import pytest
+from datetime import datetime, timedelta
+from models import db, MatchStatus, Challenge
+from app.pagination import Position, encode_cursor, decode_cursor
+from tests.conftest import add_matches
+
+def fetch_all(client, url):
+    """Follow X-Next-Cursor from url to the end; returns (items, number of pages)"""
+    items, pages = [], 0
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        items.extend(response.json)
+        pages += 1
+        cursor = response.headers.get('X-Next-Cursor')
+        url = response.headers['Link'][1:-len('>; rel="next"')] if cursor else None
+    return items, pages
+
+class TestCursors:
+    """Test cursor encoding"""
+
+    def test_round_trip(self):
+        """Test that a cursor decodes to the position it was made from"""
+        cursor = encode_cursor('matches', Position(True, 42))
+        assert decode_cursor(cursor, 'matches') == Position(True, 42)
+        assert decode_cursor(None, 'matches') == Position(False, 0)
+
+    @pytest.mark.parametrize('cursor', ['garbage!', 'bnVsbA', encode_cursor('players', Position(False, 1))])
+    def test_rejects_invalid(self, cursor):
+        """Test malformed cursors and cursors from another listing"""
+        with pytest.raises(ValueError):
+            decode_cursor(cursor, 'matches')
+
+class TestListingPages:
+    """Test paging through the listing endpoints"""
+
+    def test_iterates_full_set(self, client, multiple_approved_players):
+        """Test that following the cursors returns every match once, in ID order"""
+        with client.application.app_context():
+            ids = add_matches(multiple_approved_players, 7)
+
+        items, pages = fetch_all(client, '/matches?limit=3')
+        assert [m['id'] for m in items] == ids
+        assert pages == 3
+
+    def test_exact_last_page_has_no_cursor(self, client, multiple_approved_players):
+        """Test that a page ending exactly on the last row does not point at an empty page"""
+        with client.application.app_context():
+            add_matches(multiple_approved_players, 4)
+
+        response = client.get('/matches?limit=4')
+        assert len(response.json) == 4
+        assert 'X-Next-Cursor' not in response.headers
+        assert 'Link' not in response.headers
+
+    def test_player_filter_pages(self, client, multiple_approved_players):
+        """Test ?player_id= pages over matches on either side, combined with ?status="""
+        with client.application.app_context():
+            ids = add_matches(multiple_approved_players, 9)
+            add_matches(multiple_approved_players, 2, status=MatchStatus.UNDONE)
+
+        player_id = multiple_approved_players[1]['id']
+        items, _ = fetch_all(client, f'/matches?player_id={player_id}&status=completed&limit=2')
+        assert [m['id'] for m in items] == ids
+
+    def test_continues_into_archive(self, client, multiple_approved_players):
+        """Test that archived rows follow the live ones within and across pages"""
+        with client.application.app_context():
+            a, b, host = (p['id'] for p in multiple_approved_players)
+            for _ in range(3):
+                db.session.add(Challenge(challenger_id=a, challenged_id=b, host_id=host,
+                                         expires_at=datetime.now() + timedelta(days=1)))
+            db.session.commit()
+            db.session.execute(db.text(
+                "INSERT INTO challenge_archive (id, challenger_id, challenged_id, host_id, status, expires_at, archived_at) "
+                "VALUES (100, :a, :b, :host, 'EXPIRED', '2024-01-01 00:00:00', '2024-02-01 00:00:00'), "
+                "(101, :a, :b, :host, 'EXPIRED', '2024-01-01 00:00:00', '2024-02-01 00:00:00')"
+            ), {'a': a, 'b': b, 'host': host})
+            db.session.commit()
+
+        items, pages = fetch_all(client, '/challenges?include_archived=true&limit=2')
+        assert [(c['id'], c['archived']) for c in items] == [(1, False), (2, False), (3, False), (100, True), (101, True)]
+        assert pages == 3
+        assert len(fetch_all(client, '/challenges?limit=2')[0]) == 3
+
+    def test_players_and_tournaments(self, client, multiple_approved_players, tournament):
+        """Test the player and tournament listings page the same way"""
+        players, _ = fetch_all(client, '/players?limit=1')
+        assert [p['id'] for p in players] == [1, 2, 3, 4]
+        assert [t['id'] for t in fetch_all(client, '/tournaments?limit=1')[0]] == [tournament['id']]
+
+    @pytest.mark.parametrize('query', ['limit=0', 'limit=1001', 'limit=ten', 'cursor=garbage!'])
+    def test_invalid_parameters(self, client, query):
+        """Test out-of-range limits and malformed cursors"""
+        response = client.get(f'/matches?{query}')
+        assert response.status_code == 400
+        assert 'error' in response.json
+
+    def test_cursor_from_other_listing(self, client):
+        """Test that a players cursor is refused by the matches listing"""
+        cursor = encode_cursor('players', Position(False, 1))
+        assert client.get(f'/matches?cursor={cursor}').status_code == 400
+
+    def test_default_page_size(self, app, client, multiple_approved_players):
+        """Test that listings without ?limit= are capped at LISTING_PAGE_SIZE"""
+        app.config['LISTING_PAGE_SIZE'] = 2
+        with app.app_context():
+            add_matches(multiple_approved_players, 3)
+
+        response = client.get('/matches')
+        assert len(response.json) == 2
+        assert response.headers['X-Next-Cursor']
@@ -0,0 +1,77 @@
+"""Tests for the incrementally maintained player stats"""
+import pytest
+from models import db, PlayerStats
+from app.importer import import_matches
+from app.player_stats import verify_player_stats
+from tests.conftest import record_match
+
+class TestStatsMaintenance:
+    """Test that recording, importing and undoing results keep the stats current"""
+
+    def test_record_result(self, client, multiple_approved_players):
+        """Test the counters and peak after two results"""
+        players = multiple_approved_players
+        record_match(client, players, winner=0)
+        record_match(client, players, winner=1)
+
+        winner = client.get(f'/players/{players[0]["id"]}/stats').json
+        assert (winner['games_played'], winner['wins'], winner['losses']) == (2, 1, 1)
+        assert winner['peak_elo'] == pytest.approx(1216)
+        assert winner['last_played_at'] is not None
+
+        listing = {p['id']: p for p in client.get('/players').json}
+        assert listing[players[1]['id']]['games_played'] == 2
+        assert listing[players[2]['id']]['games_played'] == 0
+        assert listing[players[2]['id']]['peak_elo'] is None
+
+    def test_undo_result(self, client, multiple_approved_players):
+        """Test that undoing the only result clears the counters"""
+        token, _ = record_match(client, multiple_approved_players)
+
+        response = client.post('/matches/undo', headers={'Authorization': f'Bearer {token}'}, json={})
+
+        assert response.status_code == 200
+        stats = client.get(f'/players/{multiple_approved_players[0]["id"]}/stats').json
+        assert (stats['games_played'], stats['wins'], stats['peak_elo'], stats['last_played_at']) == (0, 0, None, None)
+
+    def test_import_and_live_results_stay_consistent(self, app, client, multiple_approved_players):
+        """Test that imported results are counted and the checker finds no drift"""
+        report, errors = import_matches(
+            'player1,player2,winner,timestamp,host,notes\n'
+            'Player1,Player2,Player2,2024-01-01T10:00:00,Player3,\n'
+            'Player1,Player2,Player2,2024-01-02T10:00:00,Player3,\n', 'csv')
+        assert errors == []
+        record_match(client, multiple_approved_players, winner=0)
+
+        stats = db.session.get(PlayerStats, multiple_approved_players[1]['id'])
+        assert (stats.games_played, stats.wins, stats.losses) == (3, 2, 1)
+        assert verify_player_stats()['divergent_player_count'] == 0
+
+    def test_unknown_player(self, client):
+        """Test the stats endpoint for a missing player"""
+        assert client.get('/players/9999/stats').status_code == 404
+
+class TestConsistencyChecker:
+    """Test the full-recompute checker"""
+
+    def test_detects_and_fixes_drift(self, client, admin_token, multiple_approved_players):
+        """Test that corrupted counters are reported and rewritten with apply"""
+        record_match(client, multiple_approved_players)
+        with client.application.app_context():
+            db.session.get(PlayerStats, multiple_approved_players[0]['id']).wins = 5
+            db.session.commit()
+
+        headers = {'Authorization': f'Bearer {admin_token}'}
+        report = client.post('/admin/players/stats/verify', headers=headers, json={}).json
+        assert report['divergent_player_count'] == 1
+        assert report['divergent_players'][0]['stored'] == {'wins': 5}
+        assert report['divergent_players'][0]['expected'] == {'wins': 1}
+
+        assert client.post('/admin/players/stats/verify', headers=headers, json={'apply': True}).json['applied']
+        assert client.post('/admin/players/stats/verify', headers=headers, json={}).json['divergent_player_count'] == 0
+
+    def test_requires_admin(self, client, player_token):
+        """Test that players cannot run the checker"""
+        response = client.post('/admin/players/stats/verify', headers={'Authorization': f'Bearer {player_token}'},
+                               json={})
+        assert response.status_code == 401
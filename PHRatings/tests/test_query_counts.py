@@ -0,0 +1,122 @@
+"""Per-endpoint SQL query budgets, to catch N+1 and duplicate-auth regressions"""
+import pytest
+from datetime import datetime, timedelta
+from models import db, Match, MatchStatus, Tournament
+from tests.conftest import login, auth
+
+class TestPlayerEndpointQueries:
+    """Query budgets for authenticated player endpoints"""
+
+    def test_update_weight(self, client, player_token, query_counter):
+        """Test PUT /players/weight as the player"""
+        query_counter.reset()
+        response = client.put('/players/weight', headers=auth(player_token), json={'weight': 181.0})
+
+        assert response.status_code == 200
+        query_counter.assert_at_most(4)
+
+    def test_update_weight_as_admin(self, client, admin_token, approved_player, query_counter):
+        """Test PUT /players/weight as an admin acting for a player"""
+        query_counter.reset()
+        response = client.put('/players/weight', headers=auth(admin_token),
+                              json={'weight': 181.0, 'player_id': approved_player['id']})
+
+        assert response.status_code == 200
+        query_counter.assert_at_most(5)
+
+    def test_join_and_leave_tournament(self, client, tournament, multiple_approved_players, query_counter):
+        """Test POST /tournaments/<id>/join and DELETE /tournaments/<id>/leave"""
+        token = login(client, multiple_approved_players[1])
+
+        query_counter.reset()
+        response = client.post(f'/tournaments/{tournament["id"]}/join', headers=auth(token), json={})
+        assert response.status_code == 200
+        # Including the participant_count update
+        query_counter.assert_at_most(6)
+
+        query_counter.reset()
+        response = client.delete(f'/tournaments/{tournament["id"]}/leave', headers=auth(token), json={})
+        assert response.status_code == 200
+        query_counter.assert_at_most(5)
+
+class TestMatchEndpointQueries:
+    """Query budgets for match recording endpoints"""
+
+    def test_record_match_result(self, client, pending_match, multiple_approved_players, query_counter):
+        """Test POST /matches/result"""
+        token = login(client, multiple_approved_players[2])
+
+        query_counter.reset()
+        response = client.post('/matches/result', headers=auth(token), json={
+            'host_id': multiple_approved_players[2]['id'],
+            'player1_id': multiple_approved_players[0]['id'],
+            'player2_id': multiple_approved_players[1]['id'],
+            'winner_id': multiple_approved_players[0]['id']
+        })
+
+        assert response.status_code == 200
+        # Ratings are written with one guarded UPDATE per player, plus the player stats upsert
+        query_counter.assert_at_most(13)
+
+    def test_undo_last_match(self, client, multiple_approved_players, query_counter):
+        """Test POST /matches/undo"""
+        token = login(client, multiple_approved_players[2])
+        with client.application.app_context():
+            db.session.add(Match(
+                player1_id=multiple_approved_players[0]['id'],
+                player2_id=multiple_approved_players[1]['id'],
+                host_id=multiple_approved_players[2]['id'],
+                winner_id=multiple_approved_players[0]['id'],
+                status=MatchStatus.COMPLETED,
+                completed_at=datetime.now(),
+                elo_change=16.0
+            ))
+            db.session.commit()
+            db.session.expunge_all()
+
+        query_counter.reset()
+        response = client.post('/matches/undo', headers=auth(token), json={})
+
+        assert response.status_code == 200
+        query_counter.assert_at_most(13)
+
+class TestListingQueries:
+    """Query budgets for listing endpoints: the data version, then the page"""
+
+    def test_list_players(self, client, multiple_approved_players, query_counter):
+        """Test GET /players"""
+        query_counter.reset()
+        assert client.get('/players').status_code == 200
+        query_counter.assert_at_most(2)
+
+    def test_list_matches(self, client, pending_match, query_counter):
+        """Test GET /matches"""
+        query_counter.reset()
+        assert client.get('/matches').status_code == 200
+        query_counter.assert_at_most(2)
+
+    def test_list_challenges(self, client, challenge, query_counter):
+        """Test GET /challenges"""
+        query_counter.reset()
+        assert client.get('/challenges').status_code == 200
+        query_counter.assert_at_most(2)
+
+    def test_list_tournaments(self, client, approved_player, query_counter):
+        """Test GET /tournaments reads the stored counters instead of counting participants"""
+        with client.application.app_context():
+            for i in range(5):
+                db.session.add(Tournament(name=f'Cup {i}', host_id=approved_player['id'],
+                                          start_time=datetime.now() + timedelta(hours=1)))
+            db.session.commit()
+
+        query_counter.reset()
+        assert len(client.get('/tournaments').json) == 5
+        query_counter.assert_at_most(2)
+
+    def test_not_modified(self, client, multiple_approved_players, query_counter):
+        """Test that revalidating an unchanged listing only reads the data version"""
+        etag = client.get('/players').headers['ETag']
+
+        query_counter.reset()
+        assert client.get('/players', headers={'If-None-Match': etag}).status_code == 304
+        query_counter.assert_at_most(1)
@@ -0,0 +1,141 @@
+"""EXPLAIN QUERY PLAN checks: hot queries must be served by an index, never a full table scan"""
+import pytest
+from datetime import datetime, timedelta
+from models import db, Player, Match, MatchStatus
+from app.leaderboard import leaderboard
+from app.auth import resolve_token, session_cache
+from app.services import reap_expired_sessions, cleanup_expired_challenges, cleanup_expired_matches, \
+    update_tournament_status
+from app.deadlines import expiry_timer
+from app.archive import archive_batch
+from app.pagination import Position, encode_cursor
+from tests.conftest import login, auth
+
+class TestMatchQueryPlans:
+    """Query plans for recording and undoing results"""
+
+    def test_record_match_result(self, client, pending_match, multiple_approved_players, query_plans):
+        """Test the pending-match lookup in POST /matches/result"""
+        token = login(client, multiple_approved_players[2])
+
+        query_plans.reset()
+        response = client.post('/matches/result', headers=auth(token), json={
+            'host_id': multiple_approved_players[2]['id'],
+            'player1_id': multiple_approved_players[1]['id'],
+            'player2_id': multiple_approved_players[0]['id'],
+            'winner_id': multiple_approved_players[0]['id']
+        })
+
+        assert response.status_code == 200
+        query_plans.assert_no_table_scans()
+
+    def test_undo_last_match(self, client, multiple_approved_players, query_plans):
+        """Test the host's last-match lookup in POST /matches/undo"""
+        token = login(client, multiple_approved_players[2])
+        with client.application.app_context():
+            db.session.add(Match(
+                player1_id=multiple_approved_players[0]['id'],
+                player2_id=multiple_approved_players[1]['id'],
+                host_id=multiple_approved_players[2]['id'],
+                winner_id=multiple_approved_players[0]['id'],
+                status=MatchStatus.COMPLETED,
+                completed_at=datetime.now(),
+                elo_change=16.0
+            ))
+            db.session.commit()
+
+        query_plans.reset()
+        response = client.post('/matches/undo', headers=auth(token), json={})
+
+        assert response.status_code == 200
+        query_plans.assert_no_table_scans()
+
+    def test_list_matches_for_player(self, client, pending_match, multiple_approved_players, query_plans):
+        """Test GET /matches?player_id= and ?tournament_id="""
+        query_plans.reset()
+        assert client.get(f'/matches?player_id={multiple_approved_players[1]["id"]}').status_code == 200
+        assert client.get('/matches?tournament_id=1').status_code == 200
+        query_plans.assert_no_table_scans()
+
+    def test_listing_pages(self, client, pending_match, multiple_approved_players, query_plans):
+        """Test that later pages of the listings are range seeks from the cursor"""
+        cursor = encode_cursor('matches', Position(False, 1))
+        query_plans.reset()
+        for query in ('', f'player_id={multiple_approved_players[1]["id"]}&', 'tournament_id=1&', 'status=pending&'):
+            assert client.get(f'/matches?{query}limit=10&cursor={cursor}').status_code == 200
+        for listing in ('players', 'challenges', 'tournaments'):
+            assert client.get(f'/{listing}?limit=10&include_archived=true').status_code == 200
+        query_plans.assert_no_table_scans()
+
+    def test_division_queries(self, client, multiple_approved_players, query_plans):
+        """Test division listings, leaderboards, opponent searches and the age roll"""
+        from app.divisions import roll_divisions
+        division = client.get(f'/players?limit=1').json[0]['division']
+        weight_class, age_class = division.split('/')
+
+        query_plans.reset()
+        assert client.get(f'/players?division={division}&limit=10').status_code == 200
+        assert client.get(f'/divisions/{weight_class}/{age_class}/leaderboard?offset=1').status_code == 200
+        assert client.get(f'/players/{multiple_approved_players[0]["id"]}/opponents?elo_range=100').status_code == 200
+        with client.application.app_context():
+            roll_divisions()
+        query_plans.assert_no_table_scans()
+
+class TestTournamentQueryPlans:
+    """Query plans for tournament participant checks"""
+
+    def test_join_and_leave(self, client, tournament, multiple_approved_players, query_plans):
+        """Test the participant lookups in join and leave"""
+        token = login(client, multiple_approved_players[1])
+
+        query_plans.reset()
+        assert client.post(f'/tournaments/{tournament["id"]}/join', headers=auth(token), json={}).status_code == 200
+        assert client.delete(f'/tournaments/{tournament["id"]}/leave', headers=auth(token), json={}).status_code == 200
+        query_plans.assert_no_table_scans()
+
+class TestMaintenanceQueryPlans:
+    """Query plans for token lookups, sweeps, deadlines and archival"""
+
+    def test_token_lookup(self, app, player_token, query_plans):
+        """Test database session resolution by token"""
+        session_cache.clear()
+
+        query_plans.reset()
+        assert resolve_token(player_token)[0] == 'player'
+        query_plans.assert_no_table_scans()
+
+    def test_sweeps(self, app, challenge, pending_match, tournament, player_token, query_plans):
+        """Test the session reaper and the status sweeps"""
+        query_plans.reset()
+        reap_expired_sessions()
+        cleanup_expired_challenges()
+        cleanup_expired_matches()
+        update_tournament_status()
+        query_plans.assert_no_table_scans()
+
+    def test_deadlines(self, app, challenge, pending_match, tournament, query_plans):
+        """Test the expiry timer rebuild and transitions"""
+        query_plans.reset()
+        expiry_timer.rebuild()
+        expiry_timer.fire_due(datetime.now() + timedelta(days=30))
+        query_plans.assert_no_table_scans()
+
+    def test_archive_batch(self, app, challenge, pending_match, tournament, query_plans):
+        """Test the cold-row lookups of the archiver"""
+        query_plans.reset()
+        for kind in ('challenges', 'matches', 'tournaments'):
+            archive_batch(kind, datetime.now(), 100)
+        query_plans.assert_no_table_scans()
+
+    def test_leaderboard_catch_up(self, app, multiple_approved_players, query_plans):
+        """Test the read of players changed since the leaderboard's version"""
+        leaderboard.sync()
+        db.session.get(Player, multiple_approved_players[0]['id']).elo = 1300
+        db.session.commit()
+
+        query_plans.reset()
+        leaderboard.sync()
+        query_plans.assert_no_table_scans()
+        plan = db.session.execute(db.text(
+            'EXPLAIN QUERY PLAN UPDATE player SET leaderboard_version = 1 WHERE leaderboard_version IS NULL')).all()
+        assert 'ix_player_leaderboard_version' in ' '.join(row[-1] for row in plan)
@@ -0,0 +1,120 @@
+"""Tests for the pluggable rating engines"""
+import importlib.util
+import os
+import sys
+import pytest
+import numpy as np
+from models import db, Player, PlayerStats, Match, MatchStatus, RatingHistory, RatingPeriod
+from app.rating_engines import glicko2_rate_period
+from tests.conftest import auth, record_match
+
+@pytest.fixture
+def glicko2(app):
+    app.config['RATING_ENGINE'] = 'glicko2'
+    yield
+    app.config['RATING_ENGINE'] = 'elo'
+
+class TestGlicko2Math:
+    """Test the vectorized rating period"""
+
+    def test_glickman_example(self):
+        """Test against the worked example in Glickman's Glicko-2 paper"""
+        ratings = [1500, 1400, 1550, 1700]
+        deviations = [200, 30, 100, 300]
+        volatilities = [0.06] * 4
+
+        new_ratings, new_deviations, new_volatilities = glicko2_rate_period(
+            ratings, deviations, volatilities, np.array([0, 2, 3]), np.array([1, 0, 0]))
+
+        assert new_ratings[0] == pytest.approx(1464.06, abs=0.01)
+        assert new_deviations[0] == pytest.approx(151.52, abs=0.01)
+        assert new_volatilities[0] == pytest.approx(0.05999, abs=1e-5)
+
+    def test_inactive_players_gain_deviation(self):
+        """Test that players without games keep their rating but become less certain"""
+        new_ratings, new_deviations, _ = glicko2_rate_period(
+            [1500, 1500, 1600], [50, 50, 50], [0.06] * 3, np.array([0]), np.array([1]))
+
+        assert new_ratings[2] == 1600
+        assert new_deviations[2] > 50
+        assert new_ratings[0] > 1500 > new_ratings[1]
+
+class TestGlicko2Engine:
+    """Test the Glicko-2 engine end to end"""
+
+    def test_results_rated_at_period_close(self, client, admin_token, multiple_approved_players, glicko2):
+        """Test that results only change ratings when the period is closed"""
+        _, result = record_match(client, multiple_approved_players)
+        assert result['winner_new_elo'] == 1200
+
+        response = client.post('/admin/ratings/period', headers=auth(admin_token))
+        assert response.status_code == 200
+        assert response.json['games'] == 1
+        assert response.json['players_rated'] == 2
+
+        with client.application.app_context():
+            winner = db.session.get(Player, multiple_approved_players[0]['id'])
+            loser = db.session.get(Player, multiple_approved_players[1]['id'])
+            assert winner.elo > 1200 > loser.elo
+            assert winner.rating_deviation < 350
+            assert db.session.get(PlayerStats, winner.id).peak_elo == winner.elo
+            assert RatingHistory.query.count() == 2
+            assert RatingPeriod.query.count() == 1
+
+        # The next period does not rate the same games again
+        response = client.post('/admin/ratings/period', headers=auth(admin_token))
+        assert response.json['games'] == 0
+
+    def test_undo_before_period_close(self, client, admin_token, multiple_approved_players, glicko2):
+        """Test that a match undone before its period closes is left out of the period"""
+        token, _ = record_match(client, multiple_approved_players)
+        response = client.post('/matches/undo', headers=auth(token), json={})
+        assert response.status_code == 200
+
+        response = client.post('/admin/ratings/period', headers=auth(admin_token))
+        assert response.json['games'] == 0
+        assert response.json['players_rated'] == 0
+
+    def test_undo_after_period_close_rejected(self, client, admin_token, multiple_approved_players, glicko2):
+        """Test that a match already rated by a closed period cannot be undone"""
+        token, _ = record_match(client, multiple_approved_players)
+        client.post('/admin/ratings/period', headers=auth(admin_token))
+        with client.application.app_context():
+            rated = db.session.get(Player, multiple_approved_players[0]['id']).elo
+
+        response = client.post('/matches/undo', headers=auth(token), json={})
+        assert response.status_code == 400
+        assert 'rating period' in response.json['error']
+
+        with client.application.app_context():
+            assert Match.query.one().status == MatchStatus.COMPLETED
+            assert db.session.get(Player, multiple_approved_players[0]['id']).elo == rated
+
+    def test_replay_unavailable(self, client, admin_token, glicko2):
+        """Test that the ELO replay refuses to run under Glicko-2"""
+        response = client.post('/admin/ratings/replay', headers=auth(admin_token), json={})
+        assert response.status_code == 400
+
+    def test_replay_script_unavailable(self, app, multiple_approved_players, glicko2, monkeypatch, capsys):
+        """Test that scripts/replay_elo.py --apply exits with an error instead of overwriting Glicko-2 ratings"""
+        spec = importlib.util.spec_from_file_location(
+            'replay_elo', os.path.join(os.path.dirname(__file__), '..', 'scripts', 'replay_elo.py'))
+        script = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(script)
+        monkeypatch.setattr(script, 'create_app', lambda: app)
+        monkeypatch.setattr(sys, 'argv', ['replay_elo.py', '--apply'])
+        db.session.execute(db.update(Player).values(elo=1500.0, rating_deviation=80.0))
+        db.session.commit()
+
+        with pytest.raises(SystemExit) as exit_info:
+            script.main()
+
+        assert exit_info.value.code == 1
+        assert 'only available with the elo rating engine' in capsys.readouterr().out
+        db.session.expire_all()
+        assert {(p.elo, p.rating_deviation) for p in Player.query.all()} == {(1500.0, 80.0)}
+
+    def test_period_requires_glicko2(self, client, admin_token):
+        """Test that the ELO engine has no rating periods"""
+        response = client.post('/admin/ratings/period', headers=auth(admin_token))
+        assert response.status_code == 400
@@ -0,0 +1,83 @@
+"""Tests for per-player rating history"""
+import pytest
+from datetime import datetime, timedelta
+from models import db, RatingHistory
+from app.history import downsample
+from tests.conftest import auth, record_match
+
+class TestHistoryRecording:
+    """Test that history rows follow rating changes"""
+
+    def test_result_writes_history(self, client, multiple_approved_players):
+        """Test that recording a result writes one row per player"""
+        _, result = record_match(client, multiple_approved_players)
+
+        with client.application.app_context():
+            rows = RatingHistory.query.filter_by(match_id=result['match_id']).all()
+            by_player = {row.player_id: row for row in rows}
+            assert len(rows) == 2
+            assert by_player[multiple_approved_players[0]['id']].elo == result['winner_new_elo']
+            assert by_player[multiple_approved_players[1]['id']].elo == result['loser_new_elo']
+
+    def test_undo_removes_history(self, client, multiple_approved_players):
+        """Test that undoing a match removes its history rows"""
+        token, _ = record_match(client, multiple_approved_players)
+
+        response = client.post('/matches/undo', headers=auth(token), json={})
+
+        assert response.status_code == 200
+        with client.application.app_context():
+            assert RatingHistory.query.count() == 0
+
+class TestHistoryEndpoint:
+    """Test GET /players/<id>/history"""
+
+    def add_history(self, app, player_id, count):
+        start = datetime(2024, 1, 1)
+        with app.app_context():
+            for i in range(count):
+                db.session.add(RatingHistory(player_id=player_id, elo=1200 + (i % 7) * 10, elo_change=10,
+                                             recorded_at=start + timedelta(days=i)))
+            db.session.commit()
+
+    def test_point_in_time(self, client, approved_player):
+        """Test the rating at a given moment"""
+        self.add_history(client.application, approved_player['id'], 5)
+
+        response = client.get(f'/players/{approved_player["id"]}/history?at=2024-01-03T12:00:00')
+        assert response.status_code == 200
+        assert response.json['elo'] == 1220
+
+        response = client.get(f'/players/{approved_player["id"]}/history?at=2023-01-01T00:00:00')
+        assert response.json['elo'] == 1200
+
+    def test_range_and_downsample(self, client, approved_player):
+        """Test range filtering and server-side downsampling"""
+        self.add_history(client.application, approved_player['id'], 100)
+
+        response = client.get(f'/players/{approved_player["id"]}/history?start=2024-01-11T00:00:00&points=10')
+        assert response.status_code == 200
+        assert response.json['total_points'] == 90
+        history = response.json['history']
+        assert len(history) == 10
+        assert history[0]['recorded_at'] == '2024-01-11T00:00:00'
+        assert history[-1]['recorded_at'] == '2024-04-09T00:00:00'
+
+    def test_invalid_parameters(self, client, approved_player):
+        """Test bad datetimes and point counts"""
+        assert client.get(f'/players/{approved_player["id"]}/history?at=yesterday').status_code == 400
+        assert client.get(f'/players/{approved_player["id"]}/history?points=2').status_code == 400
+        assert client.get('/players/9999/history').status_code == 404
+
+class TestDownsample:
+    """Test the LTTB downsampler"""
+
+    def test_keeps_extremes(self):
+        """Test that a single spike survives downsampling"""
+        start = datetime(2024, 1, 1)
+        points = [(start + timedelta(days=i), 1500 if i == 50 else 1200) for i in range(101)]
+
+        sampled = downsample(points, 5)
+        assert len(sampled) == 5
+        assert sampled[0] == points[0] and sampled[-1] == points[-1]
+        assert (points[50][0], 1500) in sampled
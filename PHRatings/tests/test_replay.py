@@ -0,0 +1,148 @@
+"""Tests for full-history ELO replay and verification"""
+import pytest
+import numpy as np
+from datetime import datetime, timedelta
+from models import db, Player, Match, MatchStatus, PlayerStatus
+from app import replay
+from app.services import calculate_elo, _adjust_elo
+from app.replay import replay_ratings, verify_ratings
+
+def record_matches(results):
+    """Record (winner_index, loser_index) results between fresh players via calculate_elo"""
+    players = []
+    for i in range(4):
+        player = Player(name=f'Replay{i}', age=30, weight=80.0, password_hash='', status=PlayerStatus.APPROVED)
+        db.session.add(player)
+        players.append(player)
+    db.session.flush()
+
+    start = datetime.now() - timedelta(days=1)
+    for n, (w, l) in enumerate(results):
+        winner, loser = players[w], players[l]
+        elo_change = calculate_elo(winner, loser)
+        db.session.add(Match(
+            player1_id=winner.id,
+            player2_id=loser.id,
+            winner_id=winner.id,
+            host_id=players[3].id,
+            status=MatchStatus.COMPLETED,
+            completed_at=start + timedelta(minutes=n),
+            elo_change=elo_change,
+            expires_at=None
+        ))
+    db.session.commit()
+    return players
+
+class TestReplayEngine:
+    """Test the replay arithmetic"""
+
+    def test_sequential_order(self):
+        """Test that each result is rated on the ratings left by the previous one"""
+        ratings, changes = replay_ratings(np.array([0, 1]), np.array([1, 0]), 2)
+        assert changes[0] == pytest.approx(16)
+        assert changes[1] == pytest.approx(32 * (1 - 1 / (1 + 10 ** (32 / 400))))
+        assert ratings[1] == pytest.approx(1200 - 16 + changes[1])
+
+    def test_rating_sum_conserved(self):
+        """Test that replay is zero-sum"""
+        winners = np.array([0, 1, 2, 0])
+        losers = np.array([1, 2, 0, 2])
+        ratings, _ = replay_ratings(winners, losers, 3)
+        assert ratings.sum() == pytest.approx(3 * 1200)
+
+class TestVerifyRatings:
+    """Test verification against the database"""
+
+    def test_consistent_history(self, app):
+        """Test that ratings produced by calculate_elo verify cleanly"""
+        record_matches([(0, 1), (1, 2), (0, 2), (2, 0)])
+
+        report = verify_ratings()
+        assert report['matches'] == 4
+        assert report['divergent_player_count'] == 0
+        assert report['divergent_match_count'] == 0
+
+    def test_detects_and_fixes_drift(self, app):
+        """Test that a manually changed rating is reported and corrected"""
+        players = record_matches([(0, 1), (1, 2)])
+        expected = players[0].elo
+        players[0].elo = 1500
+        db.session.commit()
+
+        report = verify_ratings()
+        assert report['divergent_player_count'] == 1
+        assert report['divergent_players'][0]['player_id'] == players[0].id
+        assert not report['applied']
+
+        report = verify_ratings(apply=True)
+        assert report['applied']
+        db.session.expire_all()
+        assert db.session.get(Player, players[0].id).elo == pytest.approx(expected)
+        assert verify_ratings()['divergent_player_count'] == 0
+
+    def test_apply_keeps_concurrent_result(self, app, monkeypatch):
+        """Test that a player rated while the replay runs is skipped rather than overwritten"""
+        players = record_matches([(0, 1), (1, 2)])
+        expected = players[0].elo
+        players[0].elo += 100
+        players[1].elo += 100
+        db.session.commit()
+        ids = [player.id for player in players]
+
+        original = replay.replay_ratings
+
+        def replay_during_a_result(*args, **kwargs):
+            result = original(*args, **kwargs)
+            _adjust_elo(ids[1], 10)
+            db.session.commit()
+            return result
+        monkeypatch.setattr(replay, 'replay_ratings', replay_during_a_result)
+        concurrent = db.session.get(Player, ids[1]).elo + 10
+
+        report = verify_ratings(apply=True)
+        assert report['applied']
+        assert (report['skipped_player_count'], report['skipped_player_ids']) == (1, [ids[1]])
+        db.session.expire_all()
+        assert db.session.get(Player, ids[0]).elo == pytest.approx(expected)
+        assert db.session.get(Player, ids[1]).elo == pytest.approx(concurrent)
+
+    def test_reports_largest_divergences(self, app):
+        """Test that the listed players are capped, largest difference first, while all are counted"""
+        players = record_matches([(0, 1), (1, 2)])
+        for player, drift in zip(players, (5, -50, 20)):
+            player.elo += drift
+        db.session.commit()
+
+        report = verify_ratings(max_reported=2)
+        assert report['divergent_player_count'] == 3
+        assert [p['player_id'] for p in report['divergent_players']] == [players[1].id, players[2].id]
+        assert report['max_abs_difference'] == pytest.approx(50)
+
+    def test_undone_matches_ignored(self, app):
+        """Test that UNDONE matches do not contribute to the replay"""
+        players = record_matches([(0, 1)])
+        match = Match.query.first()
+        players[0].elo -= match.elo_change
+        players[1].elo += match.elo_change
+        match.status = MatchStatus.UNDONE
+        db.session.commit()
+
+        report = verify_ratings()
+        assert report['matches'] == 0
+        assert report['divergent_player_count'] == 0
+
+class TestReplayEndpoint:
+    """Test the admin replay endpoint"""
+
+    def test_requires_admin(self, client, player_token):
+        """Test that players cannot run a replay"""
+        response = client.post('/admin/ratings/replay',
+                               headers={'Authorization': f'Bearer {player_token}'}, json={})
+        assert response.status_code == 401
+
+    def test_replay_report(self, client, admin_token):
+        """Test that admins get a replay report"""
+        response = client.post('/admin/ratings/replay',
+                               headers={'Authorization': f'Bearer {admin_token}'}, json={'apply': False})
+        assert response.status_code == 200
+        assert response.json['divergent_player_count'] == 0
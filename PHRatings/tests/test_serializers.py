@@ -0,0 +1,106 @@
+"""Tests for the column-projected read path and its compiled serializers"""
+import pytest
+from datetime import datetime, timedelta
+from models import db, Player, PlayerStats, Challenge, Match, MatchStatus, Tournament, TournamentParticipant
+from app.archive import archive_cold_rows
+from app.serializers import row_serializer
+
+def orm_player(p, stats):
+    """A /players item as it was built from ORM objects"""
+    return {
+        'id': p.id, 'name': p.name, 'elo': p.elo, 'age': p.age, 'current_age': p.get_current_age(),
+        'weight': p.weight, 'division': p.division, 'status': p.status.value,
+        'games_played': stats.games_played if stats else 0, 'wins': stats.wins if stats else 0,
+        'losses': stats.losses if stats else 0, 'peak_elo': stats.peak_elo if stats else None,
+        'last_played_at': stats.last_played_at if stats else None
+    }
+
+def orm_match(m, status):
+    return {
+        'id': m.id, 'player1_id': m.player1_id, 'player2_id': m.player2_id, 'winner_id': m.winner_id,
+        'host_id': m.host_id, 'tournament_id': m.tournament_id, 'challenge_id': m.challenge_id,
+        'status': status.value, 'created_at': m.created_at, 'completed_at': m.completed_at,
+        'notes': m.notes, 'video_link': m.video_link
+    }
+
+class TestRowSerializer:
+    """Test compiling a serializer from column labels"""
+
+    def test_columns_hidden_and_computed(self):
+        """Test plain columns, '_' inputs that are not returned, and computed keys"""
+        serialize = row_serializer(('id', 'name', '_first', '_last', 'elo'),
+                                   elo=(round, 'elo'), full_name=(lambda a, b: f'{a} {b}', '_first', '_last'))
+        assert serialize((7, 'x', 'Ann', 'Lee', 1200.4)) == {'id': 7, 'name': 'x', 'elo': 1200, 'full_name': 'Ann Lee'}
+        assert serialize.labels == ('id', 'name', '_first', '_last', 'elo')
+
+    def test_unknown_input(self):
+        """Test that a computed key naming a missing column fails when compiled"""
+        with pytest.raises(KeyError):
+            row_serializer(('id',), total=(sum, 'missing'))
+
+class TestSameItems:
+    """Test the listings return exactly what the ORM-built items were"""
+
+    def test_players(self, app, client, multiple_approved_players, pending_player, query_counter):
+        """Test players with and without stats, and that no password hash is read"""
+        with app.app_context():
+            db.session.add(PlayerStats(player_id=multiple_approved_players[0]['id'], games_played=3, wins=2,
+                                       losses=1, peak_elo=1250.0, last_played_at=datetime(2024, 5, 1)))
+            db.session.commit()
+            expected = [orm_player(p, db.session.get(PlayerStats, p.id)) for p in Player.query.order_by(Player.id)]
+
+        query_counter.reset()
+        response = client.get('/players')
+        assert response.json == client.application.json.loads(client.application.json.dumps(expected))
+        assert not any('password_hash' in statement for statement in query_counter.statements)
+
+        stats = client.get(f'/players/{multiple_approved_players[0]["id"]}/stats').json
+        assert (stats['games_played'], stats['peak_elo']) == (3, 1250.0)
+        assert client.get(f'/players/{multiple_approved_players[1]["id"]}/stats').json['games_played'] == 0
+        assert client.get('/players/9999/stats').status_code == 404
+
+    def test_matches_challenges_tournaments(self, app, client, challenge, tournament, multiple_approved_players):
+        """Test live and archived matches, challenges and tournaments"""
+        players = multiple_approved_players
+        with app.app_context():
+            old = datetime.now() - timedelta(days=60)
+            # Undone long ago (archived), completed, and pending past its deadline
+            for status in (MatchStatus.UNDONE, MatchStatus.COMPLETED, MatchStatus.PENDING):
+                db.session.add(Match(player1_id=players[0]['id'], player2_id=players[1]['id'], host_id=players[2]['id'],
+                                     winner_id=players[0]['id'], status=status, created_at=old, completed_at=old,
+                                     notes=f'{status.value} one', expires_at=old))
+            db.session.commit()
+            archive_cold_rows(30, 100)
+            matches = [orm_match(m, m.effective_status) for m in Match.query.order_by(Match.id)]
+            challenges = [{'id': c.id, 'challenger_id': c.challenger_id, 'challenged_id': c.challenged_id,
+                           'host_id': c.host_id, 'status': c.effective_status.value, 'created_at': c.created_at,
+                           'expires_at': c.expires_at} for c in Challenge.query.order_by(Challenge.id)]
+            tournaments = [{'id': t.id, 'name': t.name, 'host_id': t.host_id, 'start_time': t.start_time,
+                            'status': t.effective_status.value, 'participant_count': t.participant_count,
+                            'matches_recorded': t.matches_recorded, 'last_result_at': t.last_result_at,
+                            'leader_id': t.leader_id} for t in Tournament.query.order_by(Tournament.id)]
+            encode = lambda items: app.json.loads(app.json.dumps(items))
+
+            live = client.get('/matches?include_archived=true').json
+            assert [item for item in live if not item.pop('archived')] == encode(matches)
+            archived = [item for item in client.get('/matches?include_archived=true').json if item['archived']]
+            assert [(item['notes'], item['status']) for item in archived] == [('undone one', 'undone')]
+            assert client.get('/challenges').json == encode(challenges)
+            assert client.get('/tournaments').json == encode(tournaments)
+
+    def test_participants_and_pending(self, client, admin_token, tournament, approved_player, pending_player):
+        """Test the participant and pending-player lists"""
+        with client.application.app_context():
+            db.session.add(TournamentParticipant(tournament_id=tournament['id'], player_id=approved_player['id']))
+            db.session.commit()
+
+        participants = client.get(f'/tournaments/{tournament["id"]}/participants').json
+        assert [(p['player_id'], p['player_name'], p['player_status']) for p in participants] == \
+            [(approved_player['id'], 'TestPlayer', 'approved')]
+        assert participants[0]['joined_at']
+        assert client.get('/tournaments/9999/participants').status_code == 404
+
+        pending = client.get('/admin/players/pending', headers={'Authorization': f'Bearer {admin_token}'}).json
+        assert [(p['id'], p['name'], p['age'], p['weight']) for p in pending] == \
+            [(pending_player['id'], 'PendingPlayer', 22, 170.0)]
+        assert pending[0]['registration_date']
@@ -0,0 +1,135 @@
+"""Tests for stateless signed session tokens"""
+import multiprocessing
+import pytest
+from datetime import datetime, timedelta
+from models import AdminSession, PlayerSession
+from app.tokens import issue_token, verify_token, TokenDenyList
+
+SECRET = 'test-secret'
+
+def revoke_many(path, prefix, count):
+    """Revoke count token ids from a separate process"""
+    deny_list = TokenDenyList(path)
+    for i in range(count):
+        deny_list.add(f'{prefix}{i}', datetime.now() + timedelta(hours=1))
+
+@pytest.fixture(scope='function')
+def signed_mode(app):
+    """Switch the test app to signed session tokens"""
+    app.config['SESSION_TOKEN_MODE'] = 'signed'
+    return app
+
+class TestTokenSigning:
+    """Test issuing and verifying signed tokens"""
+
+    def test_round_trip(self):
+        """Test that a token verifies to the user it was issued for"""
+        expires_at = datetime.now().replace(microsecond=0) + timedelta(hours=1)
+        token = issue_token('player', 42, expires_at, secret_key=SECRET)
+
+        user_type, user_id, verified_expiry, token_id = verify_token(token, secret_key=SECRET)
+        assert (user_type, user_id, verified_expiry) == ('player', 42, expires_at)
+        assert token_id
+
+    def test_tampered_token_rejected(self):
+        """Test that changing the payload or key invalidates the token"""
+        expires_at = datetime.now() + timedelta(hours=1)
+        token = issue_token('player', 42, expires_at, secret_key=SECRET)
+        forged = issue_token('admin', 42, expires_at, secret_key='other-secret')
+        prefix, payload, signature = token.split('.')
+
+        assert verify_token(f'{prefix}.{forged.split(".")[1]}.{signature}', secret_key=SECRET) is None
+        assert verify_token(token, secret_key='other-secret') is None
+        assert verify_token('not-a-token', secret_key=SECRET) is None
+
+    def test_expired_token_rejected(self):
+        """Test that an expired token does not verify"""
+        token = issue_token('player', 42, datetime.now() - timedelta(seconds=5), secret_key=SECRET)
+        assert verify_token(token, secret_key=SECRET) is None
+
+class TestTokenDenyList:
+    """Test the persisted deny-list"""
+
+    def test_persisted_between_instances(self, tmp_path):
+        """Test that revocations are reloaded from disk"""
+        path = str(tmp_path / 'denylist.json')
+        TokenDenyList(path).add('abc', datetime.now() + timedelta(hours=1))
+
+        reloaded = TokenDenyList(path)
+        reloaded._load()
+        assert 'abc' in reloaded
+
+    def test_concurrent_processes_keep_every_revocation(self, tmp_path):
+        """Test that logouts in several worker processes at once never drop each other's entries"""
+        path = str(tmp_path / 'denylist.json')
+        context = multiprocessing.get_context('spawn')
+        workers = [context.Process(target=revoke_many, args=(path, f'w{n}-', 40)) for n in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        assert [worker.exitcode for worker in workers] == [0] * 4
+
+        reloaded = TokenDenyList(path)
+        reloaded._load()
+        assert len(reloaded) == 4 * 40
+
+    def test_expired_entries_pruned(self, tmp_path):
+        """Test that entries for already-expired tokens are dropped"""
+        deny_list = TokenDenyList(str(tmp_path / 'denylist.json'))
+        deny_list.add('old', datetime.now() - timedelta(hours=1))
+        deny_list.add('new', datetime.now() + timedelta(hours=1))
+
+        assert 'old' not in deny_list
+        assert 'new' in deny_list
+
+class TestSignedSessions:
+    """Test login, authentication and logout in signed token mode"""
+
+    def test_login_does_not_create_session_rows(self, client, signed_mode, approved_player, admin_user):
+        """Test that signed-mode logins never write session rows"""
+        player_response = client.post('/player/login', json={
+            'name': approved_player['name'],
+            'password': approved_player['password']
+        })
+        admin_response = client.post('/admin/login', json={
+            'username': admin_user['username'],
+            'password': admin_user['password']
+        })
+
+        assert player_response.status_code == 200
+        assert admin_response.status_code == 200
+        with client.application.app_context():
+            assert PlayerSession.query.count() == 0
+            assert AdminSession.query.count() == 0
+
+    def test_authenticated_request(self, client, signed_mode, approved_player):
+        """Test that a signed token authenticates a player request"""
+        token = client.post('/player/login', json={
+            'name': approved_player['name'],
+            'password': approved_player['password']
+        }).json['token']
+
+        response = client.put('/players/weight',
+                              headers={'Authorization': f'Bearer {token}'},
+                              json={'weight': 175.0})
+        assert response.status_code == 200
+
+    def test_logout_revokes_token(self, client, signed_mode, admin_user):
+        """Test that a logged-out signed token is rejected"""
+        token = client.post('/admin/login', json={
+            'username': admin_user['username'],
+            'password': admin_user['password']
+        }).json['token']
+        headers = {'Authorization': f'Bearer {token}'}
+
+        assert client.post('/admin/logout', headers=headers).status_code == 200
+        assert client.get('/admin/players/pending', headers=headers).status_code == 401
+
+    def test_database_token_rejected_in_signed_mode(self, client, player_token, app):
+        """Test that database tokens are not accepted once signed mode is on"""
+        app.config['SESSION_TOKEN_MODE'] = 'signed'
+        response = client.put('/players/weight',
+                              headers={'Authorization': f'Bearer {player_token}'},
+                              json={'weight': 175.0})
+        assert response.status_code == 401
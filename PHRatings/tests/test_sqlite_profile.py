@@ -0,0 +1,130 @@
+"""Tests for the SQLite tuning profiles"""
+import sqlite3
+import threading
+import pytest
+from sqlalchemy.exc import OperationalError
+from app import create_app
+from app.sqlite_profile import current_pragmas
+from models import db, Player
+from tests.conftest import TestConfig
+
+def file_app(tmp_path, profile, **options):
+    class FileConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'profile.db')
+        SQLITE_PROFILE = profile
+    for key, value in options.items():
+        setattr(FileConfig, key, value)
+    return create_app(FileConfig)
+
+class TestProfiles:
+    """Test that profiles reach every connection and the pool"""
+
+    def test_durable_pragmas_and_pool(self, tmp_path):
+        """Test the durable profile's PRAGMAs and pool size on a file database"""
+        app = file_app(tmp_path, 'durable')
+        with app.app_context():
+            with db.engine.connect() as connection:
+                pragmas = current_pragmas(connection)
+            assert pragmas['journal_mode'] == 'wal'
+            assert pragmas['synchronous'] == 2  # FULL
+            assert pragmas['busy_timeout'] == 5000
+            assert db.engine.pool.size() == 5
+            db.engine.dispose()
+
+    def test_fast_profile(self, tmp_path):
+        """Test the fast profile's relaxed sync and memory-mapped I/O"""
+        app = file_app(tmp_path, 'fast')
+        with app.app_context():
+            with db.engine.connect() as connection:
+                pragmas = current_pragmas(connection)
+            assert pragmas['synchronous'] == 1  # NORMAL
+            assert pragmas['mmap_size'] == 268435456
+            assert pragmas['cache_size'] == -65536
+            db.engine.dispose()
+
+    def test_explicit_engine_options_win(self, tmp_path):
+        """Test that SQLALCHEMY_ENGINE_OPTIONS override the profile's pool settings"""
+        app = file_app(tmp_path, 'durable', SQLALCHEMY_ENGINE_OPTIONS={'pool_size': 2})
+        assert app.config['SQLALCHEMY_ENGINE_OPTIONS']['pool_size'] == 2
+        assert app.config['SQLALCHEMY_ENGINE_OPTIONS']['max_overflow'] == 10
+
+    def test_in_memory_database(self):
+        """Test that pool options are skipped for an in-memory database"""
+        class MemoryConfig(TestConfig):
+            SQLITE_PROFILE = 'fast'
+
+        app = create_app(MemoryConfig)
+        assert 'pool_size' not in (app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+        with app.app_context():
+            db.create_all()
+            assert Player.query.count() == 0
+
+    def test_unknown_profile(self, tmp_path):
+        """Test that a misspelled profile fails at startup"""
+        with pytest.raises(ValueError):
+            file_app(tmp_path, 'turbo')
+
+class TestBusyTimeout:
+    """Test that writers wait for the lock instead of failing"""
+
+    def test_write_waits_for_lock(self, tmp_path):
+        """Test that a write succeeds once another connection releases its write lock"""
+        app = file_app(tmp_path, 'durable')
+        with app.app_context():
+            db.create_all()
+
+        writer = sqlite3.connect(tmp_path / 'profile.db', check_same_thread=False)
+        writer.execute('BEGIN IMMEDIATE')
+        release = threading.Timer(0.3, writer.rollback)
+        release.start()
+        try:
+            with app.app_context():
+                db.session.add(Player(name='Waiter', age=30, weight=80.0, password_hash=''))
+                db.session.commit()
+                assert Player.query.count() == 1
+                db.session.remove()
+                db.engine.dispose()
+        finally:
+            release.join()
+            writer.close()
+
+    def test_open_reader_does_not_block_commit(self, tmp_path):
+        """Test that in WAL mode a commit does not wait for a long-running read transaction"""
+        app = file_app(tmp_path, 'durable', SQLALCHEMY_ENGINE_OPTIONS={'connect_args': {'timeout': 0.2}})
+        with app.app_context():
+            db.create_all()
+
+        reader = sqlite3.connect(tmp_path / 'profile.db', isolation_level=None)
+        reader.execute('BEGIN')
+        reader.execute('SELECT COUNT(*) FROM player').fetchone()
+        try:
+            with app.app_context():
+                # The profile's busy_timeout replaces the connect timeout; keep the test short
+                db.session.execute(db.text('PRAGMA busy_timeout = 200'))
+                db.session.add(Player(name='Writer', age=30, weight=80.0, password_hash=''))
+                db.session.commit()
+                db.session.remove()
+                db.engine.dispose()
+        finally:
+            reader.rollback()
+            reader.close()
+
+    def test_default_profile_commit_blocked_by_reader(self, tmp_path):
+        """Test the rollback-journal behaviour the profiles avoid"""
+        app = file_app(tmp_path, 'default', SQLALCHEMY_ENGINE_OPTIONS={'connect_args': {'timeout': 0.2}})
+        with app.app_context():
+            db.create_all()
+
+        reader = sqlite3.connect(tmp_path / 'profile.db', isolation_level=None)
+        reader.execute('BEGIN')
+        reader.execute('SELECT COUNT(*) FROM player').fetchone()
+        try:
+            with app.app_context():
+                db.session.add(Player(name='Writer', age=30, weight=80.0, password_hash=''))
+                with pytest.raises(OperationalError, match='locked'):
+                    db.session.commit()
+                db.session.remove()
+                db.engine.dispose()
+        finally:
+            reader.rollback()
+            reader.close()
@@ -0,0 +1,86 @@
+"""Tests for streamed JSON listings and exports"""
+import json
+import pytest
+from datetime import datetime
+from flask import jsonify
+from models import db, Match
+from app.streaming import encode_chunks
+from tests.conftest import add_matches
+
+class TestEncoding:
+    """Test incremental encoding"""
+
+    @pytest.mark.parametrize('count', [0, 1, 4, 5])
+    def test_matches_jsonify(self, app, count):
+        """Test that the chunked array is byte-identical to jsonify()"""
+        app.config['STREAM_CHUNK_ROWS'] = 2
+        items = [{'id': i, 'at': datetime(2024, 1, i + 1), 'name': 'é'} for i in range(count)]
+        with app.test_request_context():
+            chunks = list(encode_chunks(items))
+            assert ''.join(chunks).encode() == jsonify(items).data
+        # '[', one chunk per two items, ']\n'
+        assert len(chunks) == 2 + (count + 1) // 2
+
+    def test_ndjson(self, app):
+        """Test one compact object per line"""
+        with app.test_request_context():
+            text = ''.join(encode_chunks([{'b': 1, 'a': 2}, {'c': None}], 'ndjson'))
+        assert text == '{"a":2,"b":1}\n{"c":null}\n'
+
+class TestStreamedEndpoints:
+    """Test the listing and export endpoints stream their bodies"""
+
+    def test_listing_is_streamed(self, client, multiple_approved_players):
+        """Test that a listing page is a streamed response with the jsonify() body"""
+        with client.application.app_context():
+            add_matches(multiple_approved_players, 3)
+
+        response = client.get('/matches')
+        assert response.is_streamed
+        body = response.data
+
+        assert response.mimetype == 'application/json'
+        assert len(response.json) == 3
+        with client.application.app_context():
+            assert body == jsonify(response.json).data
+
+    def test_export_all_matches(self, app, client, admin_token, multiple_approved_players):
+        """Test that the export returns every match regardless of the page size, in both formats"""
+        app.config['LISTING_PAGE_SIZE'] = 2
+        app.config['STREAM_CHUNK_ROWS'] = 2
+        with app.app_context():
+            add_matches(multiple_approved_players, 5)
+        headers = {'Authorization': f'Bearer {admin_token}'}
+
+        exported = client.get('/admin/matches/export', headers=headers).json
+        assert [m['id'] for m in exported] == [1, 2, 3, 4, 5]
+        assert exported[0]['status'] == 'completed'
+
+        response = client.get('/admin/matches/export?format=ndjson', headers=headers)
+        assert response.mimetype == 'application/x-ndjson'
+        assert [json.loads(line) for line in response.get_data(as_text=True).splitlines()] == exported
+
+    def test_export_effective_status_and_archive(self, client, admin_token, multiple_approved_players):
+        """Test that live matches carry their effective status and archived ones follow"""
+        with client.application.app_context():
+            db.session.add(Match(player1_id=multiple_approved_players[0]['id'],
+                                 player2_id=multiple_approved_players[1]['id'],
+                                 host_id=multiple_approved_players[2]['id'],
+                                 expires_at=datetime(2024, 1, 1)))
+            db.session.commit()
+            db.session.execute(db.text(
+                "INSERT INTO match_archive (id, player1_id, player2_id, host_id, status, archived_at) "
+                "VALUES (50, 1, 2, 3, 'UNDONE', '2024-02-01 00:00:00')"))
+            db.session.commit()
+
+        exported = client.get('/admin/matches/export?include_archived=true',
+                              headers={'Authorization': f'Bearer {admin_token}'}).json
+        assert [(m['id'], m['status'], m['archived']) for m in exported] == [(1, 'expired', False),
+                                                                           (50, 'undone', True)]
+
+    def test_export_requires_admin_and_valid_format(self, client, admin_token, player_token):
+        """Test authentication and format validation"""
+        assert client.get('/admin/matches/export',
+                          headers={'Authorization': f'Bearer {player_token}'}).status_code == 401
+        assert client.get('/admin/matches/export?format=xml',
+                          headers={'Authorization': f'Bearer {admin_token}'}).status_code == 400
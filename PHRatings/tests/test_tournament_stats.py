@@ -0,0 +1,96 @@
+"""Tests for the incrementally maintained tournament summary counters"""
+import pytest
+from datetime import datetime, timedelta
+from models import db, Tournament, TournamentParticipant
+from app.tournament_stats import repair_tournament_stats
+from tests.conftest import login, auth
+
+@pytest.fixture
+def active_tournament(client, multiple_approved_players):
+    """A started tournament hosted by player 2 with players 0 and 1 registered; returns (id, host token)"""
+    host = multiple_approved_players[2]
+    with client.application.app_context():
+        tournament = Tournament(name='Summary Cup', host_id=host['id'], start_time=datetime.now() + timedelta(hours=1))
+        db.session.add(tournament)
+        db.session.commit()
+        tournament_id = tournament.id
+
+    for player in multiple_approved_players[:2]:
+        response = client.post(f'/tournaments/{tournament_id}/join', headers=auth(login(client, player)), json={})
+        assert response.status_code == 200
+
+    with client.application.app_context():
+        db.session.get(Tournament, tournament_id).start_time = datetime.now() - timedelta(minutes=1)
+        db.session.commit()
+    return tournament_id, login(client, host)
+
+def record(client, tournament_id, token, players, winner):
+    response = client.post(f'/tournaments/{tournament_id}/record-match', headers=auth(token), json={
+        'host_id': players[2]['id'],
+        'player1_id': players[0]['id'],
+        'player2_id': players[1]['id'],
+        'winner_id': players[winner]['id']
+    })
+    assert response.status_code == 200
+
+def summary(client, tournament_id):
+    return next(t for t in client.get('/tournaments').json if t['id'] == tournament_id)
+
+class TestCounters:
+    """Test that join, leave, record-match and undo keep the counters current"""
+
+    def test_join_and_leave(self, client, tournament, multiple_approved_players):
+        """Test participant_count follows joins and leaves"""
+        token = login(client, multiple_approved_players[0])
+        client.post(f'/tournaments/{tournament["id"]}/join', headers=auth(token), json={})
+        assert summary(client, tournament['id'])['participant_count'] == 1
+
+        client.delete(f'/tournaments/{tournament["id"]}/leave', headers=auth(token), json={})
+        assert summary(client, tournament['id'])['participant_count'] == 0
+
+    def test_results_and_leader(self, client, active_tournament, multiple_approved_players):
+        """Test match count, last result time and leader as results come in"""
+        tournament_id, host_token = active_tournament
+        players = multiple_approved_players
+
+        record(client, tournament_id, host_token, players, winner=1)
+        record(client, tournament_id, host_token, players, winner=0)
+        data = summary(client, tournament_id)
+        assert data['participant_count'] == 2
+        assert data['matches_recorded'] == 2
+        # Tied on wins: the participant who joined first leads
+        assert data['leader_id'] == players[0]['id']
+        assert data['last_result_at'] is not None
+
+    def test_undo_reverts_counters(self, client, active_tournament, multiple_approved_players):
+        """Test that undoing the only result clears the summary"""
+        tournament_id, host_token = active_tournament
+        record(client, tournament_id, host_token, multiple_approved_players, winner=1)
+
+        response = client.post('/matches/undo', headers=auth(host_token), json={})
+
+        assert response.status_code == 200
+        data = summary(client, tournament_id)
+        assert (data['matches_recorded'], data['leader_id'], data['last_result_at']) == (0, None, None)
+
+class TestRepair:
+    """Test recomputing the counters from scratch"""
+
+    def test_repair_fixes_drift(self, client, active_tournament, multiple_approved_players):
+        """Test that corrupted counters are detected and recomputed"""
+        tournament_id, host_token = active_tournament
+        record(client, tournament_id, host_token, multiple_approved_players, winner=0)
+
+        with client.application.app_context():
+            assert repair_tournament_stats() == 0
+            db.session.get(Tournament, tournament_id).participant_count = 7
+            db.session.get(Tournament, tournament_id).leader_id = None
+            TournamentParticipant.query.update({'wins': 0})
+            db.session.commit()
+
+            assert repair_tournament_stats() == 1
+            db.session.commit()
+
+        data = summary(client, tournament_id)
+        assert (data['participant_count'], data['matches_recorded'], data['leader_id']) == \
+            (2, 1, multiple_approved_players[0]['id'])